@@ -56,6 +56,14 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # app.database включает внешние ключи для всех соединений SQLite;
+            # пересоздание таблицы в batch-режиме удаляет старую, и DROP TABLE
+            # каскадом удалил бы дочерние строки. PRAGMA действует только вне
+            # транзакции, поэтому она сразу фиксируется
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+
         context.configure(
             connection=connection, target_metadata=target_metadata
         )
@@ -0,0 +1,23 @@
+"""add comments keyset index
+
+Revision ID: c4788b6984a2
+Revises: 78e673197b00
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c4788b6984a2'
+down_revision = '78e673197b00'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_comments_task_id_created_at_id', 'comments', ['task_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comments_task_id_created_at_id', table_name='comments')
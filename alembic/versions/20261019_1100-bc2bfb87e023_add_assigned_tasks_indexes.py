@@ -0,0 +1,25 @@
+"""add assigned tasks indexes
+
+Revision ID: bc2bfb87e023
+Revises: c4788b6984a2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'bc2bfb87e023'
+down_revision = 'c4788b6984a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_assignee_id_status_due_date', 'tasks', ['assignee_id', 'status', 'due_date'], unique=False)
+    op.create_index('ix_project_members_project_id_user_id', 'project_members', ['project_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_project_members_project_id_user_id', table_name='project_members')
+    op.drop_index('ix_tasks_assignee_id_status_due_date', table_name='tasks')
@@ -0,0 +1,25 @@
+"""add project version
+
+Revision ID: 17cff63f6026
+Revises: bc2bfb87e023
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '17cff63f6026'
+down_revision = 'bc2bfb87e023'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('version')
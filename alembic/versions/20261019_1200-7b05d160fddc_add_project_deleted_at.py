@@ -0,0 +1,41 @@
+"""add project deleted_at
+
+Revision ID: 7b05d160fddc
+Revises: 17cff63f6026
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '7b05d160fddc'
+down_revision = '17cff63f6026'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index(batch_op.f('ix_projects_deleted_at'), ['deleted_at'], unique=False)
+
+    # Уже неактивные проекты отсчитывают срок хранения от последнего изменения
+    projects = sa.table(
+        'projects',
+        sa.column('is_active', sa.Boolean),
+        sa.column('deleted_at', sa.DateTime),
+        sa.column('updated_at', sa.DateTime),
+        sa.column('created_at', sa.DateTime),
+    )
+    op.execute(
+        projects.update()
+        .where(projects.c.is_active == sa.false())
+        .values(deleted_at=sa.func.coalesce(projects.c.updated_at, projects.c.created_at))
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projects_deleted_at'))
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,77 @@
+"""add task archive tables
+
+Revision ID: ca3dfca08b36
+Revises: 7b05d160fddc
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'ca3dfca08b36'
+down_revision = '7b05d160fddc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('archived_tasks',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('assignee_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('TODO', 'IN_PROGRESS', 'REVIEW', 'DONE', name='taskstatus'), nullable=False),
+    sa.Column('priority', sa.Enum('LOW', 'MEDIUM', 'HIGH', 'URGENT', name='taskpriority'), nullable=False),
+    sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['assignee_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_tasks_project_id_id', 'archived_tasks', ['project_id', 'id'], unique=False)
+    op.create_table('archived_attachments',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['task_id'], ['archived_tasks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_attachments_task_id'), 'archived_attachments', ['task_id'], unique=False)
+    op.create_table('archived_comments',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['task_id'], ['archived_tasks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_comments_task_id_created_at_id', 'archived_comments', ['task_id', 'created_at', 'id'], unique=False)
+    op.create_table('archived_task_tags',
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['task_id'], ['archived_tasks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('task_id', 'tag_id')
+    )
+    op.create_index('ix_tasks_status_updated_at', 'tasks', ['status', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_status_updated_at', table_name='tasks')
+    op.drop_table('archived_task_tags')
+    op.drop_index('ix_archived_comments_task_id_created_at_id', table_name='archived_comments')
+    op.drop_table('archived_comments')
+    op.drop_index(op.f('ix_archived_attachments_task_id'), table_name='archived_attachments')
+    op.drop_table('archived_attachments')
+    op.drop_index('ix_archived_tasks_project_id_id', table_name='archived_tasks')
+    op.drop_table('archived_tasks')
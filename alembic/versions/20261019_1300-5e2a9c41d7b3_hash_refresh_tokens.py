@@ -0,0 +1,70 @@
+"""hash refresh tokens
+
+Revision ID: 5e2a9c41d7b3
+Revises: ca3dfca08b36
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+import hashlib
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '5e2a9c41d7b3'
+down_revision = 'ca3dfca08b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.add_column(sa.Column('token_hash', sa.LargeBinary(length=32), nullable=True))
+        batch_op.add_column(sa.Column('family_id', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('used_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Действующие токены сохраняются: каждый становится началом своей цепочки
+    refresh_tokens = sa.table(
+        'refresh_tokens',
+        sa.column('id', sa.Integer),
+        sa.column('token', sa.String),
+        sa.column('token_hash', sa.LargeBinary),
+        sa.column('family_id', sa.String),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(refresh_tokens.c.id, refresh_tokens.c.token)).all()
+    for token_id, token in rows:
+        conn.execute(
+            refresh_tokens.update()
+            .where(refresh_tokens.c.id == token_id)
+            .values(
+                token_hash=hashlib.sha256(token.encode('utf-8')).digest(),
+                family_id=secrets.token_hex(16)
+            )
+        )
+
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_token'))
+        batch_op.drop_column('token')
+        batch_op.alter_column('token_hash', existing_type=sa.LargeBinary(length=32), nullable=False)
+        batch_op.alter_column('family_id', existing_type=sa.String(length=32), nullable=False)
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_token_hash'), ['token_hash'], unique=True)
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_family_id'), ['family_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Исходные токены из хэшей не восстановить - пользователи войдут заново
+    op.execute(sa.text('DELETE FROM refresh_tokens'))
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_user_id'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_family_id'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_token_hash'))
+        batch_op.add_column(sa.Column('token', sa.String(length=500), nullable=False))
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_token'), ['token'], unique=True)
+        batch_op.drop_column('used_at')
+        batch_op.drop_column('family_id')
+        batch_op.drop_column('token_hash')
@@ -0,0 +1,25 @@
+"""add user membership epoch
+
+Revision ID: d3b7e0a64c19
+Revises: a81f3c5e92d4
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd3b7e0a64c19'
+down_revision = 'a81f3c5e92d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('membership_epoch', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('membership_epoch')
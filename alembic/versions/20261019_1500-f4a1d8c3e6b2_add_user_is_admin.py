@@ -0,0 +1,25 @@
+"""add user is_admin
+
+Revision ID: f4a1d8c3e6b2
+Revises: 6c0e4f2b9a57
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f4a1d8c3e6b2'
+down_revision = '6c0e4f2b9a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('is_admin', sa.Boolean(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('is_admin')
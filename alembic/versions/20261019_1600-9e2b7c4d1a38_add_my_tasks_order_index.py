@@ -0,0 +1,37 @@
+"""add my tasks order index
+
+Revision ID: 9e2b7c4d1a38
+Revises: f4a1d8c3e6b2
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '9e2b7c4d1a38'
+down_revision = 'f4a1d8c3e6b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Выражения должны совпадать с task_priority_rank и task_due_date_or_last из app/models.py
+    op.create_index(
+        'ix_tasks_assignee_id_priority_rank_due_date_id',
+        'tasks',
+        [
+            'assignee_id',
+            sa.text(
+                "CASE WHEN (priority = 'URGENT') THEN 0 WHEN (priority = 'HIGH') THEN 1 "
+                "WHEN (priority = 'MEDIUM') THEN 2 WHEN (priority = 'LOW') THEN 3 END"
+            ),
+            sa.text("coalesce(due_date, '9999-12-31 00:00:00.000000')"),
+            'id',
+        ],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_assignee_id_priority_rank_due_date_id', table_name='tasks')
@@ -0,0 +1,61 @@
+"""autoincrement archived ids
+
+Revision ID: 3d6f8a1c5b72
+Revises: 9e2b7c4d1a38
+Create Date: 2026-10-19 16:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '3d6f8a1c5b72'
+down_revision = '9e2b7c4d1a38'
+branch_labels = None
+depends_on = None
+
+# (горячая таблица, её архивная пара)
+TABLES = [
+    ('tasks', 'archived_tasks'),
+    ('comments', 'archived_comments'),
+    ('attachments', 'archived_attachments'),
+]
+
+
+def create_my_tasks_index() -> None:
+    # Индекс по выражениям не отражается при пересоздании tasks; то же, что в 9e2b7c4d1a38
+    op.create_index(
+        'ix_tasks_assignee_id_priority_rank_due_date_id',
+        'tasks',
+        [
+            'assignee_id',
+            sa.text(
+                "CASE WHEN (priority = 'URGENT') THEN 0 WHEN (priority = 'HIGH') THEN 1 "
+                "WHEN (priority = 'MEDIUM') THEN 2 WHEN (priority = 'LOW') THEN 3 END"
+            ),
+            sa.text("coalesce(due_date, '9999-12-31 00:00:00.000000')"),
+            'id',
+        ],
+        unique=False
+    )
+
+
+def upgrade() -> None:
+    for table, archived in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        # Счётчик продолжается за наибольшим id, который уже выдавался, в том
+        # числе ушедшим в архив: иначе новая строка получит id архивной
+        op.execute(sa.text(f"DELETE FROM sqlite_sequence WHERE name = '{table}'"))
+        op.execute(sa.text(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table}', "
+            f"max(coalesce((SELECT max(id) FROM {table}), 0), coalesce((SELECT max(id) FROM {archived}), 0))"
+        ))
+    create_my_tasks_index()
+
+
+def downgrade() -> None:
+    for table, _ in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
+    create_my_tasks_index()
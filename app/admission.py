@@ -0,0 +1,196 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .metrics import registry
+
+shed_requests = registry.counter("taskmanager_requests_shed_total", "Запросы, отклонённые с 503 по группам маршрутов")
+active_requests = registry.gauge("taskmanager_requests_active", "Выполняющиеся запросы по группам маршрутов")
+queued_requests = registry.gauge("taskmanager_requests_queued", "Запросы в очереди на допуск по группам маршрутов")
+db_latency_gauge = registry.gauge("taskmanager_db_latency_seconds", "Сглаженная длительность SQL запроса")
+
+# Тяжёлые маршруты (пути внутри /api/v1) в своих группах, чтобы не
+# вытеснять записи задач. Остальные делятся на reads (GET) и writes
+ROUTE_GROUPS = {
+    "/auth/login": "auth",
+    "/auth/register": "auth",
+    "/projects/{project_id}/stats": "reports",
+    "/projects/{project_id}/board": "reports",
+    "/projects/{project_id}/archive/tasks": "reports",
+    "/admin/users/bulk": "bulk",
+}
+
+
+class DbLatency:
+    """
+    Экспоненциально сглаженная длительность SQL запросов всех движков.
+    Пока она выше DB_LATENCY_TARGET_MS, лимиты групп уменьшаются
+    пропорционально - медленная БД получает меньше одновременных запросов.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            if self.value is None:
+                self.value = seconds
+            else:
+                self.value += self.alpha * (seconds - self.value)
+            db_latency_gauge.set(self.value)
+
+    def admission_factor(self) -> float:
+        target = settings.DB_LATENCY_TARGET_MS / 1000
+        if self.value is None or self.value <= target:
+            return 1.0
+        return max(settings.DB_LATENCY_MIN_ADMISSION, target / self.value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.value = None
+
+
+db_latency = DbLatency()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        db_latency.observe(time.perf_counter() - started)
+
+
+class RouteLimiter:
+    """
+    Лимит одновременных запросов группы. Работает в цикле событий и не
+    требует блокировок; освобождённое место передаётся первому в очереди.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        limits = settings.ROUTE_CONCURRENCY
+        return limits.get(self.name, limits["default"])
+
+    @property
+    def capacity(self) -> int:
+        return max(1, int(self.limit * db_latency.admission_factor()))
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.capacity and not self._waiters:
+            self._enter()
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        queued_requests.set(len(self._waiters), group=self.name)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # Клиент ушёл, а место уже передано - возвращаем его следующему
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            queued_requests.set(len(self._waiters), group=self.name)
+        # Переданное место уже учтено в active тем, кто его освободил
+        return waiter.done() and not waiter.cancelled()
+
+    def release(self) -> None:
+        if self.active <= self.capacity:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.active -= 1
+        active_requests.set(self.active, group=self.name)
+
+    def _enter(self) -> None:
+        self.active += 1
+        active_requests.set(self.active, group=self.name)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"active": self.active, "limit": self.capacity, "waiting": self.waiting}
+
+
+class AdmissionControl:
+    """Лимитеры групп маршрутов процесса и сводка их загрузки для /health"""
+
+    def __init__(self):
+        self.limiters: Dict[str, RouteLimiter] = {}
+
+    def limiter(self, group: str) -> RouteLimiter:
+        limiter = self.limiters.get(group)
+        if limiter is None:
+            limiter = self.limiters[group] = RouteLimiter(group)
+        return limiter
+
+    def saturation(self) -> Dict:
+        groups = {name: limiter.snapshot() for name, limiter in self.limiters.items()}
+        return {
+            "saturated": db_latency.admission_factor() < 1 or any(g["waiting"] for g in groups.values()),
+            "db_latency_ms": round(db_latency.value * 1000, 3) if db_latency.value is not None else None,
+            "admission_factor": round(db_latency.admission_factor(), 3),
+            "groups": groups,
+        }
+
+
+admission_control = AdmissionControl()
+
+
+async def admit(request: Request):
+    """
+    Допуск запроса API по группе маршрута (ROUTE_CONCURRENCY).
+
+    Запрос ждёт места в своей группе не дольше ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    затем получает 503 с Retry-After - вместо того чтобы копиться в пуле
+    потоков и тянуть вверх задержку всех остальных. Подключается зависимостью
+    роутера /api/v1: маршрут к этому моменту уже известен, а синхронные
+    зависимости и эндпоинт ещё не отправлены в пул потоков.
+    """
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+
+    path = request.scope["route"].path
+    group = ROUTE_GROUPS.get(path) or ("reads" if request.method in ("GET", "HEAD") else "writes")
+    limiter = admission_control.limiter(group)
+    if not await limiter.acquire(settings.ADMISSION_QUEUE_TIMEOUT_SECONDS):
+        shed_requests.inc(group=group)
+        raise HTTPException(
+            status_code=503,
+            detail="Сервис перегружен, повторите запрос позже",
+            headers={"Retry-After": str(math.ceil(settings.ADMISSION_QUEUE_TIMEOUT_SECONDS) or 1)}
+        )
+    try:
+        yield
+    finally:
+        limiter.release()
@@ -0,0 +1,88 @@
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional, FrozenSet, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from .cache import LRUCache
+from .config import settings
+from .models import ApiKey, User
+
+# Ключ: tm_<prefix>_<secret>. Префикс хранится открыто и индексирован -
+# по нему находится строка, секрет сверяется по HMAC
+API_KEY_MARKER = "tm_"
+
+
+class VerifiedKey(NamedTuple):
+    key_id: int
+    user_id: int
+    project_ids: Optional[FrozenSet[int]]
+    expires_at: Optional[datetime]
+    verified_at: float
+
+
+# Проверенные ключи по HMAC: повторные запросы не ходят в api_keys.
+# Отзыв в этом процессе удаляет запись сразу, в остальных - через TTL
+api_key_cache = LRUCache(settings.API_KEY_CACHE_SIZE)
+
+
+def is_api_key(token: str) -> bool:
+    return token.startswith(API_KEY_MARKER)
+
+
+def digest_api_key(key: str) -> bytes:
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), key.encode('utf-8'), hashlib.sha256).digest()
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """Возвращает (ключ, префикс)"""
+    prefix = secrets.token_hex(4)
+    return f"{API_KEY_MARKER}{prefix}_{secrets.token_urlsafe(32)}", prefix
+
+
+def verify_api_key(db: Session, key: str) -> Optional[VerifiedKey]:
+    parts = key[len(API_KEY_MARKER):].split("_", 1)
+    if len(parts) != 2:
+        return None
+
+    digest = digest_api_key(key)
+    now = time.monotonic()
+
+    verified = api_key_cache.get(digest)
+    if verified is None or now - verified.verified_at > settings.API_KEY_CACHE_TTL_SECONDS:
+        verified = None
+        for api_key in db.query(ApiKey).filter(ApiKey.prefix == parts[0]):
+            if hmac.compare_digest(api_key.key_hash, digest):
+                verified = VerifiedKey(
+                    api_key.id,
+                    api_key.user_id,
+                    frozenset(api_key.project_ids) if api_key.project_ids is not None else None,
+                    api_key.expires_at,
+                    now
+                )
+                api_key_cache.set(digest, verified)
+                break
+        else:
+            api_key_cache.pop(digest)
+            return None
+
+    if verified.expires_at is not None and verified.expires_at < datetime.utcnow():
+        return None
+
+    return verified
+
+
+def forget_api_key(api_key: ApiKey) -> None:
+    api_key_cache.pop(api_key.key_hash)
+
+
+def check_key_scope(user: User, project_id: int) -> None:
+    if user.api_key_scope is not None and project_id not in user.api_key_scope:
+        raise HTTPException(
+            status_code=403,
+            detail="API ключ не допускает доступ к проекту"
+        )
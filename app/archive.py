@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import and_, exists, insert, or_, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .metrics import registry
+from .models import (
+    Task,
+    Comment,
+    Attachment,
+    TaskStatus,
+    ArchivedTask,
+    ArchivedComment,
+    ArchivedAttachment,
+    task_tags,
+    archived_task_tags,
+)
+from .versioning import bump_project_version
+
+archived_tasks_total = registry.counter("taskmanager_archive_tasks_total", "Задачи, перенесённые в архив")
+restored_tasks_total = registry.counter("taskmanager_archive_restored_total", "Задачи, возвращённые из архива")
+archive_last_run = registry.gauge("taskmanager_archive_last_run_seconds", "Длительность последнего запуска архивации")
+
+# (горячая таблица, холодная таблица, колонка ссылки на задачу)
+TASK_TABLES = [
+    (Task.__table__, ArchivedTask.__table__, "id"),
+    (Comment.__table__, ArchivedComment.__table__, "task_id"),
+    (Attachment.__table__, ArchivedAttachment.__table__, "task_id"),
+    (task_tags, archived_task_tags, "task_id"),
+]
+
+
+def _copy_rows(db: Session, source, target, key: str, task_ids: List[int], columns: List[str]) -> None:
+    db.execute(
+        insert(target).from_select(
+            columns,
+            select(*[source.c[name] for name in columns]).where(source.c[key].in_(task_ids))
+        )
+    )
+
+
+def archive_tasks(db: Session, task_ids: List[int]) -> None:
+    """Переносит задачи с комментариями, вложениями и тегами в архив (без коммита)"""
+    for hot, cold, key in TASK_TABLES:
+        _copy_rows(db, hot, cold, key, task_ids, hot.columns.keys())
+    # Дочерние строки горячих таблиц удаляет каскад внешних ключей
+    db.query(Task).filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
+
+
+def restore_tasks(db: Session, task_ids: List[int]) -> None:
+    """Возвращает задачи из архива в горячие таблицы (без коммита)"""
+    for hot, cold, key in TASK_TABLES:
+        _copy_rows(db, cold, hot, key, task_ids, hot.columns.keys())
+    db.query(ArchivedTask).filter(ArchivedTask.id.in_(task_ids)).delete(synchronize_session=False)
+
+
+class TaskArchiver:
+    """
+    Перенос завершённых задач старше ARCHIVE_AFTER_DAYS в архивные таблицы.
+
+    Работает порциями по ARCHIVE_BATCH_SIZE задач, каждая порция - отдельная
+    транзакция; запуск ограничен по времени ARCHIVE_MAX_RUN_SECONDS.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        after_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_run_seconds: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.after_days = settings.ARCHIVE_AFTER_DAYS if after_days is None else after_days
+        self.batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        self.max_run_seconds = settings.ARCHIVE_MAX_RUN_SECONDS if max_run_seconds is None else max_run_seconds
+
+    def _due_tasks(self, db: Session):
+        cutoff = datetime.utcnow() - timedelta(days=self.after_days)
+        # Без COALESCE, чтобы запрос шёл по индексу (status, updated_at).
+        # Задача, чей id уже есть в архиве (выдан повторно до перехода на
+        # AUTOINCREMENT), остаётся в горячей таблице, а не валит всю порцию
+        return db.query(Task.id, Task.project_id).filter(
+            Task.status == TaskStatus.DONE,
+            or_(
+                Task.updated_at < cutoff,
+                and_(Task.updated_at == None, Task.created_at < cutoff)
+            ),
+            ~exists().where(ArchivedTask.id == Task.id)
+        )
+
+    def run_once(self) -> int:
+        started = time.monotonic()
+        archived = 0
+
+        with self.session_factory() as db:
+            while time.monotonic() - started < self.max_run_seconds:
+                rows = self._due_tasks(db).order_by(Task.id).limit(self.batch_size).all()
+                if not rows:
+                    break
+
+                archive_tasks(db, [task_id for task_id, _ in rows])
+                for project_id in {project_id for _, project_id in rows}:
+                    bump_project_version(db, project_id)
+                db.commit()
+
+                archived += len(rows)
+                archived_tasks_total.inc(len(rows))
+
+        archive_last_run.set(time.monotonic() - started)
+        return archived
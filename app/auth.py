@@ -1,36 +1,35 @@
+import hashlib
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
+from .api_keys import is_api_key, verify_api_key
+from .claims import MEMBERSHIP_CLAIM, parse_membership_claim
 from .config import settings
 from .database import get_db
 from .models import User, RefreshToken
+from .passwords import verify_password, get_password_hash, schedule_rehash
+from .revocation import revocation_list
+from .tracing import traced
 
 security = HTTPBearer()
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-
-
-def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-
-def create_access_token(user_id: int) -> str:
+def create_access_token(user_id: int, membership_claim: Optional[dict] = None) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     data = {
         "sub": str(user_id),
         "exp": expire,
-        "type": "access"
+        "type": "access",
+        "jti": secrets.token_urlsafe(16)
     }
+    if membership_claim is not None:
+        data[MEMBERSHIP_CLAIM] = membership_claim
     
     token = jwt.encode(data, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return token
@@ -42,19 +41,15 @@ def create_refresh_token(user_id: int) -> str:
     data = {
         "sub": str(user_id),
         "exp": expire,
-        "type": "refresh"
+        "type": "refresh",
+        "jti": secrets.token_urlsafe(16)
     }
     
     token = jwt.encode(data, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return token
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
-    
+def decode_access_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
@@ -69,14 +64,45 @@ def get_current_user(
             detail="Неправильный тип токена"
         )
     
-    user_id_str = payload.get("sub")
-    if not user_id_str:
-        raise HTTPException(
-            status_code=401,
-            detail="Токен не содержит ID пользователя"
-        )
+    return payload
+
+
+@traced("auth.get_current_user")
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    token = credentials.credentials
     
-    user_id = int(user_id_str)
+    if is_api_key(token):
+        api_key = verify_api_key(db, token)
+        if not api_key:
+            raise HTTPException(
+                status_code=401,
+                detail="API ключ недействителен"
+            )
+        user_id = api_key.user_id
+        scope = api_key.project_ids
+        payload = {}
+    else:
+        payload = decode_access_token(token)
+        
+        user_id_str = payload.get("sub")
+        if not user_id_str:
+            raise HTTPException(
+                status_code=401,
+                detail="Токен не содержит ID пользователя"
+            )
+        
+        jti = payload.get("jti")
+        if jti and revocation_list.is_revoked(db, jti):
+            raise HTTPException(
+                status_code=401,
+                detail="Токен отозван"
+            )
+        
+        user_id = int(user_id_str)
+        scope = None
     
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -91,9 +117,29 @@ def get_current_user(
             detail="Пользователь заблокирован"
         )
     
+    user.token_memberships = parse_membership_claim(payload, user)
+    user.api_key_scope = scope
+    
     return user
 
 
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Требуются права администратора"
+        )
+    
+    # Ключ, ограниченный проектами, не даёт прав на действия вне проектов
+    if current_user.api_key_scope is not None:
+        raise HTTPException(
+            status_code=403,
+            detail="API ключ, ограниченный проектами, не допускает административные действия"
+        )
+    
+    return current_user
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     user = db.query(User).filter(User.username == username).first()
     
@@ -103,16 +149,25 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     if not verify_password(password, user.hashed_password):
         return None
     
+    schedule_rehash(db, user, password)
+    
     return user
 
 
-def save_refresh_token(db: Session, user_id: int, token: str):
-    db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete()
-    
+def hash_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+def save_refresh_token(db: Session, user_id: int, token: str, family_id: Optional[str] = None):
+    """
+    Сохраняет refresh токен. Без family_id начинается новая цепочка -
+    у каждого устройства своя, вход на одном не разлогинивает остальные.
+    """
     expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
     new_token = RefreshToken(
-        token=token,
+        token_hash=hash_token(token),
+        family_id=family_id or secrets.token_hex(16),
         user_id=user_id,
         expires_at=expires_at
     )
@@ -121,7 +176,28 @@ def save_refresh_token(db: Session, user_id: int, token: str):
     db.commit()
 
 
-def check_refresh_token(db: Session, token: str) -> Optional[User]:
+def revoke_token_family(db: Session, family_id: str):
+    db.query(RefreshToken).filter(
+        RefreshToken.family_id == family_id
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def revoke_refresh_token(db: Session, token: str, user_id: int):
+    """Отзывает цепочку, к которой относится токен (выход на одном устройстве)"""
+    db_token = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_token(token),
+        RefreshToken.user_id == user_id
+    ).first()
+    if db_token:
+        revoke_token_family(db, db_token.family_id)
+
+
+def check_refresh_token(db: Session, token: str) -> Optional[RefreshToken]:
+    """
+    Проверяет и погашает refresh токен. Каждый токен обменивается один раз:
+    повторное предъявление значит, что токен утёк, и вся цепочка отзывается.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
@@ -130,15 +206,23 @@ def check_refresh_token(db: Session, token: str) -> Optional[User]:
     if payload.get("type") != "refresh":
         return None
     
-    db_token = db.query(RefreshToken).filter(RefreshToken.token == token).first()
+    db_token = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
     if not db_token:
         return None
     
     now = datetime.utcnow()
     if db_token.expires_at < now:
-        db.delete(db_token)
-        db.commit()
         return None
     
-    user = db.query(User).filter(User.id == db_token.user_id).first()
-    return user
+    # Условное обновление: из двух одновременных обменов выиграет только один
+    consumed = db.query(RefreshToken).filter(
+        RefreshToken.id == db_token.id,
+        RefreshToken.used_at.is_(None)
+    ).update({RefreshToken.used_at: now}, synchronize_session=False)
+    db.commit()
+    
+    if not consumed:
+        revoke_token_family(db, db_token.family_id)
+        return None
+    
+    return db_token
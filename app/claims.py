@@ -0,0 +1,113 @@
+import base64
+import json
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import User, Project, ProjectMember, ProjectRole
+
+# Ключ claims членства в access токене
+MEMBERSHIP_CLAIM = "mbr"
+
+
+class IdSet:
+    """
+    Множество id проектов из токена. Короткие множества кодируются списком,
+    плотные - битовой картой "b:<минимальный id>:<base64>"; выбирается то,
+    что короче.
+    """
+
+    def __init__(self, encoded):
+        self.ids = None
+        self.offset = 0
+        self.bitmap = b""
+        if isinstance(encoded, list):
+            self.ids = frozenset(encoded)
+        else:
+            _, offset, data = encoded.split(":", 2)
+            self.offset = int(offset)
+            self.bitmap = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+    def __contains__(self, project_id: int) -> bool:
+        if self.ids is not None:
+            return project_id in self.ids
+        position = project_id - self.offset
+        if position < 0 or position >= len(self.bitmap) * 8:
+            return False
+        return bool(self.bitmap[position >> 3] & (1 << (position & 7)))
+
+    @staticmethod
+    def encode(ids: Iterable[int]):
+        ids = sorted(ids)
+        if not ids:
+            return []
+        offset = ids[0]
+        bitmap = bytearray((ids[-1] - offset) // 8 + 1)
+        for project_id in ids:
+            position = project_id - offset
+            bitmap[position >> 3] |= 1 << (position & 7)
+        encoded = f"b:{offset}:" + base64.urlsafe_b64encode(bytes(bitmap)).rstrip(b"=").decode()
+        if len(encoded) < len(json.dumps(ids, separators=(",", ":"))):
+            return encoded
+        return ids
+
+
+class MembershipClaims:
+    """Членство пользователя на момент выдачи токена"""
+
+    def __init__(self, claim: dict):
+        self.epoch = claim["e"]
+        self.roles = {ProjectRole(role): IdSet(value) for role, value in claim["r"].items()}
+
+    def role_for(self, project_id: int) -> Optional[ProjectRole]:
+        for role, ids in self.roles.items():
+            if project_id in ids:
+                return role
+        return None
+
+
+def build_membership_claim(db: Session, user: User) -> Optional[dict]:
+    """
+    Claim для access токена или None, если claims выключены или не
+    помещаются в MEMBERSHIP_CLAIMS_MAX_BYTES - тогда доступ проверяется по БД.
+    """
+    if not settings.MEMBERSHIP_CLAIMS_ENABLED:
+        return None
+
+    by_role: Dict[ProjectRole, list] = {}
+    for project_id, role in db.query(ProjectMember.project_id, ProjectMember.role).filter(
+        ProjectMember.user_id == user.id
+    ):
+        by_role.setdefault(role, []).append(project_id)
+    owned = [project_id for (project_id,) in db.query(Project.id).filter(Project.owner_id == user.id)]
+    if owned:
+        by_role.setdefault(ProjectRole.OWNER, []).extend(owned)
+
+    claim = {
+        "e": user.membership_epoch or 0,
+        "r": {role.value: IdSet.encode(set(ids)) for role, ids in by_role.items()}
+    }
+    if len(json.dumps(claim, separators=(",", ":"))) > settings.MEMBERSHIP_CLAIMS_MAX_BYTES:
+        return None
+    return claim
+
+
+def parse_membership_claim(payload: dict, user: User) -> Optional[MembershipClaims]:
+    """Claims из токена, если они есть и эпоха членства пользователя не сменилась"""
+    claim = payload.get(MEMBERSHIP_CLAIM)
+    if not claim or claim.get("e") != (user.membership_epoch or 0):
+        return None
+    try:
+        return MembershipClaims(claim)
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def token_grants_access(user: User, project_id: int) -> bool:
+    """
+    True, если claims токена подтверждают членство. Отрицательный ответ не
+    окончателен: проекты, появившиеся после выдачи токена, проверяются по БД.
+    """
+    claims = getattr(user, "token_memberships", None)
+    return claims is not None and claims.role_for(project_id) is not None
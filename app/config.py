@@ -1,3 +1,5 @@
+from typing import Dict, Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -9,6 +11,123 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     DEBUG: bool = False
     PROJECT_NAME: str = "TaskManager API"
+    FAST_JSON: bool = False
+    # Роутеры подключаются при запуске, а не при импорте; схема OpenAPI
+    # берётся из app/openapi.json; пул БД и кэши прогреваются, см. app/startup.py
+    FAST_STARTUP: bool = False
+    WARMUP_DB_CONNECTIONS: int = 4
+
+    # Очистка неактивных (soft delete) проектов, см. app/purge.py
+    PURGE_ENABLED: bool = False
+    PROJECT_RETENTION_DAYS: int = 30
+    PURGE_INTERVAL_SECONDS: float = 600
+    PURGE_BATCH_SIZE: int = 500
+    PURGE_MAX_RUN_SECONDS: float = 5.0
+    PURGE_PAUSE_SECONDS: float = 0.05
+
+    # Архивация завершённых задач, см. app/archive.py
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_INTERVAL_SECONDS: float = 3600
+    ARCHIVE_BATCH_SIZE: int = 200
+    ARCHIVE_MAX_RUN_SECONDS: float = 5.0
+
+    # Удаление просроченных refresh токенов и отзывов, см. app/tokens.py
+    TOKEN_SWEEP_ENABLED: bool = True
+    TOKEN_SWEEP_INTERVAL_SECONDS: float = 3600
+    TOKEN_SWEEP_BATCH_SIZE: int = 1000
+    TOKEN_SWEEP_MAX_RUN_SECONDS: float = 5.0
+
+    # Членство в проектах внутри access токена, см. app/claims.py
+    MEMBERSHIP_CLAIMS_ENABLED: bool = False
+    MEMBERSHIP_CLAIMS_MAX_BYTES: int = 2048
+
+    # API ключи сервисных аккаунтов, см. app/api_keys.py
+    API_KEY_CACHE_SIZE: int = 1024
+    API_KEY_CACHE_TTL_SECONDS: float = 60
+
+    # Хэширование паролей, см. app/passwords.py. Хэши со старыми
+    # параметрами перехэшируются при следующем входе
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "scrypt"] = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    SCRYPT_N_LOG2: int = 14
+    SCRYPT_R: int = 8
+    SCRYPT_P: int = 1
+    # Процессы для массового хэширования (POST /admin/users/bulk); по умолчанию - число CPU
+    HASH_POOL_SIZE: Optional[int] = None
+
+    # Ограничение попыток входа, см. app/ratelimit.py
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 20
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_USERNAME_PER_MINUTE: float = 5
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+
+    # Клиент Redis, общий для ограничения входа и кэша ответов, см. app/redis_client.py
+    REDIS_TIMEOUT_SECONDS: float = 0.5
+
+    # Отзыв access токенов (logout), см. app/revocation.py
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_SYNC_ENABLED: bool = True
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = 5
+
+    # Кэш ответов GET по версии проекта, см. app/response_cache.py.
+    # С RESPONSE_CACHE_REDIS_URL кэш общий для воркеров; тот же адрес, что у
+    # RATE_LIMIT_REDIS_URL, использует тот же клиент
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+
+    # Допуск запросов по группам маршрутов, см. app/admission.py. Пока
+    # сглаженная задержка SQL выше цели, лимиты уменьшаются пропорционально,
+    # но не ниже DB_LATENCY_MIN_ADMISSION от заданных
+    ADMISSION_ENABLED: bool = True
+    ROUTE_CONCURRENCY: Dict[str, int] = {
+        "default": 32, "reads": 48, "writes": 32, "reports": 8, "auth": 8, "bulk": 1
+    }
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    DB_LATENCY_TARGET_MS: float = 50
+    DB_LATENCY_MIN_ADMISSION: float = 0.1
+
+    # Пул потоков для синхронных обработчиков, см. app/threadpool.py. Пул
+    # соединений БД (app/database.py) рассчитан на THREADPOOL_SIZE плюс
+    # DB_POOL_OVERFLOW для фоновых задач
+    THREADPOOL_SIZE: int = 40
+    DB_POOL_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+
+    # Пороги /ready, см. app/readiness.py
+    READY_PROBE_TIMEOUT_SECONDS: float = 1.0
+    READY_CACHE_SECONDS: float = 1.0
+    READY_MAX_DB_LATENCY_MS: float = 250
+    READY_MAX_POOL_UTILIZATION: float = 0.9
+    READY_MAX_THREADPOOL_BACKLOG: int = 20
+    READY_REQUIRE_MIGRATION_HEAD: bool = True
+
+    # Профилирование запросов с заголовком X-Profile, см. app/profiling.py.
+    # Включается явно; в DEBUG доступно любому клиенту, иначе - только администраторам.
+    # В PROFILE_DIR хранятся последние PROFILE_MAX_PROFILES профилей, старые удаляются
+    PROFILE_ENABLED: bool = False
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_PROFILES: int = 200
+    PROFILE_INTERVAL_MS: float = 2.0
+
+    # Трассировка запросов, см. app/tracing.py. Включается явно; спаны уходят
+    # на коллектор TRACE_OTLP_URL (например http://localhost:4318) или в файл
+    # TRACE_EXPORT_PATH, без них - отбрасываются
+    TRACE_ENABLED: bool = False
+    TRACE_SAMPLE_RATIO: float = 0.05
+    TRACE_MAX_TRACES_PER_SECOND: float = 20
+    TRACE_BUFFER_SIZE: int = 20000
+    TRACE_EXPORT_INTERVAL_SECONDS: float = 5
+    TRACE_EXPORT_PATH: Optional[str] = None
+    TRACE_OTLP_URL: Optional[str] = None
+    TRACE_EXPORT_TIMEOUT_SECONDS: float = 2
+    TRACE_MAX_STATEMENT_LENGTH: int = 2000
 
     class Config:
         env_file = ".env"
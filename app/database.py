@@ -1,14 +1,45 @@
-from sqlalchemy import create_engine
+import sqlite3
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
+
+def pool_options(url: str) -> dict:
+    """
+    Размер пула соединений под пул потоков: каждый поток обработчика держит
+    не больше одного соединения, так что запросы не ждут соединение сверх
+    ожидания потока. SQLite в памяти использует свой пул без этих параметров.
+    """
+    if make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return dict(
+        pool_size=settings.THREADPOOL_SIZE,
+        max_overflow=settings.DB_POOL_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS
+    )
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    **pool_options(settings.DATABASE_URL)
 )
 
+
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # Без PRAGMA SQLite игнорирует ondelete="CASCADE"/"SET NULL" внешних ключей
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -20,3 +51,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def recorded_statement(statement: str, max_length: Optional[int] = None) -> str:
+    """
+    SQL запроса для профилей и трасс. Записывается только текст: параметры
+    (в них бывают хэши паролей и токены) туда не попадают.
+    """
+    return statement if max_length is None else statement[:max_length]
+
@@ -0,0 +1,18 @@
+from sqlalchemy.orm import Session
+
+from .models import Project, Task
+
+
+# Жёсткое удаление одним DELETE. Комментарии, вложения, связи с тегами,
+# участники и задачи удаляются каскадом внешних ключей на стороне БД
+# (ondelete="CASCADE", для SQLite нужен PRAGMA foreign_keys=ON, см. database.py).
+# Коммит остаётся за вызывающим кодом.
+
+
+def hard_delete_task(db: Session, task_id: int) -> int:
+    return db.query(Task).filter(Task.id == task_id).delete(synchronize_session=False)
+
+
+def hard_delete_project(db: Session, project_id: int) -> int:
+    return db.query(Project).filter(Project.id == project_id).delete(synchronize_session=False)
+
@@ -1,13 +1,108 @@
-from fastapi import FastAPI, APIRouter
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+
+import anyio.to_thread
+from fastapi import FastAPI, APIRouter, Depends
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from .admission import admit, admission_control
 from .config import settings
-from .routers import auth, users, projects, tasks
+from .metrics import registry
+from .profiling import ProfilingMiddleware
+from .readiness import get_probe
+from .responses import FastJSONResponse
+from .startup import load_openapi, warmup
+from .threadpool import configure_threadpool
+from .tracing import SpanExporter, TracingMiddleware
+from .workers import PeriodicWorker
+
+
+def include_routers(app: FastAPI) -> None:
+    """
+    Подключает роутеры API. С FAST_STARTUP вызывается из lifespan, а не при
+    импорте модуля: роутеры, схемы, модели, bcrypt и jose загружаются при
+    запуске, до приёма запросов.
+    """
+    if getattr(app.state, "routers_included", False):
+        return
+    from .routers import auth, users, projects, tasks, archive, admin
+
+    # Ограничение одновременных запросов по группам маршрутов; /health и
+    # /metrics вне него
+    api_v1 = APIRouter(prefix="/api/v1", dependencies=[Depends(admit)])
+    api_v1.include_router(auth.router)
+    api_v1.include_router(users.router)
+    api_v1.include_router(projects.router)
+    api_v1.include_router(tasks.router)
+    api_v1.include_router(archive.router)
+    api_v1.include_router(admin.router)
+
+    app.include_router(api_v1)
+    app.state.routers_included = True
+
+
+def background_workers(app: FastAPI):
+    # Импорты внутри: с FAST_STARTUP модели не загружаются при импорте модуля
+    from .archive import TaskArchiver
+    from .database import get_db
+    from .purge import ProjectPurger
+    from .revocation import sync_revocations
+    from .tokens import TokenSweeper
+
+    workers = []
+    if settings.PURGE_ENABLED:
+        purger = ProjectPurger()
+        workers.append(PeriodicWorker(
+            "project-purge", purger.run_once, settings.PURGE_INTERVAL_SECONDS, purger.max_run_seconds + 1
+        ))
+    if settings.ARCHIVE_ENABLED:
+        archiver = TaskArchiver()
+        workers.append(PeriodicWorker(
+            "task-archive", archiver.run_once, settings.ARCHIVE_INTERVAL_SECONDS, archiver.max_run_seconds + 1
+        ))
+    if settings.TOKEN_SWEEP_ENABLED:
+        sweeper = TokenSweeper()
+        workers.append(PeriodicWorker(
+            "token-sweep", sweeper.run_once, settings.TOKEN_SWEEP_INTERVAL_SECONDS, sweeper.max_run_seconds + 1
+        ))
+    if settings.REVOCATION_SYNC_ENABLED:
+        # Та же БД, что у обработчиков: в тестах get_db подменён
+        sessions = contextmanager(app.dependency_overrides.get(get_db, get_db))
+        workers.append(PeriodicWorker(
+            "revocation-sync", partial(sync_revocations, sessions), settings.REVOCATION_SYNC_INTERVAL_SECONDS
+        ))
+    if settings.TRACE_ENABLED:
+        workers.append(PeriodicWorker("trace-export", SpanExporter().run_once, settings.TRACE_EXPORT_INTERVAL_SECONDS))
+    return workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_threadpool()
+    if settings.FAST_STARTUP:
+        include_routers(app)
+        await anyio.to_thread.run_sync(warmup)
+    workers = background_workers(app)
+    for worker in workers:
+        worker.start()
+    
+    yield
+    
+    for worker in workers:
+        worker.stop()
+    if settings.TRACE_ENABLED:
+        # Спаны последних запросов, не дождавшиеся очередной выгрузки
+        SpanExporter().run_once()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API для системы управления задачами",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse if settings.FAST_JSON else Default(JSONResponse),
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -16,15 +111,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After", "X-Profile-Id", "traceparent"],
 )
+# Снаружи CORS: в профиль попадает весь путь запроса
+app.add_middleware(ProfilingMiddleware)
+# Самый внешний: корневой спан охватывает и профилировщик
+app.add_middleware(TracingMiddleware)
+
+if not settings.FAST_STARTUP:
+    include_routers(app)
+
+
+def openapi():
+    # С FAST_STARTUP схема читается из заранее собранного app/openapi.json
+    if app.openapi_schema is None and settings.FAST_STARTUP:
+        app.openapi_schema = load_openapi()
+    return FastAPI.openapi(app)
 
-api_v1 = APIRouter(prefix="/api/v1")
-api_v1.include_router(auth.router)
-api_v1.include_router(users.router)
-api_v1.include_router(projects.router)
-api_v1.include_router(tasks.router)
 
-app.include_router(api_v1)
+app.openapi = openapi
 
 
 @app.get("/")
@@ -39,4 +144,18 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    # Всегда 200: перегрузка - повод разгрузить инстанс, а не перезапускать его
+    saturation = admission_control.saturation()
+    return {"status": "saturated" if saturation["saturated"] else "healthy", **saturation}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Готовность принимать трафик: 503, если БД, пулы или миграции за порогами"""
+    ready, report = await get_probe().check()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return registry.render()
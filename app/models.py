@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum, Table, Index, LargeBinary, JSON, case, literal_column
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -7,6 +8,16 @@ import enum
 from .database import Base
 
 
+# SQLite пишет CURRENT_TIMESTAMP без долей секунды, а параметры DateTime по
+# умолчанию передаются с микросекундами. Для колонок, по которым идёт
+# keyset-пагинация, формат параметров совпадает с форматом server_default,
+# иначе строковое сравнение пропускает строки с той же секундой.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+
 class TaskStatus(str, enum.Enum):
     TODO = "todo"
     IN_PROGRESS = "in_progress"
@@ -45,28 +56,73 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, default=False, server_default="0", nullable=False)
+    # Растёт при потере членства в проекте: claims членства из ранее
+    # выданных access токенов перестают приниматься (app/claims.py)
+    membership_epoch = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    owned_projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan")
-    project_memberships = relationship("ProjectMember", back_populates="user", cascade="all, delete-orphan")
-    tasks_assigned = relationship("Task", back_populates="assignee")
-    comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan")
-    refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
+    # Членство из claims текущего access токена и проекты, которыми ограничен
+    # API ключ запроса (None - без ограничения); заполняет get_current_user
+    token_memberships = None
+    api_key_scope = None
+
+    # passive_deletes: дочерние строки удаляет (или обнуляет) сама БД по ondelete
+    # внешних ключей, ORM не загружает коллекции ради каскада
+    owned_projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    project_memberships = relationship("ProjectMember", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    tasks_assigned = relationship("Task", back_populates="assignee", passive_deletes=True)
+    comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan", passive_deletes=True)
+    refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    api_keys = relationship("ApiKey", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String(500), unique=True, index=True, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # SHA-256 от токена: индекс фиксированного размера, сам токен не хранится
+    token_hash = Column(LargeBinary(32), unique=True, index=True, nullable=False)
+    # Цепочка ротаций одного входа (устройства); повторное использование
+    # уже обменянного токена отзывает всю цепочку
+    family_id = Column(String(32), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    used_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="refresh_tokens")
 
 
+class RevokedToken(Base):
+    """Отозванные (logout) access токены; строка не нужна после истечения токена"""
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ApiKey(Base):
+    """API ключи сервисных аккаунтов; хранится только HMAC-SHA256 от ключа"""
+    __tablename__ = "api_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(100), nullable=False)
+    prefix = Column(String(16), nullable=False, index=True)
+    key_hash = Column(LargeBinary(32), nullable=False)
+    # Список id проектов, к которым допускает ключ; NULL - все проекты владельца
+    project_ids = Column(JSON, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User", back_populates="api_keys")
+
+
 class Project(Base):
     __tablename__ = "projects"
 
@@ -75,16 +131,21 @@ class Project(Base):
     description = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     is_active = Column(Boolean, default=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     owner = relationship("User", back_populates="owned_projects")
-    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
-    members = relationship("ProjectMember", back_populates="project", cascade="all, delete-orphan")
+    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    members = relationship("ProjectMember", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class ProjectMember(Base):
     __tablename__ = "project_members"
+    __table_args__ = (
+        Index("ix_project_members_project_id_user_id", "project_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -96,8 +157,17 @@ class ProjectMember(Base):
     user = relationship("User", back_populates="project_memberships")
 
 
+# Строки задач, комментариев и вложений переезжают в архив и обратно со своими
+# id. Без AUTOINCREMENT SQLite выдаёт новой строке max(id) + 1 и повторно
+# использует id, ушедшие в архив, - восстановление или повторная архивация
+# упирались бы в уже занятый первичный ключ
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_assignee_id_status_due_date", "assignee_id", "status", "due_date"),
+        Index("ix_tasks_status_updated_at", "status", "updated_at"),
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -112,19 +182,43 @@ class Task(Base):
 
     project = relationship("Project", back_populates="tasks")
     assignee = relationship("User", back_populates="tasks_assigned")
-    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
-    attachments = relationship("Attachment", back_populates="task", cascade="all, delete-orphan")
-    tags = relationship("Tag", secondary=task_tags, back_populates="tasks")
+    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    attachments = relationship("Attachment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    tags = relationship("Tag", secondary=task_tags, back_populates="tasks", passive_deletes=True)
+
+
+# Порядок задач исполнителя: приоритет от срочных, срок (без срока - последними
+# внутри приоритета), id. Значения - литералы, а не параметры запроса: тогда
+# выражения ORDER BY совпадают с выражениями индекса и SQLite берёт порядок из
+# него, без сортировки всех задач исполнителя
+TASK_PRIORITY_ORDER = [TaskPriority.URGENT, TaskPriority.HIGH, TaskPriority.MEDIUM, TaskPriority.LOW]
+TASK_NO_DUE_DATE = datetime(9999, 12, 31)
+
+task_priority_rank = case(*[
+    (Task.priority == literal_column(f"'{priority.name}'"), literal_column(str(rank)))
+    for rank, priority in enumerate(TASK_PRIORITY_ORDER)
+])
+# Формат совпадает с тем, как DateTime хранится в SQLite
+task_due_date_or_last = func.coalesce(Task.due_date, literal_column(f"'{TASK_NO_DUE_DATE:%Y-%m-%d %H:%M:%S.%f}'"))
+
+Index(
+    "ix_tasks_assignee_id_priority_rank_due_date_id",
+    Task.assignee_id, task_priority_rank, task_due_date_or_last, Task.id
+)
 
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_task_id_created_at_id", "task_id", "created_at", "id"),
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     task = relationship("Task", back_populates="comments")
@@ -133,6 +227,7 @@ class Comment(Base):
 
 class Attachment(Base):
     __tablename__ = "attachments"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
@@ -153,4 +248,67 @@ class Tag(Base):
     color = Column(String(7), default="#808080")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    tasks = relationship("Task", secondary=task_tags, back_populates="tags")
+    tasks = relationship("Task", secondary=task_tags, back_populates="tags", passive_deletes=True)
+
+
+# Холодное хранилище завершённых задач (app/archive.py). Таблицы повторяют
+# горячие, id сохраняются, поэтому задачу можно вернуть без перенумерации.
+
+archived_task_tags = Table(
+    'archived_task_tags',
+    Base.metadata,
+    Column('task_id', Integer, ForeignKey('archived_tasks.id', ondelete='CASCADE'), primary_key=True),
+    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
+)
+
+
+class ArchivedTask(Base):
+    __tablename__ = "archived_tasks"
+    __table_args__ = (
+        Index("ix_archived_tasks_project_id_id", "project_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    assignee_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status = Column(Enum(TaskStatus), nullable=False)
+    priority = Column(Enum(TaskPriority), nullable=False)
+    due_date = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    assignee = relationship("User")
+    comments = relationship("ArchivedComment", back_populates="task", passive_deletes=True)
+    tags = relationship("Tag", secondary=archived_task_tags, passive_deletes=True)
+
+
+class ArchivedComment(Base):
+    __tablename__ = "archived_comments"
+    __table_args__ = (
+        Index("ix_archived_comments_task_id_created_at_id", "task_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    content = Column(Text, nullable=False)
+    task_id = Column(Integer, ForeignKey("archived_tasks.id", ondelete="CASCADE"), nullable=False)
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(Timestamp, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+
+    task = relationship("ArchivedTask", back_populates="comments")
+    author = relationship("User")
+
+
+class ArchivedAttachment(Base):
+    __tablename__ = "archived_attachments"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(Integer, nullable=False)
+    mime_type = Column(String(100), nullable=True)
+    task_id = Column(Integer, ForeignKey("archived_tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    uploaded_at = Column(DateTime(timezone=True), nullable=True)
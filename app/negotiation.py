@@ -0,0 +1,100 @@
+from typing import Any, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from .responses import MSGPACK_MEDIA_TYPE, msgpack, msgpack_requested
+
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+def _parse_media_types(header: str):
+    for part in header.split(","):
+        media_type, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        yield media_type.strip().lower(), quality
+
+
+def accepts_msgpack(accept: str) -> bool:
+    """MessagePack выбирается, только если его q не ниже, чем у JSON"""
+    if not accept:
+        return False
+
+    msgpack_q = 0.0
+    json_q = 0.0
+    for media_type, quality in _parse_media_types(accept):
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, quality)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def vary_on_accept(response: Response) -> None:
+    """Добавляет Accept в Vary: тело ответа зависит от согласованного формата"""
+    vary = response.headers.get("vary")
+    if vary is None:
+        response.headers["Vary"] = "Accept"
+    elif "accept" not in {item.strip().lower() for item in vary.split(",")}:
+        response.headers["Vary"] = f"{vary}, Accept"
+
+
+def is_msgpack_content(content_type: str) -> bool:
+    return content_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+class MsgPackRequest(Request):
+    """
+    Запрос с телом в MessagePack.
+
+    FastAPI разбирает тело через request.json() только для JSON-типов,
+    поэтому заголовок Content-Type подменяется, а json() декодирует msgpack.
+    """
+
+    def __init__(self, request: Request):
+        scope = dict(request.scope)
+        scope["headers"] = [
+            (key, b"application/json") if key == b"content-type" else (key, value)
+            for key, value in request.scope["headers"]
+        ]
+        super().__init__(scope, request.receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body())
+        return self._json
+
+
+class NegotiatedRoute(APIRoute):
+    """Маршрут с поддержкой application/msgpack в теле запроса и в ответе"""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if is_msgpack_content(request.headers.get("content-type", "")):
+                if msgpack is None:
+                    return JSONResponse(
+                        status_code=415,
+                        content={"detail": "MessagePack не поддерживается сервером"}
+                    )
+                request = MsgPackRequest(request)
+
+            token = msgpack_requested.set(accepts_msgpack(request.headers.get("accept", "")))
+            try:
+                response = await original_route_handler(request)
+            finally:
+                msgpack_requested.reset(token)
+            # Здесь, а не в render: ответы из кэша и быстрого пути render не вызывают
+            vary_on_accept(response)
+            return response
+
+        return route_handler
@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values: Any) -> str:
+    """Непрозрачный курсор: base64url от JSON-списка значений ключа"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, converters: Sequence[Callable[[Any], Any]]) -> Tuple[Any, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(converters):
+            raise ValueError(cursor)
+        return tuple(
+            None if value is None else convert(value)
+            for convert, value in zip(converters, payload)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail="Некорректный курсор"
+        )
+
+
+def keyset_page(
+    query: Query,
+    columns: Sequence[Any],
+    converters: Sequence[Callable[[Any], Any]],
+    cursor: Optional[str],
+    limit: int,
+    row_key: Optional[Callable[[Any], Sequence[Any]]] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Страница по возрастанию ключа (columns) после позиции cursor.
+
+    Читается limit + 1 строка: лишняя строка лишь показывает, что есть
+    следующая страница. Курсор строится по ключу последней строки; если ключ
+    содержит выражения, а не колонки, его значения для строки вычисляет row_key.
+    """
+    if cursor:
+        values = decode_cursor(cursor, converters)
+        query = query.filter(tuple_(*columns) > values)
+
+    rows = query.order_by(*columns).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if row_key is None:
+            values = [getattr(last, column.key) for column in columns]
+        else:
+            values = row_key(last)
+        next_cursor = encode_cursor(*values)
+
+    return rows, next_cursor
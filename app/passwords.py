@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import bcrypt
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .metrics import registry
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+rehashed_passwords = registry.counter("taskmanager_password_rehash_total", "Пароли, перехэшированные после входа")
+
+SCRYPT_MARKER = "$scrypt$"
+
+# Меньше этого пароли хэшируются без пула процессов
+HASH_POOL_MIN_BATCH = 8
+
+# Один поток: перехэширование редкое, и ему незачем конкурировать с
+# запросами за CPU. Очередь FIFO - тестам достаточно дождаться пустой задачи
+rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-rehash")
+
+
+def _scrypt(password: str, salt: bytes, n_log2: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode('utf-8'), salt=salt, n=1 << n_log2, r=r, p=p,
+        maxmem=(1 << n_log2) * r * 256, dklen=32
+    )
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _parse_scrypt(hashed_password: str):
+    # $scrypt$ln=14,r=8,p=1$<соль>$<хэш>
+    _, _, params, salt, digest = hashed_password.split("$")
+    values = dict(item.split("=") for item in params.split(","))
+    return int(values["ln"]), int(values["r"]), int(values["p"]), _unb64(salt), _unb64(digest)
+
+
+def _hash_params() -> Tuple:
+    # Параметры передаются явно: процессы пула не видят изменений settings
+    return (
+        settings.PASSWORD_HASH_SCHEME, settings.BCRYPT_ROUNDS,
+        settings.SCRYPT_N_LOG2, settings.SCRYPT_R, settings.SCRYPT_P
+    )
+
+
+def _hash(password: str, scheme: str, bcrypt_rounds: int, n_log2: int, r: int, p: int) -> str:
+    if scheme == "scrypt":
+        salt = secrets.token_bytes(16)
+        digest = _scrypt(password, salt, n_log2, r, p)
+        return f"{SCRYPT_MARKER}ln={n_log2},r={r},p={p}${_b64(salt)}${_b64(digest)}"
+
+    salt = bcrypt.gensalt(rounds=bcrypt_rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _hash_chunk(passwords: List[str], params: Tuple) -> List[str]:
+    return [_hash(password, *params) for password in passwords]
+
+
+def get_password_hash(password: str) -> str:
+    """Хэш по текущим настройкам: PASSWORD_HASH_SCHEME и его параметры"""
+    return _hash(password, *_hash_params())
+
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+
+def _hash_pool_size() -> int:
+    return settings.HASH_POOL_SIZE or os.cpu_count() or 1
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn, а не fork: процесс приложения многопоточный
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=_hash_pool_size(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Хэширует пачку паролей в пуле процессов - bcrypt и scrypt занимают CPU
+    и в потоках упираются в одно ядро. Небольшие пачки хэшируются на месте,
+    запуск пула дороже.
+    """
+    params = _hash_params()
+    if len(passwords) < HASH_POOL_MIN_BATCH:
+        return _hash_chunk(passwords, params)
+
+    # Несколько порций на процесс: пул выравнивает нагрузку, а на каждый
+    # пароль не тратится отдельная пересылка между процессами
+    size = max(1, math.ceil(len(passwords) / (_hash_pool_size() * 4)))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    results = _get_hash_pool().map(_hash_chunk, chunks, [params] * len(chunks))
+    return [hashed for chunk in results for hashed in chunk]
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Проверка по схеме и параметрам, с которыми хэш был создан"""
+    if hashed_password.startswith(SCRYPT_MARKER):
+        n_log2, r, p, salt, digest = _parse_scrypt(hashed_password)
+        return hmac.compare_digest(_scrypt(plain_password, salt, n_log2, r, p), digest)
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    if hashed_password.startswith(SCRYPT_MARKER):
+        if settings.PASSWORD_HASH_SCHEME != "scrypt":
+            return True
+        n_log2, r, p, _, _ = _parse_scrypt(hashed_password)
+        return (n_log2, r, p) != (settings.SCRYPT_N_LOG2, settings.SCRYPT_R, settings.SCRYPT_P)
+
+    if settings.PASSWORD_HASH_SCHEME != "bcrypt":
+        return True
+    # $2b$<cost>$...
+    return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+
+
+def _rehash(bind: Engine, user_id: int, password: str, old_hash: str) -> None:
+    new_hash = get_password_hash(password)
+    with Session(bind=bind) as db:
+        # Пароль могли сменить, пока считался хэш - тогда ничего не трогаем
+        updated = db.query(User).filter(
+            User.id == user_id,
+            User.hashed_password == old_hash
+        ).update({User.hashed_password: new_hash}, synchronize_session=False)
+        db.commit()
+    if updated:
+        rehashed_passwords.inc()
+
+
+def _log_failure(future: Future) -> None:
+    if future.exception() is not None:
+        logger.error("Ошибка перехэширования пароля", exc_info=future.exception())
+
+
+def schedule_rehash(db: Session, user: User, password: str) -> Optional[Future]:
+    """
+    Перехэширует пароль в фоне, если он сохранён по устаревшим настройкам.
+    Ответ на вход не ждёт нового хэша.
+    """
+    if not needs_rehash(user.hashed_password):
+        return None
+    future = rehash_executor.submit(_rehash, db.get_bind(), user.id, password, user.hashed_password)
+    future.add_done_callback(_log_failure)
+    return future
@@ -0,0 +1,318 @@
+"""
+Профилирование отдельного запроса по заголовку X-Profile.
+
+Пока запрос выполняется, отдельный поток каждые PROFILE_INTERVAL_MS снимает
+стеки (sys._current_frames) только тех потоков, что сейчас работают на этот
+запрос: потока цикла событий, когда в нём исполняется задача запроса, и
+потоков пула anyio, выполняющих вызов из контекста запроса. В PROFILE_DIR
+пишутся два файла с общим именем (оно же в заголовке ответа X-Profile-Id):
+
+- .collapsed - свёрнутые стеки «кадр;кадр;кадр число» для flamegraph.pl
+  или speedscope;
+- .json - разбивка времени на auth, db, pydantic, json и other и
+  хронология SQL запросов.
+
+Хранятся последние PROFILE_MAX_PROFILES профилей: после записи нового
+самые старые удаляются, чтобы профилирование не заполнило диск.
+
+Выборка относится к категории самого глубокого кадра, подходящего под одно
+из правил: SQL внутри get_current_user попадает в db, а не в auth.
+
+Отбор потоков опирается на внутреннее устройство asyncio (_current_tasks) и
+anyio (кадр WorkerThread.run и его локальная context). Если в новой версии
+их нет или выборка падает, запрос выполняется как обычно, а отчёт помечается
+"degraded": true - в нём нет части потоков или выборок.
+"""
+import asyncio
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+import anyio.to_thread
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .database import recorded_statement
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+profiled_requests = registry.counter("taskmanager_profiled_requests_total", "Запросы, выполненные под профилировщиком")
+
+PROFILE_HEADER = b"x-profile"
+
+ROOT = str(Path(__file__).resolve().parents[1]).replace("\\", "/") + "/"
+STDLIB_PREFIX = re.compile(r"^.*/lib/python[^/]*/")
+
+# Правила проверяются для каждого кадра от самого глубокого; первое совпадение
+# задаёт категорию выборки. json раньше pydantic: dump_json - метод TypeAdapter
+CATEGORY_RULES: List[Tuple[str, re.Pattern]] = [
+    ("json", re.compile(
+        r"^(json|orjson|msgpack)/|^fastapi/encoders\.py|^app/responses\.py:(encode|\w+\.render)"
+        r"|^pydantic/(type_adapter|main)\.py:\w+\.(dump_json|model_dump_json)|^starlette/responses\.py:\w+\.render"
+    )),
+    ("pydantic", re.compile(r"^pydantic(_core)?/|^fastapi/_compat|^fastapi/routing\.py:serialize_response")),
+    ("db", re.compile(r"^sqlalchemy/|^app/database\.py")),
+    ("auth", re.compile(r"^(jose|bcrypt|passlib)/|^app/(auth|passwords|api_keys|revocation|claims)\.py")),
+]
+CATEGORIES = [name for name, _ in CATEGORY_RULES] + ["other"]
+
+active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+
+# Текущая задача каждого цикла событий; без неё поток цикла не выбирается
+_CURRENT_TASKS = getattr(asyncio.tasks, "_current_tasks", None)
+
+try:
+    from anyio._backends._asyncio import WorkerThread
+    _WORKER_RUN = WorkerThread.run.__code__
+except (ImportError, AttributeError):  # без него не выбираются потоки пула
+    _WORKER_RUN = None
+
+
+def frame_label(frame: FrameType) -> str:
+    """«путь:функция», путь - от корня проекта или site-packages"""
+    code = frame.f_code
+    filename = code.co_filename.replace("\\", "/")
+    if filename.startswith(ROOT):
+        filename = filename[len(ROOT):]
+    elif "/site-packages/" in filename:
+        filename = filename.split("/site-packages/", 1)[1]
+    else:
+        filename = STDLIB_PREFIX.sub("", filename)
+    return f"{filename}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def classify(labels: List[str]) -> str:
+    """Категория выборки по стеку (корень первым)"""
+    for label in reversed(labels):
+        for name, pattern in CATEGORY_RULES:
+            if pattern.search(label):
+                return name
+    return "other"
+
+
+class RequestProfile:
+    def __init__(self, profile_id: str, method: str, path: str, interval: float):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.samples = 0
+        self.queries: List[Dict] = []
+        self.status_code: Optional[int] = None
+        self.started = self.finished = 0.0
+        self.degraded = _CURRENT_TASKS is None or _WORKER_RUN is None
+        self._sample_failed = False
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{profile_id}", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self.finished = time.perf_counter()
+        self._stop.set()
+        self._sampler.join()
+
+    def _run(self) -> None:
+        previous = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self.sample(now - previous)
+            previous = now
+
+    def sample(self, weight: float) -> None:
+        try:
+            self._sample(weight)
+        except Exception:
+            # Поток выборки не должен падать молча на каждом тике
+            if not self._sample_failed:
+                logger.exception("Профиль %s: выборка не удалась, отчёт будет неполным", self.id)
+            self._sample_failed = self.degraded = True
+
+    def _sample(self, weight: float) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            frames = self._request_frames(thread_id, frame)
+            if not frames:
+                continue
+            labels = [frame_label(item) for item in frames]
+            self.stacks[";".join(labels)] += 1
+            self.seconds[classify(labels)] += weight
+            self.samples += 1
+
+    def _request_frames(self, thread_id: int, frame: Optional[FrameType]) -> List[FrameType]:
+        """Стек потока (корень первым), если поток сейчас работает на этот запрос"""
+        if thread_id == self._sampler.ident:
+            return []
+        if thread_id == self.loop_thread:
+            # asyncio.current_task() только для своего потока; словарь - общий
+            if _CURRENT_TASKS is None or _CURRENT_TASKS.get(self.loop) is not self.task:
+                return []
+            frames = []
+            while frame is not None:
+                frames.append(frame)
+                frame = frame.f_back
+            return frames[::-1]
+        frames = []
+        while frame is not None:
+            if frame.f_code is _WORKER_RUN:
+                # Контекст вызова, который поток пула выполняет сейчас
+                context = frame.f_locals.get("context")
+                if context is not None and context.get(active_profile) is self:
+                    return frames[::-1]
+                return []
+            frames.append(frame)
+            frame = frame.f_back
+        return []
+
+    def report(self) -> Dict:
+        wall = self.finished - self.started
+        sampled = sum(self.seconds.values())
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "wall_ms": round(wall * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "degraded": self.degraded,
+            "breakdown_ms": {name: round(self.seconds.get(name, 0.0) * 1000, 3) for name in CATEGORIES},
+            # Ожидание потока пула, сети и т.п.; при параллельных потоках может быть 0
+            "unsampled_ms": round(max(wall - sampled, 0.0) * 1000, 3),
+            "sql": self.queries,
+        }
+
+    def write(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+        (directory / f"{self.id}.collapsed").write_text(collapsed, encoding="utf-8")
+        (directory / f"{self.id}.json").write_text(
+            json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+
+def _written_at(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:  # удалён параллельным запросом
+        return 0
+
+
+def prune_profiles(directory: Path, keep: int) -> int:
+    """Удаляет профили сверх keep самых новых; возвращает число удалённых"""
+    reports = sorted(directory.glob("*.json"), key=_written_at, reverse=True)
+    for report in reports[keep:]:
+        report.unlink(missing_ok=True)
+        report.with_suffix(".collapsed").unlink(missing_ok=True)
+    return max(len(reports) - keep, 0)
+
+
+def save_profile(profile: RequestProfile, directory: Path) -> None:
+    profile.write(directory)
+    prune_profiles(directory, settings.PROFILE_MAX_PROFILES)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_profiled_query(conn, cursor, statement, parameters, context, executemany):
+    if active_profile.get() is not None:
+        conn.info["profile_query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_profiled_query(conn, cursor, statement, parameters, context, executemany):
+    profile = active_profile.get()
+    started = conn.info.pop("profile_query_started", None)
+    if profile is None or started is None:
+        return
+    profile.queries.append({
+        "start_ms": round((started - profile.started) * 1000, 3),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "statement": recorded_statement(statement),
+        "executemany": executemany,
+        "rowcount": cursor.rowcount,
+        "thread": threading.current_thread().name,
+    })
+
+
+def is_admin(app, authorization: str) -> bool:
+    """Администратор ли владелец токена; та же проверка, что у get_current_admin"""
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from .auth import get_current_admin, get_current_user
+    from .database import get_db
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    # Через dependency_overrides: в тестах get_db подменён
+    sessions = app.dependency_overrides.get(get_db, get_db)()
+    db = next(sessions)
+    try:
+        get_current_admin(get_current_user(HTTPAuthorizationCredentials(scheme=scheme, credentials=token), db))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        sessions.close()
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос с заголовком X-Profile. В DEBUG - любой запрос, иначе
+    только с токеном администратора; без прав запрос выполняется как обычно.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILE_ENABLED:
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER, b"").lower() not in (b"1", b"true", b"yes"):
+            return await self.app(scope, receive, send)
+        if not settings.DEBUG:
+            authorization = headers.get(b"authorization", b"").decode("latin-1")
+            if not await anyio.to_thread.run_sync(is_admin, scope["app"], authorization):
+                return await self.app(scope, receive, send)
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")[:60] or "root"
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{uuid.uuid4().hex[:8]}"
+        profile = RequestProfile(profile_id, scope["method"], scope["path"], settings.PROFILE_INTERVAL_MS / 1000)
+
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        token = active_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            profile.stop()
+            active_profile.reset(token)
+            profiled_requests.inc()
+            try:
+                await anyio.to_thread.run_sync(save_profile, profile, Path(settings.PROFILE_DIR))
+            except OSError as exc:
+                logger.warning("Не удалось записать профиль %s: %s", profile_id, exc)
@@ -0,0 +1,109 @@
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .deletion import hard_delete_project
+from .metrics import registry
+from .versioning import bump_membership_epoch
+from .models import Project, ProjectMember, Task, Comment, ArchivedTask, ArchivedComment
+
+purged_projects = registry.counter("taskmanager_purge_projects_total", "Удалённые неактивные проекты")
+purged_rows = registry.counter("taskmanager_purge_rows_total", "Строки, удалённые очисткой, по таблицам")
+purge_runs = registry.counter("taskmanager_purge_runs_total", "Запуски очистки")
+purge_pending = registry.gauge("taskmanager_purge_pending_projects", "Проекты, ожидающие очистки после последнего запуска")
+purge_last_run = registry.gauge("taskmanager_purge_last_run_seconds", "Длительность последнего запуска очистки")
+
+
+class ProjectPurger:
+    """
+    Жёсткое удаление неактивных проектов старше PROJECT_RETENTION_DAYS.
+
+    Крупный проект удаляется порциями по PURGE_BATCH_SIZE строк, каждая в
+    своей короткой транзакции, с паузой между порциями, чтобы запись в БД
+    не блокировалась надолго. Запуск ограничен по времени PURGE_MAX_RUN_SECONDS;
+    недоудалённый проект будет дочищен в следующем запуске.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        retention_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_run_seconds: Optional[float] = None,
+        pause_seconds: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.retention_days = settings.PROJECT_RETENTION_DAYS if retention_days is None else retention_days
+        self.batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        self.max_run_seconds = settings.PURGE_MAX_RUN_SECONDS if max_run_seconds is None else max_run_seconds
+        self.pause_seconds = settings.PURGE_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+
+    def _due_filter(self):
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        return (Project.is_active == False, Project.deleted_at <= cutoff)
+
+    def _delete_chunk(self, db: Session, model, ids_query) -> int:
+        deleted = db.query(model).filter(
+            model.id.in_(ids_query.limit(self.batch_size))
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            purged_rows.inc(deleted, table=model.__tablename__)
+        return deleted
+
+    def purge_project(self, db: Session, project_id: int, deadline: float) -> bool:
+        """Возвращает True, если проект удалён полностью до истечения deadline"""
+        # id проекта может быть переиспользован - claims участников и владельца
+        # (он попадает в claim с ролью OWNER) должны устареть
+        bump_membership_epoch(db, union(
+            select(ProjectMember.user_id).where(ProjectMember.project_id == project_id),
+            select(Project.owner_id).where(Project.id == project_id),
+        ))
+        project_tasks = select(Task.id).where(Task.project_id == project_id)
+        archived_tasks = select(ArchivedTask.id).where(ArchivedTask.project_id == project_id)
+        steps = [
+            (Comment, select(Comment.id).where(Comment.task_id.in_(project_tasks))),
+            (Task, project_tasks),
+            (ArchivedComment, select(ArchivedComment.id).where(ArchivedComment.task_id.in_(archived_tasks))),
+            (ArchivedTask, archived_tasks),
+            (ProjectMember, select(ProjectMember.id).where(ProjectMember.project_id == project_id)),
+        ]
+        for model, ids_query in steps:
+            while self._delete_chunk(db, model, ids_query) == self.batch_size:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(self.pause_seconds)
+
+        # Остались только мелкие дочерние строки - их удалит каскад БД
+        hard_delete_project(db, project_id)
+        db.commit()
+        purged_projects.inc()
+        purged_rows.inc(table=Project.__tablename__)
+        return True
+
+    def run_once(self) -> int:
+        started = time.monotonic()
+        deadline = started + self.max_run_seconds
+        purged = 0
+
+        with self.session_factory() as db:
+            while time.monotonic() < deadline:
+                project_id = db.query(Project.id).filter(*self._due_filter()).order_by(
+                    Project.deleted_at, Project.id
+                ).limit(1).scalar()
+                if project_id is None:
+                    break
+                if not self.purge_project(db, project_id, deadline):
+                    break
+                purged += 1
+
+            purge_pending.set(db.query(Project.id).filter(*self._due_filter()).count())
+
+        purge_runs.inc()
+        purge_last_run.set(time.monotonic() - started)
+        return purged
@@ -0,0 +1,139 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import HTTPException
+
+from .config import settings
+from .metrics import registry
+from .redis_client import RedisError, get_client, redis
+
+logger = logging.getLogger(__name__)
+
+throttled_attempts = registry.counter("taskmanager_login_throttled_total", "Отклонённые попытки входа по ключу ограничения")
+
+
+class MemoryBackend:
+    """
+    Корзины в памяти процесса: O(1) на запрос, не больше max_entries ключей,
+    давно не использованные вытесняются (LRU). Вытесненная корзина при
+    следующем запросе начнётся полной - это лишь ослабляет ограничение.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        """Забирает жетон; возвращает 0 или сколько секунд ждать следующего"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [capacity, now]
+                if len(self._buckets) > self.max_entries:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Та же корзина, атомарно на стороне Redis; время берётся у сервера, чтобы
+# часы воркеров не расходились
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """
+    Общие корзины для нескольких воркеров (RATE_LIMIT_REDIS_URL). Ошибка
+    Redis не роняет вход: корзина берётся из памяти процесса, ограничение на
+    время сбоя лишь становится своим у каждого воркера.
+    """
+
+    def __init__(self, client, namespace: str = "taskmanager:ratelimit:", fallback: Optional[MemoryBackend] = None):
+        self.client = client
+        self.namespace = namespace
+        self.fallback = fallback or MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        try:
+            return float(self._take(keys=[self.namespace + key], args=[capacity, rate]))
+        except RedisError as exc:
+            logger.warning("Redis недоступен, ограничение входа в памяти процесса: %s", exc)
+            return self.fallback.take(key, capacity, rate)
+
+    def clear(self) -> None:
+        """Сбрасывает только корзины в памяти; общие корзины истекают в Redis сами"""
+        self.fallback.clear()
+
+
+def create_backend():
+    if settings.RATE_LIMIT_REDIS_URL:
+        if redis is not None:
+            return RedisBackend(get_client(settings.RATE_LIMIT_REDIS_URL))
+        logger.warning("RATE_LIMIT_REDIS_URL задан, но пакет redis не установлен - ограничение только в памяти процесса")
+    return MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+class LoginThrottle:
+    """
+    Ограничение попыток входа до проверки пароля: корзина на IP и корзина на
+    имя пользователя. Перебор паролей упирается в лимит, а не в CPU на bcrypt.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+
+    def check(self, username: str, ip: Optional[str]) -> None:
+        limits = [
+            ("ip", ip or "unknown", settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE),
+            ("username", username.lower(), settings.LOGIN_USERNAME_BURST, settings.LOGIN_USERNAME_PER_MINUTE),
+        ]
+        for scope, value, burst, per_minute in limits:
+            wait = self.backend.take(f"login:{scope}:{value}", burst, per_minute / 60)
+            if wait > 0:
+                throttled_attempts.inc(scope=scope)
+                raise HTTPException(
+                    status_code=429,
+                    detail="Слишком много попыток входа, повторите позже",
+                    headers={"Retry-After": str(math.ceil(wait))}
+                )
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,154 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .metrics import registry
+from .threadpool import pool_statistics
+
+logger = logging.getLogger(__name__)
+
+failed_probes = registry.counter("taskmanager_readiness_failures_total", "Непройденные проверки /ready по причинам")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@functools.lru_cache(maxsize=1)
+def migration_heads() -> Optional[Tuple[str, ...]]:
+    """Головные ревизии alembic из каталога миграций; None, если его нет рядом с кодом"""
+    ini = ROOT / "alembic.ini"
+    if not ini.exists():
+        return None
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(ini))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    return tuple(sorted(ScriptDirectory.from_config(config).get_heads()))
+
+
+def pool_status(engine: Engine) -> Dict[str, Optional[int]]:
+    """Счётчики QueuePool; у пулов без них (SQLite в памяти) значения None"""
+    pool = engine.pool
+    status = {}
+    for name in ("size", "checkedout", "overflow", "checkedin"):
+        method = getattr(pool, name, None)
+        status[name] = method() if method is not None else None
+    status["max_overflow"] = getattr(pool, "_max_overflow", None)
+    return status
+
+
+class ReadinessProbe:
+    """
+    Проверка готовности для балансировщика (/ready).
+
+    Запрос к БД выполняется в собственном потоке, а не в общем пуле: при
+    переполненном пуле проверка не должна ждать в той же очереди. Время
+    проверки ограничено READY_PROBE_TIMEOUT_SECONDS, результат запроса к БД
+    переиспользуется READY_CACHE_SECONDS, а пока предыдущий запрос не
+    завершился (например, файл SQLite заблокирован), новый не запускается.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readiness-probe")
+        self._lock = threading.Lock()
+        self._pending: Optional[Future] = None
+        self._last: Optional[Tuple[float, Dict]] = None
+
+    def _query(self) -> Dict:
+        from alembic.runtime.migration import MigrationContext
+
+        started = time.perf_counter()
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            latency = time.perf_counter() - started
+            # Чтение alembic_version берёт разделяемую блокировку SQLite
+            current = MigrationContext.configure(connection).get_current_heads()
+        return {"latency_ms": round(latency * 1000, 3), "revision": sorted(current)}
+
+    def _submit(self) -> Future:
+        with self._lock:
+            if self._pending is None or self._pending.done():
+                self._pending = self._executor.submit(self._query)
+            return self._pending
+
+    async def database(self) -> Dict:
+        now = time.monotonic()
+        if self._last is not None and now - self._last[0] < settings.READY_CACHE_SECONDS:
+            return self._last[1]
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(self._submit())),
+                settings.READY_PROBE_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            result = {"error": "timeout"}
+        except Exception as exc:
+            logger.warning("Проверка БД для /ready не прошла: %s", exc)
+            result = {"error": type(exc).__name__}
+        self._last = (time.monotonic(), result)
+        return result
+
+    async def check(self) -> Tuple[bool, Dict]:
+        failures: List[str] = []
+
+        pool = pool_status(self.engine)
+        capacity = None
+        if pool["size"] is not None and pool["max_overflow"] is not None:
+            capacity = pool["size"] + max(pool["max_overflow"], 0)
+            if pool["checkedout"] >= capacity * settings.READY_MAX_POOL_UTILIZATION:
+                failures.append("db_pool")
+
+        # Без свободных соединений запрос к БД ждал бы pool_timeout
+        database = await self.database() if "db_pool" not in failures else {"error": "pool_exhausted"}
+        if "error" in database:
+            failures.append("database")
+        elif database["latency_ms"] > settings.READY_MAX_DB_LATENCY_MS:
+            failures.append("db_latency")
+
+        heads = migration_heads()
+        if settings.READY_REQUIRE_MIGRATION_HEAD and heads is not None and "revision" in database:
+            if tuple(database["revision"]) != heads:
+                failures.append("migrations")
+
+        threads = pool_statistics()
+        if threads.tasks_waiting > settings.READY_MAX_THREADPOOL_BACKLOG:
+            failures.append("threadpool")
+
+        for failure in failures:
+            failed_probes.inc(check=failure)
+
+        return not failures, {
+            "status": "ready" if not failures else "not_ready",
+            "failed": failures,
+            "database": database,
+            "migrations": {"head": list(heads) if heads is not None else None},
+            "db_pool": {**pool, "capacity": capacity},
+            "threadpool": {
+                "size": threads.total_tokens,
+                "busy": threads.borrowed_tokens,
+                "waiting": threads.tasks_waiting,
+            },
+        }
+
+
+_probe: Optional[ReadinessProbe] = None
+
+
+def get_probe() -> ReadinessProbe:
+    # Создаётся при первом /ready: с FAST_STARTUP модуль БД не нужен при импорте
+    global _probe
+    if _probe is None:
+        from .database import engine
+
+        _probe = ReadinessProbe(engine)
+    return _probe
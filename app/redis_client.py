@@ -0,0 +1,33 @@
+import threading
+from typing import Dict
+
+from .config import settings
+
+try:
+    import redis
+    from redis.exceptions import RedisError
+except ImportError:  # redis - необязательная зависимость
+    redis = None
+
+    class RedisError(Exception):
+        """Без пакета redis клиента нет, и эта ошибка не возникает"""
+
+_clients: Dict[str, "redis.Redis"] = {}
+_lock = threading.Lock()
+
+
+def get_client(url: str) -> "redis.Redis":
+    """
+    Клиент Redis для url; один на адрес, так что ограничение входа и кэш
+    ответов на одном сервере делят пул соединений. Таймауты коротки: за
+    недоступным Redis запрос не должен ждать дольше REDIS_TIMEOUT_SECONDS.
+    """
+    with _lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = redis.Redis.from_url(
+                url,
+                socket_timeout=settings.REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.REDIS_TIMEOUT_SECONDS
+            )
+        return client
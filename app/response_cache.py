@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Mapping, NamedTuple, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from .config import settings
+from .metrics import registry
+from .models import Project, User
+from .redis_client import RedisError, get_client, redis
+from .responses import encode, wants_msgpack
+from .singleflight import SingleFlight, access_class
+from .tracing import traced
+from .versioning import project_etag
+
+logger = logging.getLogger(__name__)
+
+cache_requests = registry.counter(
+    "taskmanager_response_cache_requests_total", "Обращения к кэшу ответов по эндпоинтам: hit или miss"
+)
+cache_bytes = registry.gauge("taskmanager_response_cache_bytes", "Объём ответов в кэше процесса")
+
+
+class CachedResponse(NamedTuple):
+    content: bytes
+    media_type: str
+    headers: Dict[str, str]
+
+
+@traced("serialize")
+def encoded(adapter: TypeAdapter, value, headers: Optional[Mapping[str, str]] = None) -> CachedResponse:
+    """Проверяет и кодирует значение для кэша в согласованный с клиентом формат"""
+    content, media_type = encode(adapter, adapter.validate_python(value, from_attributes=True))
+    return CachedResponse(content, media_type, dict(headers or {}))
+
+
+class MemoryCacheBackend:
+    """
+    Кэш в памяти процесса: LRU с ограничением по суммарному размеру ответов.
+    Ответ больше всего лимита не сохраняется.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        if len(value.content) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old.content)
+            self._data[key] = value
+            self.size += len(value.content)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted.content)
+            cache_bytes.set(self.size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+            cache_bytes.set(0)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    """
+    Общий кэш для нескольких воркеров (RESPONSE_CACHE_REDIS_URL). Записи
+    истекают по RESPONSE_CACHE_TTL_SECONDS; ошибка Redis - это промах, а не
+    ошибка запроса.
+    """
+
+    def __init__(self, client, ttl: int, namespace: str = "taskmanager:resp:"):
+        self.client = client
+        self.ttl = ttl
+        self.namespace = namespace
+
+    @staticmethod
+    def _pack(value: CachedResponse) -> bytes:
+        meta = json.dumps([value.media_type, value.headers]).encode()
+        return meta + b"\n" + value.content
+
+    @staticmethod
+    def _unpack(data: bytes) -> CachedResponse:
+        meta, content = data.split(b"\n", 1)
+        media_type, headers = json.loads(meta)
+        return CachedResponse(content, media_type, headers)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            data = self.client.get(key)
+        except RedisError as exc:
+            logger.warning("Redis недоступен, кэш ответов пропущен: %s", exc)
+            return None
+        return None if data is None else self._unpack(data)
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        try:
+            self.client.set(key, self._pack(value), ex=self.ttl)
+        except RedisError as exc:
+            logger.warning("Redis недоступен, ответ не закэширован: %s", exc)
+
+    def clear(self) -> None:
+        """Удаляет только ключи кэша: на том же сервере могут быть корзины ограничения входа"""
+        try:
+            keys = list(self.client.scan_iter(match=self.namespace + "*", count=1000))
+            for start in range(0, len(keys), 1000):
+                self.client.delete(*keys[start:start + 1000])
+        except RedisError as exc:
+            logger.warning("Redis недоступен, кэш ответов не очищен: %s", exc)
+
+
+def create_backend():
+    if settings.RESPONSE_CACHE_REDIS_URL:
+        if redis is not None:
+            return RedisCacheBackend(get_client(settings.RESPONSE_CACHE_REDIS_URL), settings.RESPONSE_CACHE_TTL_SECONDS)
+        logger.warning("RESPONSE_CACHE_REDIS_URL задан, но пакет redis не установлен - кэш только в памяти процесса")
+    return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_BYTES)
+
+
+class ResponseCache:
+    """
+    Сериализованные ответы GET по ключу: маршрут и параметры запроса, класс
+    доступа, ETag проекта (id, время создания, версия) и формат ответа.
+
+    Записи не инвалидируются: каждый путь записи увеличивает версию проекта
+    (bump_project_version), и старые ключи больше не запрашиваются, пока их
+    не вытеснит LRU или TTL. Проверка доступа выполняется до обращения к кэшу.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+
+    @staticmethod
+    def key(request: Request, project: Project, user: User) -> str:
+        parts = (
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            access_class(project, user),
+            project_etag(project),
+            wants_msgpack(),
+        )
+        return "taskmanager:resp:" + hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def respond(
+        self,
+        request: Request,
+        project: Project,
+        user: User,
+        build: Callable[[], CachedResponse],
+        flight: Optional[SingleFlight] = None,
+        headers: Optional[Mapping[str, str]] = None
+    ) -> Response:
+        """
+        Ответ из кэша или от build(). С flight одновременные промахи по одному
+        ключу строят ответ один раз.
+        """
+        key = self.key(request, project, user)
+        endpoint = request.scope["route"].path
+
+        cached = self.backend.get(key) if settings.RESPONSE_CACHE_ENABLED else None
+        if cached is not None:
+            cache_requests.inc(endpoint=endpoint, result="hit")
+        else:
+            cache_requests.inc(endpoint=endpoint, result="miss")
+
+            def fill() -> CachedResponse:
+                value = build()
+                if settings.RESPONSE_CACHE_ENABLED:
+                    self.backend.set(key, value)
+                return value
+
+            cached = flight.do(key, fill) if flight is not None else fill()
+
+        return Response(
+            content=cached.content,
+            media_type=cached.media_type,
+            headers={**cached.headers, **(headers or {})}
+        )
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+response_cache = ResponseCache()
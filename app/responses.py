@@ -0,0 +1,90 @@
+from contextvars import ContextVar
+from typing import Any, Mapping, Optional, Tuple
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from .config import settings
+from .tracing import traced
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack - необязательная зависимость
+    msgpack = None
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Выставляется NegotiatedRoute на время обработки запроса
+msgpack_requested: ContextVar[bool] = ContextVar("msgpack_requested", default=False)
+
+
+def wants_msgpack() -> bool:
+    return msgpack is not None and msgpack_requested.get()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse на orjson при settings.FAST_JSON; без флага или без orjson
+    работает как обычный JSONResponse
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None or not settings.FAST_JSON:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class NegotiatedResponse(FastJSONResponse):
+    """Ответ в MessagePack, если клиент запросил его через Accept, иначе JSON"""
+
+    # Штатный путь FastAPI: тело кодируется здесь. Быстрый путь (respond) и кэш
+    # отдают готовые байты в обычном Response и пишут спан serialize сами
+    @traced("serialize")
+    def render(self, content: Any) -> bytes:
+        if wants_msgpack():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return msgpack.packb(content)
+        return super().render(content)
+
+
+@traced("serialize.encode")
+def encode(adapter: TypeAdapter, value: Any) -> Tuple[bytes, str]:
+    """Кодирует уже провалидированное значение в согласованный с клиентом формат"""
+    if wants_msgpack():
+        return msgpack.packb(adapter.dump_python(value, mode="json")), MSGPACK_MEDIA_TYPE
+    return adapter.dump_json(value), "application/json"
+
+
+@traced("serialize")
+def respond(
+    adapter: TypeAdapter,
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None
+) -> Any:
+    """
+    Быстрый путь сериализации (settings.FAST_JSON).
+
+    Данные (ORM-объекты или словари) валидируются адаптером один раз и сразу
+    кодируются в JSON внутри pydantic-core. Возвращённый Response FastAPI не
+    проверяет повторно по response_model. При выключенном флаге данные
+    возвращаются как есть и обрабатываются FastAPI штатно; заголовки в этом
+    случае выставляет сам эндпоинт через Response.
+    """
+    if not settings.FAST_JSON:
+        return data
+
+    value = adapter.validate_python(data, from_attributes=True)
+    content, media_type = encode(adapter, value)
+    return Response(
+        content=content,
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type
+    )
@@ -0,0 +1,150 @@
+import hashlib
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .metrics import registry
+from .models import RevokedToken
+
+revocation_checks = registry.counter(
+    "taskmanager_revocation_checks_total", "Проверки отзыва токенов по результату (miss, revoked, false_positive)"
+)
+
+# Запас при подгрузке новых отзывов: строки, записанные с отстающими часами
+# или закоммиченные позже соседних, не должны выпасть из синхронизации
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """
+    Битовый массив на n элементов с долей ложных срабатываний p.
+
+    Отвечает "точно нет" или "возможно да"; удалять элементы нельзя,
+    поэтому истёкшие записи убираются только пересборкой.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> bool:
+        """
+        Добавляет элемент; False, если все его биты уже стояли. Такой элемент
+        (повтор или ложное срабатывание) фильтр не меняет и в count не входит
+        """
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Отозванные jti в памяти процесса. Фильтр отсекает подавляющее большинство
+    запросов без обращения к БД; при попадании факт отзыва проверяется по
+    таблице revoked_tokens.
+
+    Отзывы из других процессов подтягиваются sync() раз в
+    REVOCATION_SYNC_INTERVAL_SECONDS - это и есть окно, в течение которого
+    отозванный в соседнем процессе токен ещё принимается.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.capacity = capacity or settings.REVOCATION_BLOOM_CAPACITY
+        self.error_rate = error_rate or settings.REVOCATION_BLOOM_ERROR_RATE
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._filter = BloomFilter(self.capacity, self.error_rate)
+            self._synced_at: Optional[datetime] = None
+
+    def _load(self, db: Session, since: Optional[datetime]) -> datetime:
+        now = self.clock()
+        query = db.query(RevokedToken.jti).filter(RevokedToken.expires_at > now)
+        if since is not None:
+            query = query.filter(RevokedToken.revoked_at >= since - SYNC_OVERLAP)
+        for (jti,) in query.yield_per(1000):
+            self._filter.add(jti)
+        return now
+
+    def rebuild(self, db: Session) -> None:
+        """Собирает фильтр заново из действующих отзывов; истёкшие выпадают"""
+        live = db.query(RevokedToken.id).filter(RevokedToken.expires_at > self.clock()).count()
+        with self._lock:
+            self.capacity = max(self.capacity, live * 2)
+            self._filter = BloomFilter(self.capacity, self.error_rate)
+            self._synced_at = self._load(db, None)
+
+    def sync(self, db: Session) -> None:
+        """
+        Подгружает отзывы с прошлой синхронизации. Строки из окна SYNC_OVERLAP
+        приходят повторно, но уже известные jti count не увеличивают, так что
+        пересборка начинается только по реальному росту числа отзывов
+        """
+        if self._synced_at is None or self._filter.count > self.capacity:
+            self.rebuild(db)
+            return
+        with self._lock:
+            self._synced_at = self._load(db, self._synced_at)
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            self._filter.add(jti)
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        if self._synced_at is None:
+            self.sync(db)
+
+        if jti not in self._filter:
+            revocation_checks.inc(result="miss")
+            return False
+
+        revoked = db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+        revocation_checks.inc(result="revoked" if revoked else "false_positive")
+        return revoked
+
+
+revocation_list = RevocationList()
+
+
+def revoke_token(db: Session, jti: str, user_id: int, expires_at: datetime) -> None:
+    if db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is None:
+        db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at, revoked_at=datetime.utcnow()))
+        db.commit()
+    revocation_list.add(jti)
+
+
+def sync_revocations(session_factory: Callable[[], Session] = SessionLocal) -> None:
+    with session_factory() as db:
+        revocation_list.sync(db)
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Set
+from datetime import datetime
+
+from ..database import get_db
+from ..models import User
+from ..schemas import BulkUserCreate, BulkUserResponse, UserResponse
+from ..auth import get_current_admin
+from ..negotiation import NegotiatedRoute
+from ..passwords import hash_passwords
+from ..responses import NegotiatedResponse
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse
+)
+
+# Ограничение числа параметров в одном IN (...)
+IN_CHUNK_SIZE = 900
+
+
+def existing_values(db: Session, column, values: List[str]) -> Set[str]:
+    found = set()
+    for i in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[i:i + IN_CHUNK_SIZE]
+        found.update(value for (value,) in db.query(column).filter(column.in_(chunk)))
+    return found
+
+
+@router.post("/users/bulk", response_model=BulkUserResponse)
+def bulk_create_users(
+    bulk_data: BulkUserCreate,
+    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Массовое создание пользователей. Уникальность email и имени проверяется
+    для всей пачки сразу, пароли хэшируются в пуле процессов, вставка - одной
+    транзакцией. Строки с конфликтами пропускаются, результат - по каждой строке.
+    """
+    rows = bulk_data.users
+    taken_emails = existing_values(db, User.email, list({row.email for row in rows}))
+    taken_usernames = existing_values(db, User.username, list({row.username for row in rows}))
+    
+    results = []
+    accepted = []
+    for index, row in enumerate(rows):
+        if row.email in taken_emails:
+            results.append(dict(index=index, created=False, detail="Email уже зарегистрирован"))
+        elif row.username in taken_usernames:
+            results.append(dict(index=index, created=False, detail="Имя пользователя уже занято"))
+        else:
+            # Повтор внутри пачки - тоже конфликт
+            taken_emails.add(row.email)
+            taken_usernames.add(row.username)
+            results.append(dict(index=index, created=True))
+            accepted.append((index, row))
+    
+    hashes = hash_passwords([row.password for _, row in accepted])
+    # created_at задаётся явно: ответ собирается без перечитывания строк после коммита
+    now = datetime.utcnow()
+    users = [
+        User(
+            email=row.email,
+            username=row.username,
+            full_name=row.full_name,
+            hashed_password=hashed_password,
+            is_active=True,
+            created_at=now
+        )
+        for (_, row), hashed_password in zip(accepted, hashes)
+    ]
+    
+    try:
+        db.add_all(users)
+        db.flush()
+        for (index, _), user in zip(accepted, users):
+            results[index]["user"] = UserResponse.model_validate(user)
+        db.commit()
+    except IntegrityError:
+        # Пользователь с тем же email или именем успел появиться после проверки
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Конфликт при сохранении пользователей, повторите запрос"
+        )
+    
+    return dict(
+        created=len(users),
+        failed=len(rows) - len(users),
+        results=results
+    )
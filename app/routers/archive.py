@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+
+from ..archive import restore_tasks, restored_tasks_total
+from ..database import get_db
+from ..models import User, Task, ArchivedTask, ArchivedComment
+from ..schemas import ArchivedTaskListResponse, ArchivedTaskResponse, CommentResponse, TaskResponse
+from ..auth import get_current_user
+from ..negotiation import NegotiatedRoute
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from ..responses import NegotiatedResponse
+from ..versioning import bump_project_version
+from .tasks import check_project_access
+
+router = APIRouter(
+    tags=["Archive"],
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse
+)
+
+
+def check_archived_task_access(task_id: int, user: User, db: Session):
+    task = db.query(ArchivedTask).filter(ArchivedTask.id == task_id).first()
+    
+    if not task:
+        raise HTTPException(
+            status_code=404,
+            detail="Задача в архиве не найдена"
+        )
+    
+    check_project_access(task.project_id, user, db)
+    
+    return task
+
+
+@router.get("/projects/{project_id}/archive/tasks", response_model=List[ArchivedTaskListResponse])
+def get_archived_tasks(
+    project_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Архивные задачи проекта, постранично по id"""
+    check_project_access(project_id, current_user, db)
+    
+    tasks, next_cursor = keyset_page(
+        db.query(ArchivedTask).filter(ArchivedTask.project_id == project_id),
+        (ArchivedTask.id,),
+        (int,),
+        cursor,
+        limit
+    )
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return tasks
+
+
+@router.get("/archive/tasks/{task_id}", response_model=ArchivedTaskResponse)
+def get_archived_task(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return check_archived_task_access(task_id, current_user, db)
+
+
+@router.get("/archive/tasks/{task_id}/comments", response_model=List[CommentResponse])
+def get_archived_task_comments(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    check_archived_task_access(task_id, current_user, db)
+    
+    return db.query(ArchivedComment).filter(ArchivedComment.task_id == task_id).options(
+        selectinload(ArchivedComment.author)
+    ).order_by(ArchivedComment.created_at, ArchivedComment.id).all()
+
+
+@router.post("/archive/tasks/{task_id}/restore", response_model=TaskResponse)
+def restore_archived_task(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Возврат задачи из архива вместе с комментариями, вложениями и тегами"""
+    task = check_archived_task_access(task_id, current_user, db)
+    project_id = task.project_id
+    
+    try:
+        restore_tasks(db, [task_id])
+        bump_project_version(db, project_id)
+        db.commit()
+    except IntegrityError:
+        # id задачи или её комментария уже занят в горячей таблице - такое
+        # возможно только для строк, созданных до перехода на AUTOINCREMENT
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Идентификатор задачи или её данных уже занят, восстановление невозможно"
+        )
+    restored_tasks_total.inc()
+    
+    return db.query(Task).filter(Task.id == task_id).first()
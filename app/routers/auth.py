@@ -1,21 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from typing import Optional
 
 from ..database import get_db
 from ..models import User
-from ..schemas import UserCreate, UserResponse, LoginRequest, Token, TokenRefresh
+from ..schemas import UserCreate, UserResponse, LoginRequest, Token, TokenRefresh, LogoutRequest
 from ..auth import (
+    security,
     get_password_hash,
     authenticate_user,
     create_access_token,
     create_refresh_token,
     save_refresh_token,
     check_refresh_token,
+    revoke_refresh_token,
+    decode_access_token,
+    get_current_user,
 )
+from ..claims import build_membership_claim
 from ..config import settings
+from ..negotiation import NegotiatedRoute
+from ..ratelimit import login_throttle
+from ..responses import NegotiatedResponse
+from ..revocation import revoke_token
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(
+    prefix="/auth",
+    tags=["Authentication"],
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse
+)
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -51,7 +67,10 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
+    if settings.LOGIN_THROTTLE_ENABLED:
+        login_throttle.check(login_data.username, request.client.host if request.client else None)
+    
     user = authenticate_user(db, login_data.username, login_data.password)
     
     if not user:
@@ -66,7 +85,7 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="Пользователь неактивен"
         )
     
-    access_token = create_access_token(user.id)
+    access_token = create_access_token(user.id, build_membership_claim(db, user))
     refresh_token = create_refresh_token(user.id)
 
     save_refresh_token(db, user.id, refresh_token)
@@ -80,27 +99,47 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 @router.post("/refresh", response_model=Token)
 def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
-    user = check_refresh_token(db, token_data.refresh_token)
+    db_token = check_refresh_token(db, token_data.refresh_token)
     
-    if not user:
+    if not db_token:
         raise HTTPException(
             status_code=401,
             detail="Недействительный refresh токен"
         )
     
+    user = db_token.user
     if not user.is_active:
         raise HTTPException(
             status_code=403,
             detail="Пользователь неактивен"
         )
     
-    access_token = create_access_token(user.id)
+    access_token = create_access_token(user.id, build_membership_claim(db, user))
     refresh_token = create_refresh_token(user.id)
     
-    save_refresh_token(db, user.id, refresh_token)
+    save_refresh_token(db, user.id, refresh_token, db_token.family_id)
     
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
         "token_type": "bearer"
     }
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Выход: access токен отзывается до истечения, refresh токен - вместе с цепочкой"""
+    payload = decode_access_token(credentials.credentials)
+    
+    if payload.get("jti"):
+        revoke_token(db, payload["jti"], current_user.id, datetime.utcfromtimestamp(payload["exp"]))
+    
+    if logout_data and logout_data.refresh_token:
+        revoke_refresh_token(db, logout_data.refresh_token, current_user.id)
+    
+    return None
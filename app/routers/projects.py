@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List
+from datetime import datetime
 
 from ..database import get_db
-from ..models import User, Project, ProjectMember, Task, Comment, ProjectRole, TaskStatus
+from ..models import User, Project, ProjectMember, Task, Comment, Tag, ProjectRole, TaskStatus, task_tags
 from ..schemas import (
     ProjectCreate,
     ProjectUpdate,
@@ -12,14 +13,35 @@ from ..schemas import (
     ProjectListResponse,
     ProjectStats,
     ProjectMemberCreate,
-    ProjectMemberResponse
+    ProjectMemberResponse,
+    ProjectBoardResponse,
+    ProjectAdapter,
+    ProjectListAdapter,
+    ProjectBoardAdapter,
+    ProjectStatsAdapter
 )
 from ..auth import get_current_user
+from ..responses import respond, encode, NegotiatedResponse
+from ..negotiation import NegotiatedRoute
+from ..versioning import bump_project_version, bump_membership_epoch, project_etag
+from ..claims import token_grants_access
+from ..api_keys import check_key_scope
+from ..singleflight import SingleFlight
+from ..response_cache import response_cache, encoded, CachedResponse
+from ..tracing import traced
 
-router = APIRouter(prefix="/projects", tags=["Projects"])
+router = APIRouter(
+    prefix="/projects",
+    tags=["Projects"],
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse
+)
 
+@traced("access.check_project_access")
 def check_project_access(project: Project, user: User):
-    if project.owner_id == user.id:
+    check_key_scope(user, project.id)
+    
+    if project.owner_id == user.id or token_grants_access(user, project.id):
         return True
  
     for member in project.members:
@@ -65,6 +87,8 @@ def get_projects(
     ).all()
     
     all_projects = {p.id: p for p in owned_projects + member_projects}.values()
+    if current_user.api_key_scope is not None:
+        all_projects = [p for p in all_projects if p.id in current_user.api_key_scope]
     
     result = []
     for project in all_projects:
@@ -73,7 +97,7 @@ def get_projects(
             ProjectMember.project_id == project.id
         ).scalar()
         
-        result.append(ProjectListResponse(
+        result.append(dict(
             id=project.id,
             name=project.name,
             description=project.description,
@@ -84,12 +108,13 @@ def get_projects(
             members_count=members_count
         ))
     
-    return result
+    return respond(ProjectListAdapter, result)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 def get_project(
     project_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -107,7 +132,7 @@ def get_project(
     
     check_project_access(project, current_user)
     
-    return project
+    return response_cache.respond(request, project, current_user, lambda: encoded(ProjectAdapter, project))
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
@@ -128,6 +153,7 @@ def update_project(
             detail="Проект не найден"
         )
     
+    check_key_scope(current_user, project.id)
     if project.owner_id != current_user.id:
         raise HTTPException(
             status_code=403,
@@ -140,7 +166,10 @@ def update_project(
         project.description = project_data.description
     if project_data.is_active is not None:
         project.is_active = project_data.is_active
+        if not project.is_active:
+            project.deleted_at = datetime.utcnow()
     
+    bump_project_version(db, project.id)
     db.commit()
     db.refresh(project)
     
@@ -165,38 +194,24 @@ def delete_project(
             detail="Проект не найден"
         )
     
+    check_key_scope(current_user, project.id)
     if project.owner_id != current_user.id:
         raise HTTPException(
             status_code=403,
             detail="Только владелец может удалить проект"
         )
     
-    # Soft delete - помечаем как неактивный
+    # Soft delete - помечаем как неактивный; окончательно проект удалит
+    # фоновая очистка (app/purge.py) по истечении PROJECT_RETENTION_DAYS
     project.is_active = False
+    project.deleted_at = datetime.utcnow()
+    bump_project_version(db, project.id)
     db.commit()
     
     return None
 
 
-@router.get("/{project_id}/stats", response_model=ProjectStats)
-def get_project_stats(
-    project_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.is_active == True
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Проект не найден"
-        )
-    
-    check_project_access(project, current_user)
-    
+def load_project_stats(db: Session, project_id: int) -> ProjectStats:
     total_tasks = db.query(func.count(Task.id)).filter(Task.project_id == project_id).scalar()
     
     todo_tasks = db.query(func.count(Task.id)).filter(
@@ -238,6 +253,130 @@ def get_project_stats(
     )
 
 
+project_stats_flight = SingleFlight("project_stats")
+
+
+@router.get("/{project_id}/stats", response_model=ProjectStats)
+def get_project_stats(
+    project_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(
+        Project.id == project_id,
+        Project.is_active == True
+    ).first()
+    
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден"
+        )
+    
+    check_project_access(project, current_user)
+    
+    # Одновременные промахи той же версии проекта считают статистику один раз
+    return response_cache.respond(
+        request, project, current_user,
+        lambda: encoded(ProjectStatsAdapter, load_project_stats(db, project_id)),
+        flight=project_stats_flight
+    )
+
+
+@router.get("/{project_id}/board", response_model=ProjectBoardResponse)
+def get_project_board(
+    project_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Доска проекта: участники, задачи по статусам, теги и счётчики за постоянное число запросов"""
+    project = db.query(Project).options(joinedload(Project.owner)).filter(
+        Project.id == project_id,
+        Project.is_active == True
+    ).first()
+    
+    if not project:
+        raise HTTPException(
+            status_code=404,
+            detail="Проект не найден"
+        )
+    
+    members = db.query(ProjectMember).options(joinedload(ProjectMember.user)).filter(
+        ProjectMember.project_id == project_id
+    ).order_by(ProjectMember.id).all()
+    
+    check_key_scope(current_user, project.id)
+    if project.owner_id != current_user.id and all(m.user_id != current_user.id for m in members):
+        raise HTTPException(
+            status_code=403,
+            detail="Нет доступа к проекту"
+        )
+    
+    etag = project_etag(project)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    def build_board() -> CachedResponse:
+        tasks = db.query(Task).filter(Task.project_id == project_id).order_by(Task.id).all()
+        
+        tag_rows = db.query(task_tags.c.task_id, Tag).join(
+            Tag, Tag.id == task_tags.c.tag_id
+        ).join(
+            Task, Task.id == task_tags.c.task_id
+        ).filter(Task.project_id == project_id).all()
+        
+        comments_counts = dict(
+            db.query(Comment.task_id, func.count(Comment.id))
+            .join(Task)
+            .filter(Task.project_id == project_id)
+            .group_by(Comment.task_id)
+            .all()
+        )
+        
+        tag_ids = {}
+        tags = {}
+        for task_id, tag in tag_rows:
+            tag_ids.setdefault(task_id, []).append(tag.id)
+            tags[tag.id] = tag
+        
+        columns = {task_status: [] for task_status in TaskStatus}
+        for task in tasks:
+            columns[task.status].append(dict(
+                id=task.id,
+                title=task.title,
+                status=task.status,
+                priority=task.priority,
+                assignee_id=task.assignee_id,
+                due_date=task.due_date,
+                created_at=task.created_at,
+                tag_ids=tag_ids.get(task.id, []),
+                comments_count=comments_counts.get(task.id, 0)
+            ))
+        
+        board = ProjectBoardAdapter.validate_python(dict(
+            project=project,
+            owner=project.owner,
+            members=members,
+            tasks=columns,
+            tags=sorted(tags.values(), key=lambda tag: tag.id),
+            stats=dict(
+                total_tasks=len(tasks),
+                todo_tasks=len(columns[TaskStatus.TODO]),
+                in_progress_tasks=len(columns[TaskStatus.IN_PROGRESS]),
+                review_tasks=len(columns[TaskStatus.REVIEW]),
+                done_tasks=len(columns[TaskStatus.DONE]),
+                total_members=len(members),
+                total_comments=sum(comments_counts.values())
+            )
+        ), from_attributes=True)
+        
+        return CachedResponse(*encode(ProjectBoardAdapter, board), {})
+    
+    return response_cache.respond(request, project, current_user, build_board, headers={"ETag": etag})
+
+
 @router.post("/{project_id}/members", response_model=ProjectMemberResponse, status_code=status.HTTP_201_CREATED)
 def add_project_member(
     project_id: int,
@@ -253,6 +392,7 @@ def add_project_member(
             detail="Проект не найден"
         )
     
+    check_key_scope(current_user, project.id)
     if project.owner_id != current_user.id:
         raise HTTPException(
             status_code=403,
@@ -284,6 +424,7 @@ def add_project_member(
     )
     
     db.add(db_member)
+    bump_project_version(db, project_id)
     db.commit()
     db.refresh(db_member)
     
@@ -308,6 +449,7 @@ def remove_project_member(
             detail="Проект не найден"
         )
     
+    check_key_scope(current_user, project.id)
     if project.owner_id != current_user.id:
         raise HTTPException(
             status_code=403,
@@ -333,6 +475,8 @@ def remove_project_member(
         )
     
     db.delete(member)
+    bump_project_version(db, project_id)
+    bump_membership_epoch(db, [user_id])
     db.commit()
     
     return None
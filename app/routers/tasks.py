@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
 from ..database import get_db
 from ..models import User, Project, Task, ProjectMember, ProjectRole, Comment, Tag
@@ -12,14 +13,37 @@ from ..schemas import (
     TaskListResponse,
     CommentCreate,
     CommentResponse,
-    TaskTagAdd
+    CommentThreadResponse,
+    TaskTagAdd,
+    TaskListAdapter,
+    CommentListAdapter,
+    CommentThreadAdapter
 )
 from ..auth import get_current_user
+from ..responses import NegotiatedResponse
+from ..negotiation import NegotiatedRoute
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from ..versioning import bump_project_version
+from ..claims import token_grants_access
+from ..api_keys import check_key_scope
+from ..deletion import hard_delete_task
+from ..singleflight import SingleFlight
+from ..response_cache import response_cache, encoded
+from ..tracing import traced
 
-router = APIRouter(tags=["Tasks"])
+router = APIRouter(
+    tags=["Tasks"],
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse
+)
+
+project_tasks_flight = SingleFlight("project_tasks")
 
 
+@traced("access.check_project_access")
 def check_project_access(project_id: int, user: User, db: Session):
+    check_key_scope(user, project_id)
+    
     project = db.query(Project).filter(Project.id == project_id).first()
     
     if not project:
@@ -28,7 +52,7 @@ def check_project_access(project_id: int, user: User, db: Session):
             detail="Проект не найден"
         )
     
-    if project.owner_id == user.id:
+    if project.owner_id == user.id or token_grants_access(user, project_id):
         return project
     
     membership = db.query(ProjectMember).filter(
@@ -45,6 +69,7 @@ def check_project_access(project_id: int, user: User, db: Session):
     return project
 
 
+@traced("access.check_task_access")
 def check_task_access(task_id: int, user: User, db: Session):
     task = db.query(Task).filter(Task.id == task_id).first()
     
@@ -99,28 +124,18 @@ def create_task(
     )
     
     db.add(db_task)
+    bump_project_version(db, project_id)
     db.commit()
     db.refresh(db_task)
     
     return db_task
 
 
-@router.get("/projects/{project_id}/tasks", response_model=List[TaskListResponse])
-def get_project_tasks(
-    project_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    check_project_access(project_id, current_user, db)
-    
-    
-    from sqlalchemy.orm import selectinload
-    
+def load_project_tasks(db: Session, project_id: int) -> list:
     tasks = db.query(Task).filter(Task.project_id == project_id).options(
         selectinload(Task.tags)
     ).all()
     
-    
     task_ids = [task.id for task in tasks]
     comments_counts = dict(
         db.query(Comment.task_id, func.count(Comment.id))
@@ -131,7 +146,7 @@ def get_project_tasks(
     
     result = []
     for task in tasks:
-        result.append(TaskListResponse(
+        result.append(dict(
             id=task.id,
             title=task.title,
             status=task.status,
@@ -146,6 +161,23 @@ def get_project_tasks(
     return result
 
 
+@router.get("/projects/{project_id}/tasks", response_model=List[TaskListResponse])
+def get_project_tasks(
+    project_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = check_project_access(project_id, current_user, db)
+    
+    # Одновременные промахи той же версии проекта читают задачи один раз
+    return response_cache.respond(
+        request, project, current_user,
+        lambda: encoded(TaskListAdapter, load_project_tasks(db, project_id)),
+        flight=project_tasks_flight
+    )
+
+
 @router.put("/tasks/{task_id}", response_model=TaskResponse)
 def update_task(
     task_id: int,
@@ -189,6 +221,7 @@ def update_task(
     if task_data.due_date is not None:
         task.due_date = task_data.due_date
     
+    bump_project_version(db, task.project_id)
     db.commit()
     db.refresh(task)
     
@@ -212,7 +245,8 @@ def delete_task(
             detail="Только владелец проекта может удалять задачи"
         )
     
-    db.delete(task)
+    hard_delete_task(db, task.id)
+    bump_project_version(db, task.project_id)
     db.commit()
     
     return None
@@ -234,23 +268,76 @@ def add_comment(
     )
     
     db.add(db_comment)
+    bump_project_version(db, task.project_id)
     db.commit()
     db.refresh(db_comment)
     
     return db_comment
 
 
+COMMENT_KEY = (Comment.created_at, Comment.id)
+COMMENT_KEY_TYPES = (datetime.fromisoformat, int)
+
+
 @router.get("/tasks/{task_id}/comments", response_model=List[CommentResponse])
 def get_task_comments(
     task_id: int,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    check_task_access(task_id, current_user, db)
+    """Комментарии задачи; с limit или cursor - постранично, курсор следующей страницы в X-Next-Cursor"""
+    task = check_task_access(task_id, current_user, db)
     
-    comments = db.query(Comment).filter(Comment.task_id == task_id).order_by(Comment.created_at).all()
+    def build():
+        query = db.query(Comment).filter(Comment.task_id == task_id).options(selectinload(Comment.author))
+        
+        if cursor is None and limit is None:
+            return encoded(CommentListAdapter, query.order_by(*COMMENT_KEY).all())
+        
+        comments, next_cursor = keyset_page(
+            query, COMMENT_KEY, COMMENT_KEY_TYPES, cursor, limit or DEFAULT_PAGE_SIZE
+        )
+        return encoded(CommentListAdapter, comments, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+    
+    # Проект уже загружен проверкой доступа и берётся из identity map
+    return response_cache.respond(request, task.project, current_user, build)
+
+
+@router.get("/tasks/{task_id}/comments/thread", response_model=CommentThreadResponse)
+def get_task_comment_thread(
+    task_id: int,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Компактная лента комментариев: каждый автор передаётся один раз"""
+    task = check_task_access(task_id, current_user, db)
+    
+    def build():
+        comments, next_cursor = keyset_page(
+            db.query(Comment).filter(Comment.task_id == task_id),
+            COMMENT_KEY,
+            COMMENT_KEY_TYPES,
+            cursor,
+            limit
+        )
+        
+        author_ids = {comment.author_id for comment in comments}
+        authors = db.query(User).filter(User.id.in_(author_ids)).all() if author_ids else []
+        
+        return encoded(CommentThreadAdapter, dict(
+            task_id=task_id,
+            comments=comments,
+            authors={author.id: author for author in authors},
+            next_cursor=next_cursor
+        ))
     
-    return comments
+    return response_cache.respond(request, task.project, current_user, build)
 
 
 @router.delete("/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -279,6 +366,7 @@ def delete_comment(
             )
     
     db.delete(comment)
+    bump_project_version(db, task.project_id)
     db.commit()
     
     return None
@@ -308,6 +396,7 @@ def add_tag_to_task(
         )
     
     task.tags.append(tag)
+    bump_project_version(db, task.project_id)
     db.commit()
     db.refresh(task)
     
@@ -1,14 +1,199 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status as http_status
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, exists, or_
+from typing import List, Optional
+from datetime import datetime, timedelta
 
 from ..database import get_db
-from ..models import User
-from ..schemas import UserResponse
+from ..api_keys import generate_api_key, digest_api_key, forget_api_key
+from ..models import (
+    User, Project, ProjectMember, Task, Comment, TaskStatus, ApiKey,
+    TASK_PRIORITY_ORDER, TASK_NO_DUE_DATE, task_priority_rank, task_due_date_or_last
+)
+from ..schemas import UserResponse, AssignedTaskResponse, AssignedTaskListAdapter, ApiKeyCreate, ApiKeyResponse, ApiKeyCreated
 from ..auth import get_current_user
+from ..negotiation import NegotiatedRoute
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from ..responses import respond, NegotiatedResponse
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(
+    prefix="/users",
+    tags=["Users"],
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse
+)
+
+MY_TASKS_KEY = (task_priority_rank, task_due_date_or_last, Task.id)
+MY_TASKS_KEY_TYPES = (int, datetime.fromisoformat, int)
+
+
+def my_tasks_row_key(task: Task):
+    return (
+        TASK_PRIORITY_ORDER.index(task.priority),
+        task.due_date or TASK_NO_DUE_DATE,
+        task.id
+    )
 
 
 @router.get("/me", response_model=UserResponse)
 def get_my_profile(current_user: User = Depends(get_current_user)):
     return current_user
+
+
+@router.get("/me/tasks", response_model=List[AssignedTaskResponse])
+def get_my_tasks(
+    response: Response,
+    status: Optional[List[TaskStatus]] = Query(None),
+    overdue: bool = False,
+    due_within_days: Optional[int] = Query(None, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Задачи, назначенные текущему пользователю, во всех доступных ему проектах"""
+    is_member = exists().where(
+        ProjectMember.project_id == Task.project_id,
+        ProjectMember.user_id == current_user.id
+    )
+    
+    # Задачи исполнителя читаются по индексу ix_tasks_assignee_id_priority_rank_due_date_id
+    # уже в порядке MY_TASKS_KEY, проекты проверяются по первичному ключу
+    query = db.query(Task).join(Project, Project.id == Task.project_id).filter(
+        Task.assignee_id == current_user.id,
+        Project.is_active == True,
+        or_(Project.owner_id == current_user.id, is_member)
+    )
+    
+    if current_user.api_key_scope is not None:
+        query = query.filter(Task.project_id.in_(current_user.api_key_scope))
+    
+    if status:
+        query = query.filter(Task.status.in_(status))
+    
+    now = datetime.utcnow()
+    if overdue:
+        query = query.filter(Task.due_date < now, Task.status != TaskStatus.DONE)
+    if due_within_days is not None:
+        query = query.filter(Task.due_date >= now, Task.due_date <= now + timedelta(days=due_within_days))
+    
+    tasks, next_cursor = keyset_page(
+        query.options(selectinload(Task.tags)),
+        MY_TASKS_KEY,
+        MY_TASKS_KEY_TYPES,
+        cursor,
+        limit,
+        row_key=my_tasks_row_key
+    )
+    
+    task_ids = [task.id for task in tasks]
+    comments_counts = dict(
+        db.query(Comment.task_id, func.count(Comment.id))
+        .filter(Comment.task_id.in_(task_ids))
+        .group_by(Comment.task_id)
+        .all()
+    ) if task_ids else {}
+    
+    result = []
+    for task in tasks:
+        result.append(dict(
+            id=task.id,
+            project_id=task.project_id,
+            title=task.title,
+            status=task.status,
+            priority=task.priority,
+            assignee_id=task.assignee_id,
+            due_date=task.due_date,
+            created_at=task.created_at,
+            tags_count=len(task.tags),
+            comments_count=comments_counts.get(task.id, 0)
+        ))
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return respond(AssignedTaskListAdapter, result, headers=response.headers)
+
+
+@router.post("/me/api-keys", response_model=ApiKeyCreated, status_code=http_status.HTTP_201_CREATED)
+def create_api_key(
+    key_data: ApiKeyCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Новый API ключ текущего пользователя; ключ возвращается только в этом ответе"""
+    project_ids = sorted(set(key_data.project_ids)) if key_data.project_ids is not None else None
+    
+    # Ключ с ограничением не может выпустить ключ с более широким доступом
+    scope = current_user.api_key_scope
+    if scope is not None and (project_ids is None or not scope.issuperset(project_ids)):
+        raise HTTPException(
+            status_code=403,
+            detail="API ключ не допускает доступ к проекту"
+        )
+    
+    if project_ids:
+        is_member = exists().where(
+            ProjectMember.project_id == Project.id,
+            ProjectMember.user_id == current_user.id
+        )
+        accessible = {project_id for (project_id,) in db.query(Project.id).filter(
+            Project.id.in_(project_ids),
+            or_(Project.owner_id == current_user.id, is_member)
+        )}
+        if accessible != set(project_ids):
+            raise HTTPException(
+                status_code=403,
+                detail="Нет доступа к проекту"
+            )
+    
+    key, prefix = generate_api_key()
+    api_key = ApiKey(
+        user_id=current_user.id,
+        name=key_data.name,
+        prefix=prefix,
+        key_hash=digest_api_key(key),
+        project_ids=project_ids,
+        expires_at=(
+            datetime.utcnow() + timedelta(days=key_data.expires_in_days) if key_data.expires_in_days else None
+        )
+    )
+    
+    db.add(api_key)
+    db.commit()
+    db.refresh(api_key)
+    
+    api_key.key = key
+    return api_key
+
+
+@router.get("/me/api-keys", response_model=List[ApiKeyResponse])
+def get_api_keys(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return db.query(ApiKey).filter(ApiKey.user_id == current_user.id).order_by(ApiKey.id).all()
+
+
+@router.delete("/me/api-keys/{key_id}", status_code=http_status.HTTP_204_NO_CONTENT)
+def delete_api_key(
+    key_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    api_key = db.query(ApiKey).filter(
+        ApiKey.id == key_id,
+        ApiKey.user_id == current_user.id
+    ).first()
+    
+    if not api_key:
+        raise HTTPException(
+            status_code=404,
+            detail="API ключ не найден"
+        )
+    
+    forget_api_key(api_key)
+    db.delete(api_key)
+    db.commit()
+    
+    return None
@@ -1,9 +1,21 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator, field_serializer
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, PlainSerializer, TypeAdapter, field_validator
+from typing import Optional, List, Dict, Annotated
 from datetime import datetime, timezone
 from app.models import TaskStatus, TaskPriority, ProjectRole
 
 
+def serialize_utc(dt: datetime) -> str:
+    """Наивные даты из БД считаются UTC"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat()
+
+
+# Один общий сериализатор вместо field_serializer в каждой схеме;
+# для None pydantic-core не вызывает Python-функцию вовсе
+UTCDateTime = Annotated[datetime, PlainSerializer(serialize_utc, return_type=str, when_used="unless-none")]
+
+
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -18,17 +30,29 @@ class UserCreate(UserBase):
 class UserResponse(UserBase):
     id: int
     is_active: bool
-    created_at: datetime
+    created_at: UTCDateTime
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
 
 
+class BulkUserCreate(BaseModel):
+    users: List[UserCreate] = Field(..., min_length=1, max_length=5000)
+
+
+class BulkUserResult(BaseModel):
+    # Позиция строки в запросе
+    index: int
+    created: bool
+    user: Optional[UserResponse] = None
+    detail: Optional[str] = None
+
+
+class BulkUserResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkUserResult]
+
 
 class Token(BaseModel):
     access_token: str
@@ -40,6 +64,33 @@ class TokenRefresh(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+class ApiKeyCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    # None - ключ действует во всех проектах владельца
+    project_ids: Optional[List[int]] = None
+    expires_in_days: Optional[int] = Field(None, ge=1)
+
+
+class ApiKeyResponse(BaseModel):
+    id: int
+    name: str
+    prefix: str
+    project_ids: Optional[List[int]] = None
+    expires_at: Optional[UTCDateTime] = None
+    created_at: UTCDateTime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ApiKeyCreated(ApiKeyResponse):
+    # Показывается один раз, в БД хранится только HMAC
+    key: str
+
+
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -57,16 +108,10 @@ class TagCreate(TagBase):
 
 class TagResponse(TagBase):
     id: int
-    created_at: datetime
+    created_at: UTCDateTime
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
-
 
 
 class ProjectBase(BaseModel):
@@ -88,17 +133,12 @@ class ProjectResponse(ProjectBase):
     id: int
     owner_id: int
     is_active: bool
-    created_at: datetime
-    updated_at: Optional[datetime]
+    version: int = 1
+    created_at: UTCDateTime
+    updated_at: Optional[UTCDateTime]
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at', 'updated_at')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
-
 
 class ProjectListResponse(BaseModel):
     id: int
@@ -106,18 +146,12 @@ class ProjectListResponse(BaseModel):
     description: Optional[str]
     owner_id: int
     is_active: bool
-    created_at: datetime
+    created_at: UTCDateTime
     tasks_count: int = 0
     members_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
-
 
 class ProjectStats(BaseModel):
     total_tasks: int
@@ -144,16 +178,33 @@ class ProjectMemberResponse(BaseModel):
     project_id: int
     user_id: int
     role: ProjectRole
-    joined_at: datetime
+    joined_at: UTCDateTime
     user: UserResponse
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('joined_at')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
+
+
+class BoardTask(BaseModel):
+    id: int
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    assignee_id: Optional[int]
+    due_date: Optional[UTCDateTime]
+    created_at: UTCDateTime
+    tag_ids: List[int] = []
+    comments_count: int = 0
+
+
+class ProjectBoardResponse(BaseModel):
+    """Снимок доски проекта одним ответом"""
+    project: ProjectResponse
+    owner: UserResponse
+    members: List[ProjectMemberResponse]
+    tasks: Dict[TaskStatus, List[BoardTask]]
+    tags: List[TagResponse]
+    stats: ProjectStats
 
 
 
@@ -187,19 +238,14 @@ class TaskUpdate(BaseModel):
 class TaskResponse(TaskBase):
     id: int
     project_id: int
-    created_at: datetime
-    updated_at: Optional[datetime]
+    due_date: Optional[UTCDateTime] = None
+    created_at: UTCDateTime
+    updated_at: Optional[UTCDateTime]
     assignee: Optional[UserResponse] = None
     tags: List[TagResponse] = []
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at', 'updated_at', 'due_date')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
-
 
 class TaskListResponse(BaseModel):
     id: int
@@ -207,18 +253,37 @@ class TaskListResponse(BaseModel):
     status: TaskStatus
     priority: TaskPriority
     assignee_id: Optional[int]
-    due_date: Optional[datetime]
-    created_at: datetime
+    due_date: Optional[UTCDateTime]
+    created_at: UTCDateTime
     tags_count: int = 0
     comments_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at', 'due_date')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
+
+class AssignedTaskResponse(TaskListResponse):
+    project_id: int
+
+
+
+class ArchivedTaskListResponse(BaseModel):
+    id: int
+    project_id: int
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    assignee_id: Optional[int]
+    due_date: Optional[UTCDateTime]
+    created_at: Optional[UTCDateTime]
+    updated_at: Optional[UTCDateTime]
+    archived_at: UTCDateTime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArchivedTaskResponse(TaskResponse):
+    created_at: Optional[UTCDateTime]
+    archived_at: UTCDateTime
 
 
 
@@ -234,17 +299,28 @@ class CommentResponse(CommentBase):
     id: int
     task_id: int
     author_id: int
-    created_at: datetime
-    updated_at: Optional[datetime]
+    created_at: UTCDateTime
+    updated_at: Optional[UTCDateTime]
     author: UserResponse
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at', 'updated_at')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
+
+class CommentCompact(CommentBase):
+    id: int
+    author_id: int
+    created_at: UTCDateTime
+    updated_at: Optional[UTCDateTime]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CommentThreadResponse(BaseModel):
+    """Компактная лента: авторы вынесены в отдельную таблицу по id"""
+    task_id: int
+    comments: List[CommentCompact]
+    authors: Dict[int, UserResponse]
+    next_cursor: Optional[str] = None
 
 
 
@@ -255,17 +331,23 @@ class AttachmentResponse(BaseModel):
     file_size: int
     mime_type: Optional[str]
     task_id: int
-    uploaded_at: datetime
+    uploaded_at: UTCDateTime
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('uploaded_at')
-    def serialize_dt(self, dt: datetime, _info):
-        if dt and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat() if dt else None
-
 
 
 class TaskTagAdd(BaseModel):
     tag_name: str = Field(..., min_length=1, max_length=50)
+
+
+
+# Предкомпилированные адаптеры для быстрого пути ответов (см. app/responses.py)
+ProjectAdapter = TypeAdapter(ProjectResponse)
+ProjectListAdapter = TypeAdapter(List[ProjectListResponse])
+TaskListAdapter = TypeAdapter(List[TaskListResponse])
+AssignedTaskListAdapter = TypeAdapter(List[AssignedTaskResponse])
+CommentListAdapter = TypeAdapter(List[CommentResponse])
+CommentThreadAdapter = TypeAdapter(CommentThreadResponse)
+ProjectBoardAdapter = TypeAdapter(ProjectBoardResponse)
+ProjectStatsAdapter = TypeAdapter(ProjectStats)
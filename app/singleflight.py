@@ -0,0 +1,77 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from .metrics import registry
+
+coalesced_calls = registry.counter(
+    "taskmanager_singleflight_calls_total", "Вызовы через single-flight по эндпоинтам: leader считал, follower дождался"
+)
+coalescing_ratio = registry.gauge(
+    "taskmanager_singleflight_coalescing_ratio", "Доля вызовов, получивших чужой результат"
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных вычислений: первый запрос с ключом
+    считает результат, остальные, пришедшие до его завершения, ждут и
+    получают тот же объект. Готовые результаты не хранятся - это не кэш.
+
+    Ключ должен включать всё, от чего зависит результат: для ответов по
+    проекту - версию проекта и класс доступа запрашивающего.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            self._record("follower")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            self._record("leader")
+        return call.result
+
+    def _record(self, role: str) -> None:
+        coalesced_calls.inc(endpoint=self.name, role=role)
+        followers = coalesced_calls.value(endpoint=self.name, role="follower")
+        leaders = coalesced_calls.value(endpoint=self.name, role="leader")
+        if followers + leaders:
+            coalescing_ratio.set(followers / (followers + leaders), endpoint=self.name)
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+def access_class(project, user) -> str:
+    """Класс доступа для ключа: ответы, разные для владельца и участника, не смешиваются"""
+    return "owner" if project.owner_id == user.id else "member"
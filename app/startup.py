@@ -0,0 +1,71 @@
+"""
+Быстрый холодный старт (FAST_STARTUP): заранее собранная схема OpenAPI и
+прогрев пула соединений и кэшей до приёма запросов.
+
+Схема пересобирается после изменения маршрутов или схем ответов:
+    python -m app.startup
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+OPENAPI_PATH = Path(__file__).with_name("openapi.json")
+
+
+def load_openapi() -> Optional[dict]:
+    """Собранная схема или None - тогда FastAPI построит её сам при первом запросе"""
+    if not OPENAPI_PATH.exists():
+        logger.warning("%s не найден, схема OpenAPI будет построена при первом запросе", OPENAPI_PATH.name)
+        return None
+    return json.loads(OPENAPI_PATH.read_text(encoding="utf-8"))
+
+
+def warmup() -> None:
+    """
+    Открывает WARMUP_DB_CONNECTIONS соединений (они остаются в пуле) и
+    загружает список отозванных токенов, чтобы первые запросы не платили
+    за подключение к БД и полную загрузку отзывов.
+    """
+    from sqlalchemy import text
+
+    from .database import SessionLocal, engine
+    from .revocation import revocation_list
+
+    started = time.perf_counter()
+    connections = []
+    try:
+        for _ in range(settings.WARMUP_DB_CONNECTIONS):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+
+    with SessionLocal() as db:
+        revocation_list.sync(db)
+
+    logger.info("Прогрев завершён за %.3f с", time.perf_counter() - started)
+
+
+def write_openapi() -> None:
+    from fastapi import FastAPI
+
+    from .main import app, include_routers
+
+    include_routers(app)
+    # Собранный файл не читается: схема строится заново по маршрутам
+    app.openapi_schema = None
+    schema = FastAPI.openapi(app)
+    OPENAPI_PATH.write_text(json.dumps(schema, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(f"{OPENAPI_PATH}: {len(schema['paths'])} путей")
+
+
+if __name__ == "__main__":
+    write_openapi()
@@ -0,0 +1,93 @@
+import logging
+import time
+from contextvars import ContextVar
+
+import anyio.to_thread
+
+from .config import settings
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+pool_size = registry.gauge("taskmanager_threadpool_size", "Размер пула потоков для синхронных обработчиков")
+pool_busy = registry.gauge("taskmanager_threadpool_busy", "Занятые потоки пула")
+pool_waiting = registry.gauge("taskmanager_threadpool_waiting", "Вызовы, ожидающие свободного потока")
+wait_seconds = registry.counter(
+    "taskmanager_threadpool_wait_seconds_total",
+    "Суммарное ожидание свободного потока вызовами, отправленными в пул"
+)
+exec_seconds = registry.counter(
+    "taskmanager_threadpool_exec_seconds_total",
+    "Суммарное время выполнения вызовов в потоках пула"
+)
+pool_calls = registry.counter("taskmanager_threadpool_calls_total", "Вызовы, выполненные в пуле потоков")
+
+try:
+    # Лимитер пула по умолчанию хранится в RunVar бэкенда asyncio; публичного
+    # способа подменить его нет
+    from anyio._backends._asyncio import _default_thread_limiter
+except ImportError:  # без него ожидание и выполнение не замеряются
+    _default_thread_limiter = None
+
+# Момент получения потока текущим вызовом; __aenter__ и __aexit__ лимитера
+# выполняются в контексте одной задачи
+_acquired_at: ContextVar[float] = ContextVar("threadpool_acquired_at")
+
+
+class TimedLimiter:
+    """
+    Лимитер пула по умолчанию с замером каждого перехода в пул: FastAPI
+    отправляет туда каждую синхронную зависимость (get_db, get_current_user
+    и т.п.) и сам обработчик отдельным вызовом. Ожидание - от запроса потока
+    до его получения, выполнение - от получения до освобождения.
+    """
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    def __getattr__(self, name):
+        return getattr(self.limiter, name)
+
+    @property
+    def total_tokens(self) -> float:
+        return self.limiter.total_tokens
+
+    @total_tokens.setter
+    def total_tokens(self, value: float) -> None:
+        self.limiter.total_tokens = value
+
+    async def __aenter__(self) -> None:
+        pool_busy.set(self.limiter.borrowed_tokens)
+        pool_waiting.set(self.limiter.statistics().tasks_waiting)
+        queued = time.perf_counter()
+        await self.limiter.__aenter__()
+        now = time.perf_counter()
+        wait_seconds.inc(now - queued)
+        _acquired_at.set(now)
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        try:
+            await self.limiter.__aexit__(exc_type, exc, traceback)
+        finally:
+            exec_seconds.inc(time.perf_counter() - _acquired_at.get())
+            pool_calls.inc()
+
+
+def configure_threadpool() -> None:
+    """
+    Размер пула потоков anyio, в котором FastAPI выполняет синхронные
+    обработчики и зависимости, и замер ожидания потока. Вызывается в
+    lifespan - лимитер свой у каждого цикла событий.
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    if _default_thread_limiter is None:
+        logger.warning("Лимитер пула потоков anyio недоступен: ожидание потока не замеряется")
+    elif not isinstance(limiter, TimedLimiter):
+        limiter = TimedLimiter(limiter)
+        _default_thread_limiter.set(limiter)
+    limiter.total_tokens = settings.THREADPOOL_SIZE
+    pool_size.set(settings.THREADPOOL_SIZE)
+
+
+def pool_statistics():
+    return anyio.to_thread.current_default_thread_limiter().statistics()
@@ -0,0 +1,57 @@
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .metrics import registry
+from .models import RefreshToken, RevokedToken
+from .revocation import revocation_list
+
+swept_tokens = registry.counter("taskmanager_tokens_swept_total", "Удалённые просроченные токены по таблицам")
+sweep_last_run = registry.gauge("taskmanager_token_sweep_last_run_seconds", "Длительность последнего удаления просроченных токенов")
+
+
+class TokenSweeper:
+    """
+    Удаление просроченных refresh токенов и записей об отзыве access токенов
+    порциями по TOKEN_SWEEP_BATCH_SIZE строк по индексу expires_at.
+    """
+
+    models = (RefreshToken, RevokedToken)
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        max_run_seconds: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.TOKEN_SWEEP_BATCH_SIZE
+        self.max_run_seconds = settings.TOKEN_SWEEP_MAX_RUN_SECONDS if max_run_seconds is None else max_run_seconds
+
+    def run_once(self) -> int:
+        started = time.monotonic()
+        now = datetime.utcnow()
+        swept = 0
+
+        with self.session_factory() as db:
+            for model in self.models:
+                while time.monotonic() - started < self.max_run_seconds:
+                    expired = select(model.id).where(model.expires_at < now).limit(self.batch_size)
+                    deleted = db.query(model).filter(model.id.in_(expired)).delete(synchronize_session=False)
+                    db.commit()
+
+                    swept += deleted
+                    swept_tokens.inc(deleted, table=model.__tablename__)
+                    if deleted < self.batch_size:
+                        break
+
+            # Из фильтра Блума нельзя удалять - истёкшие отзывы уходят при пересборке
+            revocation_list.rebuild(db)
+
+        sweep_last_run.set(time.monotonic() - started)
+        return swept
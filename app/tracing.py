@@ -0,0 +1,384 @@
+"""
+Трассировка запросов: дерево спанов на запрос с распространением через
+заголовок traceparent (W3C Trace Context).
+
+Спаны: корневой на HTTP запрос (TracingMiddleware), get_current_user,
+проверки доступа, каждый SQL запрос, commit сессии и сериализация ответа.
+Решение о записи принимается один раз в начале запроса: флаг sampled из
+входящего traceparent, иначе доля TRACE_SAMPLE_RATIO; сверх
+TRACE_MAX_TRACES_PER_SECOND трассы не пишутся. В невыбранном запросе
+инструментированный код только читает ContextVar.
+
+Готовые спаны копятся в ограниченном буфере в памяти (при переполнении
+старые отбрасываются) и выгружаются фоновым потоком раз в
+TRACE_EXPORT_INTERVAL_SECONDS в формате OTLP/JSON: POST на
+TRACE_OTLP_URL/v1/traces или строкой в файл TRACE_EXPORT_PATH. Трассировка
+по умолчанию выключена, а без коллектора и файла спаны отбрасываются: файл
+не появляется в рабочем каталоге сам по себе.
+"""
+import functools
+import json
+import logging
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import recorded_statement
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+exported_spans = registry.counter("taskmanager_trace_spans_exported_total", "Выгруженные спаны трассировки")
+dropped_spans = registry.counter("taskmanager_trace_spans_dropped_total", "Спаны, отброшенные при переполнении буфера или ошибке выгрузки")
+sampled_traces = registry.counter("taskmanager_traces_total", "Запросы по решению о записи трассы")
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+SERVICE_NAME = "taskmanager-api"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: Optional[Dict] = None):
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str, attributes: Optional[Dict] = None) -> "Span":
+        return Span(self.trace_id, self.span_id, name, attributes)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        span_buffer.add(self)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": span_kind(self.attributes),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def span_kind(attributes: Dict) -> int:
+    # OTLP SpanKind: SERVER для запроса, CLIENT для обращений к БД, INTERNAL для остального
+    if "http.method" in attributes:
+        return 2
+    if "db.system" in attributes:
+        return 3
+    return 1
+
+
+def otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128) or 1:032x}"
+
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64) or 1:016x}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_id, sampled) или None для отсутствующего/некорректного заголовка"""
+    if not header:
+        return None
+    match = TRACEPARENT.match(header.strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def format_traceparent(trace_id: str, span_id: str, sampled: bool) -> str:
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+# Текущий спан записываемой трассы; None - трасса не пишется
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Sampler:
+    """Доля трасс плюс потолок в секунду (ведро токенов): накладные расходы ограничены и при всплеске"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+
+    def should_sample(self, parent_sampled: Optional[bool]) -> bool:
+        sampled = parent_sampled if parent_sampled is not None else random.random() < settings.TRACE_SAMPLE_RATIO
+        if not sampled:
+            return False
+        rate = settings.TRACE_MAX_TRACES_PER_SECOND
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(rate, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tokens = float(settings.TRACE_MAX_TRACES_PER_SECOND)
+            self._updated = time.monotonic()
+
+
+sampler = Sampler()
+sampler.reset()
+
+
+class SpanBuffer:
+    def __init__(self):
+        self._spans: Deque[Span] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            if len(self._spans) >= settings.TRACE_BUFFER_SIZE:
+                self._spans.popleft()
+                dropped_spans.inc()
+            self._spans.append(span)
+
+    def drain(self) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+            self._spans.clear()
+        return spans
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+
+span_buffer = SpanBuffer()
+
+
+class start_span:
+    """
+    Дочерний спан текущего, если трасса записывается; иначе ничего не делает.
+    Используется как контекстный менеджер.
+    """
+    __slots__ = ("name", "attributes", "span", "_token")
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> Optional[Span]:
+        parent = current_span.get()
+        if parent is not None:
+            self.span = parent.child(self.name, self.attributes)
+            self._token = current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if self.span is not None:
+            current_span.reset(self._token)
+            self.span.finish(exc)
+
+
+def traced(name: str) -> Callable:
+    """Декоратор: вызов функции - спан name. FastAPI читает сигнатуру через __wrapped__"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_span.get() is None:
+                return func(*args, **kwargs)
+            with start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_span(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span.get()
+    if parent is not None:
+        conn.info["trace_span"] = parent.child("db.query", {
+            "db.system": conn.dialect.name,
+            "db.statement": recorded_statement(statement, settings.TRACE_MAX_STATEMENT_LENGTH),
+            "db.executemany": executemany,
+        })
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_query_span(conn, cursor, statement, parameters, context, executemany):
+    span = conn.info.pop("trace_span", None)
+    if span is not None:
+        span.attributes["db.rowcount"] = cursor.rowcount
+        span.finish()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_query_span(exception_context):
+    connection = exception_context.connection
+    span = connection.info.pop("trace_span", None) if connection is not None else None
+    if span is not None:
+        span.finish(exception_context.original_exception)
+
+
+@event.listens_for(Session, "before_commit")
+def _start_commit_span(session):
+    parent = current_span.get()
+    if parent is not None:
+        # flush внутри commit: его INSERT/UPDATE - дочерние спаны commit
+        span = parent.child("db.commit")
+        session.info["trace_commit"] = (span, current_span.set(span))
+
+
+def _finish_commit_span(session, error: Optional[BaseException] = None):
+    started = session.info.pop("trace_commit", None)
+    if started is not None:
+        span, token = started
+        current_span.reset(token)
+        span.finish(error)
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_span_done(session):
+    _finish_commit_span(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _commit_span_failed(session):
+    _finish_commit_span(session, RuntimeError("rollback"))
+
+
+class TracingMiddleware:
+    """Корневой спан запроса; traceparent принимается из запроса и возвращается в ответе"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACE_ENABLED:
+            return await self.app(scope, receive, send)
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                incoming = parse_traceparent(value.decode("latin-1"))
+                break
+        trace_id, parent_id, parent_sampled = incoming if incoming else (new_trace_id(), None, None)
+        sampled = sampler.should_sample(parent_sampled)
+        sampled_traces.inc(sampled=str(sampled).lower())
+
+        if not sampled:
+            traceparent = format_traceparent(trace_id, new_span_id(), False).encode()
+
+            async def propagating_send(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", []), (b"traceparent", traceparent)]
+                await send(message)
+
+            return await self.app(scope, receive, propagating_send)
+
+        span = Span(trace_id, parent_id, f"{scope['method']} {scope['path']}", {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        traceparent = format_traceparent(trace_id, span.span_id, True).encode()
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"traceparent", traceparent)]
+            await send(message)
+
+        token = current_span.set(span)
+        error = None
+        try:
+            await self.app(scope, receive, traced_send)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            current_span.reset(token)
+            # Starlette дописывает найденный маршрут в scope
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                span.attributes["http.route"] = route
+                span.name = f"{scope['method']} {route}"
+            span.finish(error)
+
+
+class SpanExporter:
+    """Выгрузка буфера в OTLP/JSON: на коллектор (TRACE_OTLP_URL) или в файл (TRACE_EXPORT_PATH)"""
+
+    def __init__(self, buffer: SpanBuffer = span_buffer):
+        self.buffer = buffer
+        self._warned_no_sink = False
+
+    def payload(self, spans: List[Span]) -> Dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}],
+        }]}
+
+    def run_once(self) -> int:
+        spans = self.buffer.drain()
+        if not spans:
+            return 0
+        if not settings.TRACE_OTLP_URL and not settings.TRACE_EXPORT_PATH:
+            if not self._warned_no_sink:
+                logger.warning("Не задан ни TRACE_OTLP_URL, ни TRACE_EXPORT_PATH: спаны отбрасываются")
+                self._warned_no_sink = True
+            dropped_spans.inc(len(spans))
+            return 0
+        body = json.dumps(self.payload(spans), separators=(",", ":"))
+        try:
+            if settings.TRACE_OTLP_URL:
+                request = urllib.request.Request(
+                    settings.TRACE_OTLP_URL.rstrip("/") + "/v1/traces", data=body.encode("utf-8"),
+                    headers={"Content-Type": "application/json"}, method="POST"
+                )
+                with urllib.request.urlopen(request, timeout=settings.TRACE_EXPORT_TIMEOUT_SECONDS):
+                    pass
+            else:
+                with open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as output:
+                    output.write(body + "\n")
+        except OSError as exc:
+            # Повтор не делается: трассы - не данные, буфер не должен расти
+            logger.warning("Не удалось выгрузить %s спанов: %s", len(spans), exc)
+            dropped_spans.inc(len(spans))
+            return 0
+        exported_spans.inc(len(spans))
+        return len(spans)
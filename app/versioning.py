@@ -0,0 +1,39 @@
+from sqlalchemy.orm import Session
+
+from .models import Project, User
+
+
+def bump_project_version(db: Session, project_id: int) -> None:
+    """
+    Увеличивает версию проекта в текущей транзакции.
+
+    Вызывается на каждом пути записи, меняющем проект, его задачи, участников,
+    комментарии или теги. Кэши ответов ключуются версией и не требуют явной
+    очистки: после коммита старые ключи просто перестают запрашиваться.
+    """
+    db.query(Project).filter(Project.id == project_id).update(
+        {Project.version: Project.version + 1},
+        synchronize_session=False
+    )
+
+
+def bump_membership_epoch(db: Session, user_ids) -> None:
+    """
+    Увеличивает эпоху членства пользователей (список id или подзапрос) в
+    текущей транзакции. Вызывается, когда пользователь теряет доступ к проекту.
+    """
+    db.query(User).filter(User.id.in_(user_ids)).update(
+        {User.membership_epoch: User.membership_epoch + 1},
+        synchronize_session=False
+    )
+
+
+def project_etag(project: Project) -> str:
+    """
+    Слабый ETag текущего состояния проекта.
+
+    Кроме id и версии включает время создания: SQLite может переиспользовать
+    id удалённой строки, и новый проект начнётся с той же версии 1.
+    """
+    created = int(project.created_at.timestamp()) if project.created_at else 0
+    return f'W/"{project.id}-{created}-{project.version}"'
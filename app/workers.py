@@ -0,0 +1,29 @@
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker(threading.Thread):
+    """Фоновый поток, вызывающий job раз в interval секунд до вызова stop()"""
+
+    def __init__(self, name: str, job: Callable[[], object], interval: float, stop_timeout: float = 10.0):
+        super().__init__(name=name, daemon=True)
+        self.job = job
+        self.interval = interval
+        self.stop_timeout = stop_timeout
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                result = self.job()
+                if result:
+                    logger.info("%s: обработано %s", self.name, result)
+            except Exception:
+                logger.exception("%s: ошибка фоновой задачи", self.name)
+
+    def stop(self):
+        self._stopped.set()
+        self.join(timeout=self.stop_timeout)
@@ -0,0 +1,83 @@
+"""
+Удаление задачи с большим числом комментариев: каскад ORM против каскада БД.
+
+ORM-каскад (как было: cascade="all, delete-orphan" без passive_deletes)
+загружает все комментарии и удаляет их построчно. Каскад БД - один DELETE
+задачи, комментарии удаляет SQLite по ondelete="CASCADE".
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_cascade_delete [--comments 10000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.deletion import hard_delete_task
+from app.models import User, Project, Task, Comment
+
+
+def seed(session, comments: int) -> int:
+    user = User(email="bench@example.com", username="bench", hashed_password="x")
+    session.add(user)
+    session.flush()
+    project = Project(name="Bench", owner_id=user.id)
+    session.add(project)
+    session.flush()
+    task = Task(title="Hot task", project_id=project.id)
+    session.add(task)
+    session.flush()
+    session.execute(insert(Comment), [
+        {"content": f"Comment {i}", "task_id": task.id, "author_id": user.id}
+        for i in range(comments)
+    ])
+    session.commit()
+    return task.id
+
+
+def orm_cascade(session, task_id: int):
+    # Поведение до passive_deletes: каждый комментарий загружается и удаляется отдельно
+    task = session.get(Task, task_id)
+    for comment in list(task.comments):
+        session.delete(comment)
+    session.delete(task)
+    session.commit()
+
+
+def db_cascade(session, task_id: int):
+    hard_delete_task(session, task_id)
+    session.commit()
+
+
+def run(func, comments: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as session:
+            task_id = seed(session, comments)
+        with Session() as session:
+            started = time.perf_counter()
+            func(session, task_id)
+            elapsed = time.perf_counter() - started
+            assert session.query(Comment).count() == 0
+        engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--comments", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"comments={args.comments}")
+    for name, func in [("orm_cascade", orm_cascade), ("db_cascade", db_cascade)]:
+        print(f"{name:<12} {run(func, args.comments) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
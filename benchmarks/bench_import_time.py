@@ -0,0 +1,73 @@
+"""
+Время импорта приложения в новом процессе: app/ (обычный режим и
+FAST_STARTUP) против obfuscated/.
+
+Каждый вариант импортируется --repeat раз в отдельном интерпретаторе;
+печатаются медиана и минимум, а с --top - самые дорогие модули по
+python -X importtime. С --json результаты пишутся в файл для сравнения
+между версиями.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_import_time [--repeat 5] [--top 10] [--json import_time.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+VARIANTS = [
+    ("app", "app.main", {}),
+    ("app FAST_STARTUP", "app.main", {"FAST_STARTUP": "1"}),
+    ("obfuscated", "obfuscated.main", {}),
+]
+
+MEASURE = "import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+
+
+def import_seconds(module: str, env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(module=module)],
+        env={**os.environ, **env}, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def top_modules(module: str, env: dict, count: int):
+    """Модули с наибольшим собственным временем импорта, мкс"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, **env}, capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    results = {}
+    for name, module, env in VARIANTS:
+        timings = [import_seconds(module, env) for _ in range(args.repeat)]
+        results[name] = {"median": statistics.median(timings), "min": min(timings)}
+        print(f"{name:<18} median={results[name]['median'] * 1000:8.1f} ms  min={results[name]['min'] * 1000:8.1f} ms")
+        for self_us, module_name in top_modules(module, env, args.top) if args.top else []:
+            print(f"    {self_us / 1000:8.1f} ms  {module_name}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Микробенчмарки примитивов, которые выполняются на каждом запросе: JWT
+(create_access_token, decode, get_current_user), verify_password,
+сериализация каждой schemas.*Response на 1/100/10k строк, обе реализации
+check_project_access и открытие сессии через get_db.
+
+Каждый замер - --samples выборок; в выборке функция вызывается столько раз,
+чтобы она длилась не меньше --min-time, хранится время одного вызова.
+--save сохраняет выборки как базовую линию (по умолчанию
+benchmarks/baselines/micro.json), --compare сравнивает с ней: U-критерий
+Манна-Уитни (односторонний, без предположения о нормальности) и
+бутстреп-интервал для отношения медиан. Регрессия - изменение больше
+--threshold при p < --alpha; тогда код выхода 1. Базовая линия зависит от
+машины: сравнивать имеет смысл только с линией, снятой на той же.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_micro [--filter serialize] [--samples 15] [--min-time 0.02]
+        [--save | --compare] [--baseline path.json] [--threshold 0.05] [--alpha 0.01] [--json report.json]
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, text
+
+from app import schemas
+from app.auth import create_access_token, decode_access_token, get_current_user
+from app.config import settings
+from app.database import Base, SessionLocal, get_db, pool_options
+from app.models import User, Project, ProjectMember, TaskStatus, TaskPriority, ProjectRole
+from app.passwords import get_password_hash, verify_password
+from app.routers.projects import check_project_access as check_loaded_project_access
+from app.routers.tasks import check_project_access as check_queried_project_access
+
+BASELINE_PATH = Path(__file__).with_name("baselines") / "micro.json"
+
+SIZES = [1, 100, 10_000]
+MEMBERS = 50
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+STATUSES = list(TaskStatus)
+PRIORITIES = list(TaskPriority)
+
+
+def user(i: int) -> dict:
+    return dict(id=i, email=f"user{i}@example.com", username=f"user{i}", full_name=f"User {i}",
+                is_active=True, created_at=NOW)
+
+
+def tag(i: int) -> dict:
+    return dict(id=i, name=f"tag-{i}", color="#808080", created_at=NOW)
+
+
+def project(i: int) -> dict:
+    return dict(id=i, name=f"Project {i}", description="Benchmark project", owner_id=1, is_active=True,
+                version=1, created_at=NOW, updated_at=None)
+
+
+def task_row(i: int) -> dict:
+    return dict(id=i, title=f"Task {i}", status=STATUSES[i % 4], priority=PRIORITIES[i % 4],
+                assignee_id=i % MEMBERS or None, due_date=NOW + timedelta(days=i % 30) if i % 3 else None,
+                created_at=NOW - timedelta(minutes=i))
+
+
+def task(i: int) -> dict:
+    return dict(task_row(i), project_id=1, description="Benchmark task", updated_at=NOW,
+                assignee=user(i % MEMBERS + 1), tags=[tag(1), tag(2)])
+
+
+def member(i: int) -> dict:
+    return dict(id=i, project_id=1, user_id=i, role=ProjectRole.MEMBER, joined_at=NOW, user=user(i))
+
+
+def comment(i: int) -> dict:
+    return dict(id=i, task_id=1, author_id=i % MEMBERS + 1, content=f"Comment {i}", created_at=NOW, updated_at=None)
+
+
+def board(rows: int) -> dict:
+    tasks = {status: [] for status in STATUSES}
+    for i in range(rows):
+        tasks[STATUSES[i % 4]].append(dict(task_row(i), tag_ids=[1, 2], comments_count=i % 7))
+    return dict(project=project(1), owner=user(1), members=[member(i) for i in range(1, MEMBERS + 1)],
+                tasks=tasks, tags=[tag(i) for i in range(1, 11)],
+                stats=dict(total_tasks=rows, todo_tasks=0, in_progress_tasks=0, review_tasks=0, done_tasks=0,
+                           total_members=MEMBERS, total_comments=0))
+
+
+# Ответ-список: фабрика строки; ответ-объект: фабрика всего ответа по числу строк
+ROW_FACTORIES: Dict[str, Callable[[int], dict]] = {
+    "UserResponse": user,
+    "ApiKeyResponse": lambda i: dict(id=i, name=f"key {i}", prefix=f"tm_{i:08d}", project_ids=[1, 2],
+                                     expires_at=NOW, created_at=NOW),
+    "ApiKeyCreated": lambda i: dict(id=i, name=f"key {i}", prefix=f"tm_{i:08d}", project_ids=None,
+                                    expires_at=None, created_at=NOW, key="tm_" + "x" * 40),
+    "TagResponse": tag,
+    "ProjectResponse": project,
+    "ProjectListResponse": lambda i: dict(project(i), tasks_count=i % 100, members_count=i % 10),
+    "ProjectMemberResponse": member,
+    "TaskResponse": task,
+    "TaskListResponse": lambda i: dict(task_row(i), tags_count=i % 4, comments_count=i % 7),
+    "AssignedTaskResponse": lambda i: dict(task_row(i), project_id=i % 20, tags_count=i % 4, comments_count=i % 7),
+    "ArchivedTaskListResponse": lambda i: dict(task_row(i), project_id=1, updated_at=NOW, archived_at=NOW),
+    "ArchivedTaskResponse": lambda i: dict(task(i), archived_at=NOW),
+    "CommentResponse": lambda i: dict(comment(i), author=user(i % MEMBERS + 1)),
+    "AttachmentResponse": lambda i: dict(id=i, filename=f"file{i}.txt", file_path=f"uploads/{i}.txt",
+                                         file_size=1024 + i, mime_type="text/plain", task_id=1, uploaded_at=NOW),
+}
+OBJECT_FACTORIES: Dict[str, Callable[[int], dict]] = {
+    "BulkUserResponse": lambda rows: dict(created=rows, failed=0, results=[
+        dict(index=i, created=True, user=user(i)) for i in range(rows)
+    ]),
+    "ProjectBoardResponse": board,
+    "CommentThreadResponse": lambda rows: dict(task_id=1, comments=[comment(i) for i in range(rows)], authors={
+        i: user(i) for i in range(1, min(rows, MEMBERS) + 1)
+    }),
+}
+
+
+def response_schemas() -> List[str]:
+    names = [
+        name for name, value in inspect.getmembers(schemas, inspect.isclass)
+        if value.__module__ == schemas.__name__ and (name.endswith("Response") or name == "ApiKeyCreated")
+    ]
+    missing = set(names) - set(ROW_FACTORIES) - set(OBJECT_FACTORIES)
+    if missing:
+        raise SystemExit(f"Нет тестовых данных для схем: {', '.join(sorted(missing))}")
+    return names
+
+
+def serialize(adapter: TypeAdapter, data) -> Callable[[], bytes]:
+    # Быстрый путь эндпоинтов: app.responses.respond
+    return lambda: adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+class Database:
+    """Файловая SQLite с пулом как в app/database.py: владелец, участники, проект"""
+
+    def __init__(self):
+        self.directory = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(self.directory.name, 'micro.db')}"
+        self.engine = create_engine(url, **pool_options(url))
+        Base.metadata.create_all(self.engine)
+        # get_db открывает SessionLocal: на время замеров - на этой БД
+        SessionLocal.configure(bind=self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(insert(User), [
+                dict(id=i, email=f"user{i}@example.com", username=f"user{i}", hashed_password="x")
+                for i in range(1, MEMBERS + 1)
+            ])
+            connection.execute(insert(Project), [dict(id=1, name="Project", owner_id=1)])
+            connection.execute(insert(ProjectMember), [
+                dict(project_id=1, user_id=i, role=ProjectRole.MEMBER) for i in range(2, MEMBERS + 1)
+            ])
+        with SessionLocal() as db:
+            # Последний участник: проверка через project.members проходит весь список
+            self.member = db.get(User, MEMBERS)
+            self.member.token_memberships = None
+            self.member.api_key_scope = None
+
+    def close(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+
+def benchmarks(database: Database) -> Iterator[Tuple[str, Callable[[], Callable]]]:
+    """(имя, фабрика замеряемой функции); фабрика вызывается только для выбранных"""
+    token = create_access_token(1)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def current_user():
+        def run():
+            with SessionLocal() as db:
+                get_current_user(credentials, db)
+        return run
+
+    yield "jwt.create_access_token", lambda: lambda: create_access_token(1)
+    yield "jwt.decode_access_token", lambda: lambda: decode_access_token(token)
+    yield "auth.get_current_user", current_user
+
+    def password():
+        hashed = get_password_hash("benchmark-password")
+        return lambda: verify_password("benchmark-password", hashed)
+
+    yield f"passwords.verify_password[{settings.PASSWORD_HASH_SCHEME}]", password
+
+    for name in response_schemas():
+        schema = getattr(schemas, name)
+        for rows in SIZES:
+            if name in ROW_FACTORIES:
+                def factory(schema=schema, name=name, rows=rows):
+                    return serialize(TypeAdapter(List[schema]), [ROW_FACTORIES[name](i) for i in range(1, rows + 1)])
+            else:
+                def factory(schema=schema, name=name, rows=rows):
+                    return serialize(TypeAdapter(schema), OBJECT_FACTORIES[name](rows))
+            yield f"serialize.{name}[{rows}]", factory
+
+    def loaded_access():
+        def run():
+            with SessionLocal() as db:
+                check_loaded_project_access(db.get(Project, 1), database.member)
+        return run
+
+    def queried_access():
+        def run():
+            with SessionLocal() as db:
+                check_queried_project_access(1, database.member, db)
+        return run
+
+    yield "access.projects.check_project_access", loaded_access
+    yield "access.tasks.check_project_access", queried_access
+
+    def session_setup():
+        def run():
+            generator = get_db()
+            db = next(generator)
+            # Сессия берёт соединение из пула только на первом запросе
+            db.execute(text("SELECT 1"))
+            generator.close()
+        return run
+
+    yield "database.get_db", session_setup
+
+
+def measure(func: Callable, samples: int, min_time: float) -> List[float]:
+    func()
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed * 1.2) + 1))
+    return [timer.timeit(loops) / loops for _ in range(samples)]
+
+
+def mann_whitney_greater(current: List[float], baseline: List[float]) -> float:
+    """p-значение гипотезы «current больше baseline»; нормальное приближение с поправкой на связи"""
+    n1, n2 = len(current), len(baseline)
+    ranked = sorted([(value, 0) for value in current] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(ranked)
+    ties = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        count = j - i + 1
+        ties += count ** 3 - count
+        i = j + 1
+    u = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 0.5
+    z = (u - n1 * n2 / 2 - 0.5) / variance ** 0.5
+    return 1 - statistics.NormalDist().cdf(z)
+
+
+def ratio_interval(current: List[float], baseline: List[float], confidence: float, rounds: int = 2000) -> Tuple[float, float]:
+    """Бутстреп-интервал отношения медиан current/baseline"""
+    rng = random.Random(0)
+    ratios = sorted(
+        statistics.median(rng.choices(current, k=len(current))) / statistics.median(rng.choices(baseline, k=len(baseline)))
+        for _ in range(rounds)
+    )
+    tail = (1 - confidence) / 2
+    return ratios[int(tail * rounds)], ratios[min(rounds - 1, int((1 - tail) * rounds))]
+
+
+def compare(current: List[float], baseline: List[float], threshold: float, alpha: float) -> Dict:
+    ratio = statistics.median(current) / statistics.median(baseline)
+    low, high = ratio_interval(current, baseline, 1 - alpha)
+    p_slower = mann_whitney_greater(current, baseline)
+    p_faster = mann_whitney_greater(baseline, current)
+    if p_slower < alpha and low > 1 + threshold:
+        verdict = "regression"
+    elif p_faster < alpha and high < 1 - threshold:
+        verdict = "improvement"
+    else:
+        verdict = "unchanged"
+    return {
+        "ratio": round(ratio, 4), "ci_low": round(low, 4), "ci_high": round(high, 4),
+        "p_slower": round(p_slower, 6), "p_faster": round(p_faster, 6), "verdict": verdict,
+    }
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(), "machine": platform.machine(), "node": platform.node(),
+        "processor": platform.processor(), "commit": commit, "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", help="регулярное выражение по имени замера")
+    parser.add_argument("--samples", type=int, default=15)
+    parser.add_argument("--min-time", type=float, default=0.02, help="минимальная длительность выборки, с")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="записать результаты в базовую линию")
+    mode.add_argument("--compare", action="store_true", help="сравнить с базовой линией")
+    parser.add_argument("--threshold", type=float, default=0.05, help="незначимое относительное изменение")
+    parser.add_argument("--alpha", type=float, default=0.01)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        stored = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline = stored["results"]
+        if stored["environment"].get("node") != platform.node():
+            print(f"Базовая линия снята на {stored['environment'].get('node')}, сравнение может быть некорректным",
+                  file=sys.stderr)
+
+    pattern = re.compile(args.filter) if args.filter else None
+    database = Database()
+    results, report = {}, {}
+    try:
+        for name, factory in benchmarks(database):
+            if pattern is not None and not pattern.search(name):
+                continue
+            samples = measure(factory(), args.samples, args.min_time)
+            results[name] = samples
+            report[name] = {"median": statistics.median(samples), "min": min(samples)}
+            line = f"{name:<52} {format_time(report[name]['median'])}"
+            if name in baseline:
+                report[name].update(compare(samples, baseline[name], args.threshold, args.alpha))
+                line += (f"  x{report[name]['ratio']:.3f} [{report[name]['ci_low']:.3f}, {report[name]['ci_high']:.3f}]"
+                         f"  {report[name]['verdict']}")
+            print(line, flush=True)
+    finally:
+        database.close()
+
+    if args.save:
+        stored = {"environment": environment(), "results": {}}
+        if args.baseline.exists():
+            # С --filter перезаписываются только выбранные замеры
+            stored["results"] = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        stored["results"].update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, indent=1, sort_keys=True) + "\n", encoding="utf-8")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump({"environment": environment(), "results": report}, output, indent=2)
+
+    regressions = [name for name, result in report.items() if result.get("verdict") == "regression"]
+    if regressions:
+        print(f"Регрессии: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
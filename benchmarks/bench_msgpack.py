@@ -0,0 +1,49 @@
+"""
+Сравнение JSON и MessagePack: размер ответа, время кодирования и декодирования.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_msgpack [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import timeit
+
+import msgpack
+
+from app.schemas import TaskListAdapter
+from benchmarks.bench_serialization import make_rows
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    value = TaskListAdapter.validate_python(make_rows(args.rows))
+    content = TaskListAdapter.dump_python(value, mode="json")
+
+    codecs = [
+        ("json", lambda: json.dumps(content).encode("utf-8"), json.loads),
+        ("pydantic_json", lambda: TaskListAdapter.dump_json(value), json.loads),
+        ("msgpack", lambda: msgpack.packb(content), msgpack.unpackb),
+    ]
+    if orjson is not None:
+        codecs.insert(1, ("orjson", lambda: orjson.dumps(content), orjson.loads))
+
+    print(f"rows={args.rows} repeat={args.repeat}")
+    print(f"{'codec':<14} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for name, encode, decode in codecs:
+        payload = encode()
+        encode_time = min(timeit.repeat(encode, number=1, repeat=args.repeat))
+        decode_time = min(timeit.repeat(lambda: decode(payload), number=1, repeat=args.repeat))
+        print(f"{name:<14} {len(payload):>10} {encode_time * 1000:>10.1f} {decode_time * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Латентность входа (POST /auth/login) при разных параметрах хэширования паролей.
+
+Для каждой настройки пароль пользователя хэшируется заново, затем серия
+входов через TestClient; печатаются p50 и p99. Ограничение попыток входа
+на время замера выключается.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_password_hashing [--requests 50] [--bcrypt-rounds 10 12 13] [--scrypt-n-log2 14 15]
+"""
+import argparse
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.database import Base, get_db
+from app.main import app
+from app.models import User
+from app.passwords import get_password_hash
+
+PASSWORD = "benchmark-password"
+
+
+def configure(scheme: str, cost: int):
+    settings.PASSWORD_HASH_SCHEME = scheme
+    if scheme == "bcrypt":
+        settings.BCRYPT_ROUNDS = cost
+    else:
+        settings.SCRYPT_N_LOG2 = cost
+
+
+def measure(client, Session, requests: int):
+    with Session() as session:
+        session.query(User).update({User.hashed_password: get_password_hash(PASSWORD)})
+        session.commit()
+
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.post("/api/v1/auth/login", json={"username": "bench", "password": PASSWORD})
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+    return latencies
+
+
+def percentile(values, q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 12, 13])
+    parser.add_argument("--scrypt-n-log2", type=int, nargs="*", default=[14, 15])
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.add(User(email="bench@example.com", username="bench", hashed_password="x"))
+        session.commit()
+
+    def override_get_db():
+        with Session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    settings.LOGIN_THROTTLE_ENABLED = False
+
+    cases = [("bcrypt", rounds) for rounds in args.bcrypt_rounds]
+    cases += [("scrypt", n_log2) for n_log2 in args.scrypt_n_log2]
+
+    print(f"requests={args.requests}")
+    with TestClient(app) as client:
+        for scheme, cost in cases:
+            configure(scheme, cost)
+            latencies = measure(client, Session, args.requests)
+            print(
+                f"{scheme:<7} cost={cost:<3} "
+                f"p50={percentile(latencies, 50) * 1000:8.1f} ms  p99={percentile(latencies, 99) * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Микробенчмарк сериализации списка задач (10k строк).
+
+Сравнивает штатный путь FastAPI (модель в эндпоинте -> повторная валидация
+по response_model -> dump -> json.dumps) с быстрым путём app.responses.respond.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.models import TaskStatus, TaskPriority
+from app.schemas import TaskListResponse, TaskListAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_rows(count: int) -> List[dict]:
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    statuses = list(TaskStatus)
+    priorities = list(TaskPriority)
+    return [
+        dict(
+            id=i,
+            title=f"Task {i}",
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            assignee_id=i % 50 or None,
+            due_date=now + timedelta(days=i % 30) if i % 3 else None,
+            created_at=now - timedelta(minutes=i),
+            tags_count=i % 4,
+            comments_count=i % 7,
+        )
+        for i in range(count)
+    ]
+
+
+def baseline(rows: List[dict]) -> bytes:
+    # Так работал эндпоинт до быстрого пути
+    response_field = TypeAdapter(List[TaskListResponse])
+    models = [TaskListResponse(**row) for row in rows]
+    value = response_field.validate_python(models)
+    return json.dumps(response_field.dump_python(value, mode="json")).encode("utf-8")
+
+
+def fast_path(rows: List[dict]) -> bytes:
+    value = TaskListAdapter.validate_python(rows, from_attributes=True)
+    return TaskListAdapter.dump_json(value)
+
+
+def fast_path_orjson(rows: List[dict]) -> bytes:
+    value = TaskListAdapter.validate_python(rows, from_attributes=True)
+    return orjson.dumps(TaskListAdapter.dump_python(value, mode="json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert json.loads(baseline(rows)) == json.loads(fast_path(rows))
+
+    cases = [("baseline", baseline), ("fast_path", fast_path)]
+    if orjson is not None:
+        cases.append(("fast_path_orjson", fast_path_orjson))
+
+    print(f"rows={args.rows} repeat={args.repeat}")
+    for name, func in cases:
+        best = min(timeit.repeat(lambda: func(rows), number=1, repeat=args.repeat))
+        print(f"{name:<18} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
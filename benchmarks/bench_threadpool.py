@@ -0,0 +1,157 @@
+"""
+Пропускная способность смеси эндпоинтов при разном размере пула потоков.
+
+Для каждого THREADPOOL_SIZE приложение запускается заново (lifespan задаёт
+размер пула), пул соединений файловой SQLite рассчитывается так же, как в
+app/database.py. Клиентские потоки в течение --duration секунд шлют смесь
+чтений и записей; печатаются req/s, p50/p99 и ожидание потока против
+выполнения в пуле по метрикам app/threadpool.py - сумма по всем переходам
+запроса в пул, в среднем на запрос. --db-delay-ms добавляет задержку к
+каждому SQL запросу, имитируя сетевую БД: на локальной SQLite обработчики
+упираются в GIL, и размер пула почти не влияет на результат.
+
+Кэш ответов, допуск запросов и ограничение входа на время замера выключены.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_threadpool [--threads 4 16 40 80] [--clients 64] [--duration 5] [--db-delay-ms 2]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_access_token
+from app.config import settings
+from app.database import Base, get_db, pool_options
+from app.main import app
+from app.models import User, Project, Task, Comment
+from app.threadpool import exec_seconds, wait_seconds
+
+# (доля, метод, путь); {project} и {task} подставляются из засеянных данных
+MIX = [
+    (40, "GET", "/api/v1/projects/{project}/tasks"),
+    (20, "GET", "/api/v1/projects/{project}/stats"),
+    (20, "GET", "/api/v1/tasks/{task}/comments"),
+    (10, "POST", "/api/v1/projects/{project}/tasks"),
+    (10, "PUT", "/api/v1/tasks/{task}"),
+]
+
+
+def seed(Session, projects: int, tasks: int):
+    with Session() as session:
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        session.add(user)
+        session.flush()
+        project_ids, task_ids = [], []
+        for p in range(projects):
+            project = Project(name=f"Bench {p}", owner_id=user.id)
+            session.add(project)
+            session.flush()
+            project_ids.append(project.id)
+            for t in range(tasks):
+                task = Task(title=f"Task {t}", project_id=project.id)
+                session.add(task)
+                session.flush()
+                task_ids.append((project.id, task.id))
+        session.execute(insert(Comment), [
+            {"content": "Comment", "task_id": task_id, "author_id": user.id}
+            for _, task_id in task_ids
+        ])
+        session.commit()
+        return user.id, task_ids
+
+
+def client_loop(client, token, task_ids, deadline, seed_value, latencies, errors):
+    rng = random.Random(seed_value)
+    weights = [weight for weight, _, _ in MIX]
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        _, method, path = rng.choices(MIX, weights)[0]
+        project_id, task_id = rng.choice(task_ids)
+        url = path.format(project=project_id, task=task_id)
+        body = {"title": "Bench"} if method in ("POST", "PUT") else None
+        started = time.perf_counter()
+        response = client.request(method, url, json=body, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+
+
+def run(threads: int, args) -> None:
+    settings.THREADPOOL_SIZE = threads
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = create_engine(url, **pool_options(url))
+        if args.db_delay_ms:
+            event.listen(engine, "before_cursor_execute", lambda *a: time.sleep(args.db_delay_ms / 1000))
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        user_id, task_ids = seed(Session, args.projects, args.tasks)
+        token = create_access_token(user_id)
+
+        def override_get_db():
+            with Session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        latencies, errors = [], []
+        before = (wait_seconds.value(), exec_seconds.value())
+
+        with TestClient(app) as client:
+            deadline = time.perf_counter() + args.duration
+            workers = [
+                threading.Thread(
+                    target=client_loop,
+                    args=(client, token, task_ids, deadline, i, latencies, errors)
+                )
+                for i in range(args.clients)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        requests = max(len(latencies), 1)
+        waited = (wait_seconds.value() - before[0]) / requests
+        executed = (exec_seconds.value() - before[1]) / requests
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        print(
+            f"threads={threads:<4} {len(latencies) / args.duration:8.1f} req/s  "
+            f"p50={quantiles[49] * 1000:7.1f} ms  p99={quantiles[98] * 1000:7.1f} ms  "
+            f"wait={waited * 1000:6.1f} ms  exec={executed * 1000:6.1f} ms  errors={len(errors)}"
+        )
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, nargs="*", default=[4, 16, 40, 80])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--db-delay-ms", type=float, default=2.0)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=50)
+    args = parser.parse_args()
+
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.ADMISSION_ENABLED = False
+    settings.LOGIN_THROTTLE_ENABLED = False
+    settings.PURGE_ENABLED = False
+    settings.ARCHIVE_ENABLED = False
+    settings.TOKEN_SWEEP_ENABLED = False
+    settings.REVOCATION_SYNC_ENABLED = False
+
+    print(f"clients={args.clients} duration={args.duration}s db_delay={args.db_delay_ms} ms")
+    for threads in args.threads:
+        run(threads, args)
+
+
+if __name__ == "__main__":
+    main()
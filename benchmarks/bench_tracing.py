@@ -0,0 +1,112 @@
+"""
+Накладные расходы трассировки (app/tracing.py) на смеси запросов.
+
+Варианты: трассировка выключена, включена с TRACE_SAMPLE_RATIO по
+умолчанию и с записью каждого запроса (ratio=1). Запросы идут
+последовательно через TestClient, варианты чередуются по раундам, чтобы
+дрейф машины делился между ними поровну; печатается медиана средних по
+раундам и прирост относительно выключенной трассировки. Буфер спанов
+выгружается в файл во временном каталоге после каждого раунда.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_tracing [--rounds 15] [--requests 200]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth import create_access_token
+from app.config import settings
+from app.database import Base, get_db
+from app.main import app
+from app.models import User, Project, Task
+from app.tracing import SpanExporter, sampler
+
+DEFAULT_RATIO = settings.TRACE_SAMPLE_RATIO
+VARIANTS = [
+    ("off", False, 0.0),
+    (f"ratio={DEFAULT_RATIO}", True, DEFAULT_RATIO),
+    ("ratio=1", True, 1.0),
+]
+
+
+def seed(Session):
+    with Session() as session:
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        session.add(user)
+        session.flush()
+        project = Project(name="Bench", owner_id=user.id)
+        session.add(project)
+        session.flush()
+        session.add_all([Task(title=f"Task {i}", project_id=project.id) for i in range(50)])
+        session.commit()
+        return user.id, project.id
+
+
+def run_round(client, headers, project_id, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        if i % 4 == 3:
+            client.put(f"/api/v1/projects/{project_id}", json={"description": f"v{i}"}, headers=headers)
+        elif i % 2:
+            client.get(f"/api/v1/projects/{project_id}", headers=headers)
+        else:
+            client.get(f"/api/v1/projects/{project_id}/tasks", headers=headers)
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    # Измеряется обработка запроса, а не попадания в кэш и фоновые задачи
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.LOGIN_THROTTLE_ENABLED = False
+    settings.TRACE_MAX_TRACES_PER_SECOND = 1e9
+    settings.TRACE_EXPORT_INTERVAL_SECONDS = 3600
+    for name in ("PURGE_ENABLED", "ARCHIVE_ENABLED", "TOKEN_SWEEP_ENABLED", "REVOCATION_SYNC_ENABLED"):
+        setattr(settings, name, False)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    user_id, project_id = seed(Session)
+
+    def override_get_db():
+        with Session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    exporter = SpanExporter()
+    timings = {name: [] for name, _, _ in VARIANTS}
+
+    with tempfile.TemporaryDirectory() as directory, TestClient(app) as client:
+        settings.TRACE_EXPORT_PATH = os.path.join(directory, "traces.jsonl")
+        run_round(client, headers, project_id, args.requests)
+        for _ in range(args.rounds):
+            for name, enabled, ratio in VARIANTS:
+                settings.TRACE_ENABLED = enabled
+                settings.TRACE_SAMPLE_RATIO = ratio
+                sampler.reset()
+                timings[name].append(run_round(client, headers, project_id, args.requests))
+                exporter.run_once()
+
+    baseline = statistics.median(timings["off"])
+    print(f"rounds={args.rounds} requests={args.requests}")
+    for name, values in timings.items():
+        median = statistics.median(values)
+        print(f"{name:<12} {median * 1e6:8.1f} us/request  {(median / baseline - 1) * 100:+6.2f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Нагрузочный прогон смеси эндпоинтов по БД, засеянной benchmarks/seed.py.
+
+Клиентские потоки в течение --duration секунд шлют запросы по смеси
+(--mix: встроенная или JSON файл со списком [доля, метод, путь]). Задачи
+выбираются случайно из засеянных, запросы идут от имени владельца проекта
+задачи. Без --base-url приложение запускается в процессе поверх указанной
+БД, и для каждого маршрута считается число SQL запросов; с --base-url
+запросы уходят на запущенный сервер (токены подписываются локальным
+SECRET_KEY, он должен совпадать с серверным).
+
+Результат - JSON по маршрутам: число запросов и ошибок, p50/p95/p99 в мс,
+запросы в секунду и SQL запросы на запрос (среднее и максимум), плюс итог.
+
+Запуск из корня репозитория:
+    python -m benchmarks.seed sqlite:///loadtest.db
+    python -m benchmarks.load_test sqlite:///loadtest.db [--clients 32] [--duration 30]
+        [--mix mix.json] [--base-url http://localhost:8000] [--json report.json]
+"""
+import argparse
+import contextvars
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_access_token
+from app.database import pool_options
+
+# (доля, метод, путь); {project} и {task} подставляются из засеянных данных
+MIX = [
+    (25, "GET", "/api/v1/projects/{project}/tasks"),
+    (10, "GET", "/api/v1/projects/{project}/stats"),
+    (10, "GET", "/api/v1/projects/{project}/board"),
+    (15, "GET", "/api/v1/tasks/{task}/comments"),
+    (5, "GET", "/api/v1/tasks/{task}/comments/thread"),
+    (10, "GET", "/api/v1/users/me/tasks"),
+    (10, "POST", "/api/v1/projects/{project}/tasks"),
+    (10, "PUT", "/api/v1/tasks/{task}"),
+    (5, "POST", "/api/v1/tasks/{task}/comments"),
+]
+
+BODIES = {
+    "/api/v1/projects/{project}/tasks": {"title": "Load test task"},
+    "/api/v1/tasks/{task}": {"title": "Load test update"},
+    "/api/v1/tasks/{task}/comments": {"content": "Load test comment"},
+}
+
+query_counter: contextvars.ContextVar = contextvars.ContextVar("load_test_queries")
+
+
+class QueryCounting:
+    """ASGI обёртка: число SQL запросов обработчика в заголовке X-Query-Count"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # Изменяемый счётчик: контекст копируется в потоки обработчиков
+        counter = [0]
+        query_counter.set(counter)
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-query-count", str(counter[0]).encode())]
+            await send(message)
+
+        await self.app(scope, receive, counting_send)
+
+
+def count_queries(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def increment(conn, cursor, statement, parameters, context, executemany):
+        counter = query_counter.get(None)
+        if counter is not None:
+            counter[0] += 1
+
+
+def load_mix(path) -> List[Tuple[float, str, str]]:
+    if path is None:
+        return MIX
+    with open(path, encoding="utf-8") as source:
+        return [(float(weight), method.upper(), route) for weight, method, route in json.load(source)]
+
+
+def sample_targets(engine, size: int) -> List[Tuple[int, int, int]]:
+    """Случайные (владелец, проект, задача) из засеянной БД"""
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT projects.owner_id, tasks.project_id, tasks.id FROM tasks "
+            "JOIN projects ON projects.id = tasks.project_id "
+            "WHERE tasks.id IN (SELECT id FROM tasks ORDER BY random() LIMIT :size)"
+        ), {"size": size}).all()
+    if not rows:
+        raise SystemExit("В БД нет задач: сначала запустите python -m benchmarks.seed")
+    return [tuple(row) for row in rows]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self.errors: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, seconds: float, status_code: int, queries) -> None:
+        with self.lock:
+            self.latencies[route].append(seconds)
+            if queries is not None:
+                self.queries[route].append(int(queries))
+            if status_code >= 400:
+                self.errors[route][status_code] += 1
+
+    def report(self, duration: float) -> Dict:
+        routes = {}
+        for route in sorted(self.latencies):
+            routes[route] = summarize(self.latencies[route], self.queries.get(route), self.errors.get(route, {}), duration)
+        every = [value for values in self.latencies.values() for value in values]
+        queries = [value for values in self.queries.values() for value in values]
+        errors = defaultdict(int)
+        for codes in self.errors.values():
+            for code, count in codes.items():
+                errors[code] += count
+        return {"duration_seconds": duration, "routes": routes, "total": summarize(every, queries, errors, duration)}
+
+
+def summarize(latencies: List[float], queries, errors: Dict[int, int], duration: float) -> Dict:
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    result = {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_codes": {str(code): count for code, count in sorted(errors.items())},
+        "rps": round(len(latencies) / duration, 2),
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p95_ms": round(quantiles[94] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+    }
+    if queries:
+        result["queries_mean"] = round(statistics.fmean(queries), 2)
+        result["queries_max"] = max(queries)
+    return result
+
+
+def client_loop(client, mix, targets, tokens, deadline, seed_value, recorder):
+    rng = random.Random(seed_value)
+    weights = [weight for weight, _, _ in mix]
+    while time.perf_counter() < deadline:
+        _, method, route = rng.choices(mix, weights)[0]
+        owner_id, project_id, task_id = rng.choice(targets)
+        url = route.format(project=project_id, task=task_id)
+        started = time.perf_counter()
+        response = client.request(
+            method, url, json=BODIES.get(route) if method in ("POST", "PUT") else None,
+            headers={"Authorization": f"Bearer {tokens[owner_id]}"}
+        )
+        recorder.record(f"{method} {route}", time.perf_counter() - started,
+                        response.status_code, response.headers.get("x-query-count"))
+
+
+def run(args) -> Dict:
+    mix = load_mix(args.mix)
+    engine = create_engine(args.database, **pool_options(args.database))
+    targets = sample_targets(engine, args.sample)
+    tokens = {owner_id: create_access_token(owner_id) for owner_id in {target[0] for target in targets}}
+    recorder = Recorder()
+
+    if args.base_url:
+        import httpx
+
+        client = httpx.Client(base_url=args.base_url, timeout=30, limits=httpx.Limits(max_connections=args.clients))
+    else:
+        from fastapi.testclient import TestClient
+
+        from app.config import settings
+        from app.database import get_db
+        from app.main import app
+
+        if args.no_cache:
+            settings.RESPONSE_CACHE_ENABLED = False
+        # Фоновые задачи работали бы с БД приложения, а не с засеянной
+        settings.PURGE_ENABLED = False
+        settings.ARCHIVE_ENABLED = False
+        settings.TOKEN_SWEEP_ENABLED = False
+        settings.REVOCATION_SYNC_ENABLED = False
+        count_queries(engine)
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            with Session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(QueryCounting(app))
+
+    with client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        workers = [
+            threading.Thread(target=client_loop, args=(client, mix, targets, tokens, deadline, args.seed + i, recorder))
+            for i in range(args.clients)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    return recorder.report(round(elapsed, 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("database", help="URL засеянной БД, например sqlite:///loadtest.db")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", help="JSON файл со списком [доля, метод, путь]")
+    parser.add_argument("--base-url", help="адрес запущенного сервера; без него приложение запускается в процессе")
+    parser.add_argument("--sample", type=int, default=10_000, help="сколько задач выбрать из БД для запросов")
+    parser.add_argument("--no-cache", action="store_true", help="выключить кэш ответов (только в процессе)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="файл для отчёта; по умолчанию stdout")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Синтетические данные для нагрузочных тестов: пользователи, проекты,
+участники, задачи, теги и комментарии с неравномерным распределением.
+
+Число задач на проект и комментариев на задачу распределено по Парето:
+большинство проектов небольшие, несколько - очень крупные. Популярность
+пользователей (участие, назначения, авторство) смещена к меньшим id.
+Строки вставляются пачками через executemany драйвера с явными id; значения
+дат и перечислений преобразуются типами колонок один раз на значение, а
+даты берутся из заранее созданного набора. На время загрузки SQLite
+работает без журнала и fsync. Схема создаётся по моделям и
+помечается последней ревизией alembic, чтобы /ready считал БД актуальной.
+
+У всех пользователей один пароль (--password), хэш считается один раз.
+
+Запуск из корня репозитория:
+    python -m benchmarks.seed sqlite:///loadtest.db [--users 100000] [--projects 20000]
+        [--tasks-per-project 50] [--comments-per-task 4] [--tags 200] [--skew 1.5] [--seed 1]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+from app.models import (
+    User, Project, ProjectMember, Task, Tag, Comment, task_tags,
+    TaskStatus, TaskPriority, ProjectRole
+)
+from app.passwords import get_password_hash
+from app.readiness import migration_heads
+
+CHUNK_SIZE = 20_000
+
+STATUSES = [TaskStatus.TODO, TaskStatus.IN_PROGRESS, TaskStatus.REVIEW, TaskStatus.DONE]
+STATUS_WEIGHTS = [35, 20, 10, 35]
+PRIORITIES = [TaskPriority.LOW, TaskPriority.MEDIUM, TaskPriority.HIGH, TaskPriority.URGENT]
+PRIORITY_WEIGHTS = [25, 45, 22, 8]
+
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        # Участники проектов: project_id -> [user_id]; нужны для назначений и авторов
+        self.members: Dict[int, List[int]] = {}
+        self.task_projects: List[int] = []
+
+    def popular_user(self) -> int:
+        # Степенное смещение: малые id встречаются намного чаще
+        return 1 + int(self.args.users * self.rng.random() ** self.args.skew * 0.999999)
+
+    def heavy_tail(self, mean: float) -> int:
+        # Парето с xm=1 имеет среднее alpha/(alpha-1); масштабируем к заданному
+        alpha = 1.16
+        return int(mean * self.rng.paretovariate(alpha) * (alpha - 1) / alpha)
+
+    def past(self, days: int) -> datetime:
+        # Конечный набор моментов: преобразование в формат БД кэшируется в insert
+        return self.now - timedelta(minutes=self.rng.randrange(days * 1440) // 60 * 60)
+
+    def users(self, password_hash: str) -> Iterator[dict]:
+        for user_id in range(1, self.args.users + 1):
+            yield dict(
+                id=user_id, email=f"user{user_id}@example.com", username=f"user{user_id}",
+                hashed_password=password_hash, full_name=f"User {user_id}", is_active=True,
+                is_admin=False, membership_epoch=0, created_at=self.past(730)
+            )
+
+    def projects(self) -> Iterator[dict]:
+        for project_id in range(1, self.args.projects + 1):
+            owner_id = self.popular_user()
+            self.members[project_id] = [owner_id]
+            yield dict(
+                id=project_id, name=f"Project {project_id}", description="Synthetic project",
+                owner_id=owner_id, is_active=True, version=1, created_at=self.past(365)
+            )
+
+    def project_members(self) -> Iterator[dict]:
+        member_id = 0
+        for project_id, members in self.members.items():
+            count = min(self.heavy_tail(self.args.members_per_project), self.args.users - 1, 500)
+            seen = set(members)
+            for _ in range(count):
+                user_id = self.popular_user()
+                if user_id in seen:
+                    continue
+                seen.add(user_id)
+                members.append(user_id)
+                member_id += 1
+                yield dict(
+                    id=member_id, project_id=project_id, user_id=user_id,
+                    role=ProjectRole.MEMBER, joined_at=self.past(365)
+                )
+
+    def tasks(self) -> Iterator[dict]:
+        task_id = 0
+        for project_id, members in self.members.items():
+            for _ in range(self.heavy_tail(self.args.tasks_per_project)):
+                task_id += 1
+                self.task_projects.append(project_id)
+                created_at = self.past(365)
+                yield dict(
+                    id=task_id, title=f"Task {task_id}", description="Synthetic task",
+                    project_id=project_id,
+                    assignee_id=self.rng.choice(members) if self.rng.random() < 0.8 else None,
+                    status=self.rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                    priority=self.rng.choices(PRIORITIES, PRIORITY_WEIGHTS)[0],
+                    due_date=created_at + timedelta(days=self.rng.randrange(1, 90)) if self.rng.random() < 0.6 else None,
+                    created_at=created_at, updated_at=created_at
+                )
+
+    def tags(self) -> Iterator[dict]:
+        for tag_id in range(1, self.args.tags + 1):
+            yield dict(id=tag_id, name=f"tag-{tag_id}", color="#808080", created_at=self.past(365))
+
+    def task_tags(self) -> Iterator[dict]:
+        for task_id in range(1, len(self.task_projects) + 1):
+            tag_ids = {
+                1 + int(self.args.tags * self.rng.random() ** self.args.skew * 0.999999)
+                for _ in range(self.rng.choices([0, 1, 2, 3], [40, 35, 17, 8])[0])
+            }
+            for tag_id in tag_ids:
+                yield dict(task_id=task_id, tag_id=tag_id)
+
+    def comments(self) -> Iterator[dict]:
+        comment_id = 0
+        for task_id, project_id in enumerate(self.task_projects, start=1):
+            members = self.members[project_id]
+            for _ in range(self.heavy_tail(self.args.comments_per_task)):
+                comment_id += 1
+                yield dict(
+                    id=comment_id, content=f"Comment {comment_id}", task_id=task_id,
+                    author_id=self.rng.choice(members), created_at=self.past(365)
+                )
+
+
+def fast_sqlite(engine: Engine) -> None:
+    @event.listens_for(engine, "connect")
+    def pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # Только на время загрузки: при сбое файл придётся пересоздать
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-262144")
+        cursor.close()
+
+
+def insert(engine: Engine, table, rows: Iterator[dict]) -> int:
+    total = 0
+    with engine.begin() as connection:
+        dialect = connection.dialect
+        placeholder = "?" if dialect.paramstyle == "qmark" else "%s"
+        cursor = connection.connection.cursor()
+        columns = converters = sql = None
+        chunk = []
+
+        def flush():
+            cursor.executemany(sql, [
+                tuple(row[name] if convert is None else convert(row[name]) for name, convert in converters)
+                for row in chunk
+            ])
+
+        for row in rows:
+            if columns is None:
+                columns = list(row)
+                converters = [(name, bind_converter(table.c[name], dialect)) for name in columns]
+                sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})"
+            chunk.append(row)
+            if len(chunk) == CHUNK_SIZE:
+                flush()
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            flush()
+            total += len(chunk)
+    return total
+
+
+def bind_converter(column, dialect):
+    """Преобразование значения в формат драйвера по типу колонки, с кэшем по значению"""
+    processor = column.type.dialect_impl(dialect).bind_processor(dialect)
+    if processor is None:
+        return None
+    cache = {}
+
+    def convert(value):
+        try:
+            return cache[value]
+        except KeyError:
+            converted = cache[value] = processor(value)
+            return converted
+
+    return convert
+
+
+def seed(args) -> Dict[str, int]:
+    engine = create_engine(args.database)
+    if engine.dialect.name == "sqlite":
+        fast_sqlite(engine)
+    Base.metadata.create_all(engine)
+
+    generator = Generator(args)
+    password_hash = get_password_hash(args.password)
+    steps = [
+        ("users", User.__table__, generator.users(password_hash)),
+        ("projects", Project.__table__, generator.projects()),
+        ("project_members", ProjectMember.__table__, generator.project_members()),
+        ("tasks", Task.__table__, generator.tasks()),
+        ("tags", Tag.__table__, generator.tags()),
+        ("task_tags", task_tags, generator.task_tags()),
+        ("comments", Comment.__table__, generator.comments()),
+    ]
+
+    counts = {}
+    for name, table, rows in steps:
+        started = time.perf_counter()
+        counts[name] = insert(engine, table, rows)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<16} {counts[name]:>10} rows  {elapsed:7.1f} s  {counts[name] / max(elapsed, 1e-9):>10.0f} rows/s")
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        connection.execute(text("DELETE FROM alembic_version"))
+        for head in migration_heads() or ():
+            connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+        if engine.dialect.name == "sqlite":
+            connection.execute(text("ANALYZE"))
+    engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("database", help="URL БД, например sqlite:///loadtest.db")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=20_000)
+    parser.add_argument("--members-per-project", type=float, default=5)
+    parser.add_argument("--tasks-per-project", type=float, default=50)
+    parser.add_argument("--comments-per-task", type=float, default=4)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--skew", type=float, default=1.5, help="степень смещения популярности к малым id (1 - равномерно)")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = seed(args)
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - started
+    print(f"{'total':<16} {total:>10} rows  {elapsed:7.1f} s  {total / elapsed:>10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,19 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.config import settings
 from app.main import app
 from app.database import Base, get_db
 from app.models import User
 from app.auth import get_password_hash, create_access_token
 
 
+# Очистка токенов работает с SessionLocal, то есть с основной БД, а не с
+# тестовой; её поведение проверяется вызовом run_once с тестовой сессией.
+# Синхронизация отзывов читает ту же БД, что и обработчики, и остаётся включённой
+settings.TOKEN_SWEEP_ENABLED = False
+
+
 # Создаем тестовую базу данных в памяти
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
@@ -45,6 +52,25 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кэши уровня процесса не должны переживать пересоздание тестовой БД"""
+    from app.response_cache import response_cache
+    from app.revocation import revocation_list
+    from app.api_keys import api_key_cache
+    from app.ratelimit import login_throttle
+    from app.admission import db_latency
+    from app.tracing import sampler, span_buffer
+    response_cache.clear()
+    revocation_list.clear()
+    api_key_cache.clear()
+    login_throttle.backend.clear()
+    db_latency.reset()
+    sampler.reset()
+    span_buffer.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Фикстура для создания тестового клиента"""
@@ -0,0 +1,92 @@
+"""
+Интеграционные тесты для административных эндпоинтов (app/routers/admin.py)
+"""
+import pytest
+
+from app.config import settings
+from app.models import User, Project
+from app.passwords import verify_password
+
+
+@pytest.fixture
+def admin_client(authorized_client, test_user, db_session, monkeypatch):
+    test_user.is_admin = True
+    db_session.commit()
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    return authorized_client
+
+
+def make_rows(count, start=0):
+    return [
+        {"email": f"user{i}@example.com", "username": f"user{i}", "password": f"password{i}"}
+        for i in range(start, start + count)
+    ]
+
+
+class TestBulkCreateUsers:
+    """Тесты массового создания пользователей"""
+    
+    def test_bulk_create(self, admin_client, db_session):
+        """Тест: пачка создаётся целиком, пароли хэшируются в пуле процессов"""
+        response = admin_client.post("/api/v1/admin/users/bulk", json={"users": make_rows(20)})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 20 and data["failed"] == 0
+        assert [result["index"] for result in data["results"]] == list(range(20))
+        assert data["results"][3]["user"]["username"] == "user3"
+        
+        user = db_session.query(User).filter(User.username == "user7").one()
+        assert user.hashed_password.startswith("$2b$04$")
+        assert verify_password("password7", user.hashed_password)
+    
+    def test_bulk_conflicts_reported_per_row(self, admin_client, test_user):
+        """Тест: конфликты с существующими и повторы внутри пачки - по строкам"""
+        rows = make_rows(3)
+        rows.append({"email": test_user.email, "username": "fresh", "password": "password"})
+        rows.append({"email": "other@example.com", "username": "user1", "password": "password"})
+        
+        response = admin_client.post("/api/v1/admin/users/bulk", json={"users": rows})
+        
+        data = response.json()
+        assert data["created"] == 3 and data["failed"] == 2
+        assert data["results"][3] == {
+            "index": 3, "created": False, "user": None, "detail": "Email уже зарегистрирован"
+        }
+        assert data["results"][4]["detail"] == "Имя пользователя уже занято"
+    
+    def test_bulk_invalid_row(self, admin_client):
+        """Тест: невалидная строка отклоняет запрос с указанием позиции"""
+        rows = make_rows(2)
+        rows[1]["email"] = "not-an-email"
+        
+        response = admin_client.post("/api/v1/admin/users/bulk", json={"users": rows})
+        
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][:3] == ["body", "users", 1]
+    
+    def test_bulk_requires_admin(self, authorized_client):
+        """Тест: обычный пользователь не может создавать пользователей"""
+        response = authorized_client.post("/api/v1/admin/users/bulk", json={"users": make_rows(1)})
+        
+        assert response.status_code == 403
+    
+    def test_bulk_rejects_project_scoped_key(self, admin_client, client, db_session, test_user):
+        """Тест: ключ администратора, ограниченный проектами, не даёт админских прав"""
+        project = Project(name="Project", owner_id=test_user.id)
+        db_session.add(project)
+        db_session.commit()
+        scoped = admin_client.post("/api/v1/users/me/api-keys", json={"name": "ci", "project_ids": [project.id]})
+        unscoped = admin_client.post("/api/v1/users/me/api-keys", json={"name": "ops"})
+        
+        response = client.post(
+            "/api/v1/admin/users/bulk", json={"users": make_rows(1)},
+            headers={"Authorization": f"Bearer {scoped.json()['key']}"}
+        )
+        assert response.status_code == 403
+        
+        response = client.post(
+            "/api/v1/admin/users/bulk", json={"users": make_rows(1)},
+            headers={"Authorization": f"Bearer {unscoped.json()['key']}"}
+        )
+        assert response.status_code == 200
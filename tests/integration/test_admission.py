@@ -0,0 +1,64 @@
+"""
+Интеграционные тесты для допуска запросов (app/admission.py)
+"""
+import pytest
+
+from app.admission import admission_control, db_latency
+from app.config import settings
+from app.models import Project
+
+
+@pytest.fixture
+def test_project(db_session, test_user):
+    project = Project(name="Admission Project", owner_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+
+@pytest.fixture
+def reports_full(monkeypatch):
+    """Единственное место группы reports занято"""
+    monkeypatch.setattr(settings, "ROUTE_CONCURRENCY", {**settings.ROUTE_CONCURRENCY, "reports": 1})
+    monkeypatch.setattr(settings, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 0.05)
+    limiter = admission_control.limiter("reports")
+    limiter.active += 1
+    yield limiter
+    limiter.active -= 1
+
+
+class TestAdmission:
+    """Тесты ограничения одновременных запросов"""
+    
+    def test_full_group_sheds_with_retry_after(self, authorized_client, test_project, reports_full):
+        """Тест: запрос в занятую группу получает 503 с Retry-After"""
+        response = authorized_client.get(f"/api/v1/projects/{test_project.id}/stats")
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    
+    def test_other_groups_unaffected(self, authorized_client, test_project, reports_full):
+        """Тест: занятая группа отчётов не мешает записи задач"""
+        response = authorized_client.post(
+            f"/api/v1/projects/{test_project.id}/tasks", json={"title": "Write"}
+        )
+        
+        assert response.status_code == 201
+        assert admission_control.limiter("writes").active == 0
+    
+    def test_health_not_limited(self, client, reports_full):
+        """Тест: /health отвечает и сообщает о загрузке групп"""
+        response = client.get("/health")
+        
+        assert response.status_code == 200
+        assert response.json()["groups"]["reports"]["active"] == 1
+    
+    def test_health_reports_slow_db(self, client):
+        """Тест: при медленной БД /health сообщает о перегрузке"""
+        assert client.get("/health").json()["status"] == "healthy"
+        
+        db_latency.observe(10.0)
+        data = client.get("/health").json()
+        
+        assert data["status"] == "saturated"
+        assert data["admission_factor"] == settings.DB_LATENCY_MIN_ADMISSION
@@ -0,0 +1,182 @@
+"""
+Интеграционные тесты для архивации завершённых задач (app/archive.py, app/routers/archive.py)
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from app.archive import TaskArchiver
+from app.models import Project, Task, TaskStatus, Comment, Tag, ArchivedTask, ArchivedComment
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def project_with_done_tasks(db_session, test_user):
+    """Проект со старой и свежей завершёнными задачами и незавершённой задачей"""
+    project = Project(name="Project", owner_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    
+    old = datetime.utcnow() - timedelta(days=120)
+    old_done = Task(title="Old done", project_id=project.id, status=TaskStatus.DONE,
+                    created_at=old, updated_at=old)
+    old_done.tags.append(Tag(name="release"))
+    db_session.add_all([
+        old_done,
+        Task(title="Fresh done", project_id=project.id, status=TaskStatus.DONE),
+        Task(title="Old todo", project_id=project.id, created_at=old),
+    ])
+    db_session.commit()
+    db_session.add_all([
+        Comment(content=f"Comment {i}", task_id=old_done.id, author_id=test_user.id)
+        for i in range(3)
+    ])
+    db_session.commit()
+    return project, old_done.id
+
+
+@pytest.fixture
+def archiver():
+    return TaskArchiver(session_factory=TestingSessionLocal, after_days=90, batch_size=10, max_run_seconds=5)
+
+
+class TestTaskArchiver:
+    """Тесты переноса задач в архив"""
+    
+    def test_archives_only_old_done_tasks(self, db_session, project_with_done_tasks, archiver):
+        """Тест: в архив уходят только завершённые задачи старше срока"""
+        _, task_id = project_with_done_tasks
+        
+        assert archiver.run_once() == 1
+        
+        db_session.expire_all()
+        assert {task.title for task in db_session.query(Task).all()} == {"Fresh done", "Old todo"}
+        archived = db_session.get(ArchivedTask, task_id)
+        assert archived.title == "Old done"
+        assert [tag.name for tag in archived.tags] == ["release"]
+        assert db_session.query(ArchivedComment).count() == 3
+        assert db_session.query(Comment).count() == 0
+    
+    def test_skips_task_with_archived_id(self, db_session, project_with_done_tasks, archiver):
+        """Тест: задача с уже занятым в архиве id не прерывает архивацию"""
+        project, task_id = project_with_done_tasks
+        archiver.run_once()
+        old = datetime.utcnow() - timedelta(days=120)
+        db_session.add_all([
+            Task(id=task_id, title="Reused id", project_id=project.id, status=TaskStatus.DONE,
+                 created_at=old, updated_at=old),
+            Task(title="Another old done", project_id=project.id, status=TaskStatus.DONE,
+                 created_at=old, updated_at=old),
+        ])
+        db_session.commit()
+        
+        assert archiver.run_once() == 1
+        
+        db_session.expire_all()
+        assert db_session.get(Task, task_id).title == "Reused id"
+        assert db_session.get(ArchivedTask, task_id).title == "Old done"
+    
+    def test_archive_bumps_project_version(self, db_session, project_with_done_tasks, archiver):
+        """Тест: архивация меняет версию проекта"""
+        project, _ = project_with_done_tasks
+        version = project.version
+        
+        archiver.run_once()
+        
+        db_session.expire_all()
+        assert db_session.get(Project, project.id).version == version + 1
+
+
+class TestArchiveEndpoints:
+    """Тесты эндпоинтов архива"""
+    
+    def test_list_archived_tasks(self, authorized_client, project_with_done_tasks, archiver):
+        """Тест: список архивных задач проекта"""
+        project, task_id = project_with_done_tasks
+        archiver.run_once()
+        
+        response = authorized_client.get(f"/api/v1/projects/{project.id}/archive/tasks")
+        
+        assert response.status_code == 200
+        assert [task["id"] for task in response.json()] == [task_id]
+        assert "archived_at" in response.json()[0]
+    
+    def test_get_archived_task_and_comments(self, authorized_client, project_with_done_tasks, archiver):
+        """Тест: архивная задача и её комментарии доступны только для чтения"""
+        _, task_id = project_with_done_tasks
+        archiver.run_once()
+        
+        response = authorized_client.get(f"/api/v1/archive/tasks/{task_id}")
+        assert response.status_code == 200
+        assert response.json()["tags"][0]["name"] == "release"
+        
+        response = authorized_client.get(f"/api/v1/archive/tasks/{task_id}/comments")
+        assert [c["content"] for c in response.json()] == ["Comment 0", "Comment 1", "Comment 2"]
+    
+    def test_restore_archived_task(self, authorized_client, db_session, project_with_done_tasks, archiver):
+        """Тест: возврат задачи из архива со всеми данными"""
+        _, task_id = project_with_done_tasks
+        archiver.run_once()
+        
+        response = authorized_client.post(f"/api/v1/archive/tasks/{task_id}/restore")
+        
+        assert response.status_code == 200
+        assert response.json()["id"] == task_id
+        assert response.json()["tags"][0]["name"] == "release"
+        assert db_session.query(ArchivedTask).count() == 0
+        assert db_session.query(Comment).filter(Comment.task_id == task_id).count() == 3
+    
+    def test_restore_after_new_task_created(self, authorized_client, db_session, test_user, archiver):
+        """Тест: id задачи в архиве не выдаётся новой задаче, восстановление проходит"""
+        project = Project(name="Project", owner_id=test_user.id)
+        db_session.add(project)
+        db_session.commit()
+        old = datetime.utcnow() - timedelta(days=120)
+        task = Task(title="Old done", project_id=project.id, status=TaskStatus.DONE, created_at=old, updated_at=old)
+        db_session.add(task)
+        db_session.commit()
+        task_id = task.id
+        archiver.run_once()
+        
+        response = authorized_client.post(f"/api/v1/projects/{project.id}/tasks", json={"title": "New"})
+        assert response.status_code == 201
+        assert response.json()["id"] > task_id
+        
+        response = authorized_client.post(f"/api/v1/archive/tasks/{task_id}/restore")
+        assert response.status_code == 200
+        assert response.json()["title"] == "Old done"
+    
+    def test_restore_conflict(self, authorized_client, db_session, project_with_done_tasks, archiver):
+        """Тест: занятый id при восстановлении даёт 409, архив не меняется"""
+        project, task_id = project_with_done_tasks
+        archiver.run_once()
+        # Строка с тем же id, как в БД до перехода на AUTOINCREMENT
+        db_session.add(Task(id=task_id, title="Reused id", project_id=project.id))
+        db_session.commit()
+        
+        response = authorized_client.post(f"/api/v1/archive/tasks/{task_id}/restore")
+        
+        assert response.status_code == 409
+        assert db_session.query(ArchivedTask).filter(ArchivedTask.id == task_id).count() == 1
+        assert db_session.query(ArchivedComment).count() == 3
+    
+    def test_archived_task_not_found(self, authorized_client):
+        """Тест: задачи нет в архиве"""
+        response = authorized_client.get("/api/v1/archive/tasks/999")
+        
+        assert response.status_code == 404
+    
+    def test_archived_task_no_access(self, authorized_client, db_session, second_user, archiver):
+        """Тест: нет доступа к архиву чужого проекта"""
+        project = Project(name="Other", owner_id=second_user.id)
+        db_session.add(project)
+        db_session.commit()
+        old = datetime.utcnow() - timedelta(days=120)
+        task = Task(title="Old", project_id=project.id, status=TaskStatus.DONE, created_at=old, updated_at=old)
+        db_session.add(task)
+        db_session.commit()
+        task_id = task.id
+        archiver.run_once()
+        
+        response = authorized_client.get(f"/api/v1/archive/tasks/{task_id}")
+        
+        assert response.status_code == 403
@@ -2,6 +2,18 @@
 Интеграционные тесты для эндпоинтов аутентификации (app/routers/auth.py)
 """
 import pytest
+from datetime import datetime, timedelta
+
+from jose import jwt
+from sqlalchemy import event
+
+from app.auth import hash_token, create_access_token
+from app.config import settings
+from app.main import app, background_workers
+from app.models import RefreshToken, RevokedToken, Project, ProjectMember, ProjectRole
+from app.passwords import rehash_executor
+from tests.conftest import engine
+from app.revocation import revocation_list
 
 
 class TestRegister:
@@ -126,6 +138,78 @@ class TestLogin:
         assert "Пользователь неактивен" in response.json()["detail"]
 
 
+class TestPasswordRehash:
+    """Тесты перехэширования пароля при входе"""
+    
+    def wait_for_rehash(self):
+        rehash_executor.submit(lambda: None).result(timeout=10)
+    
+    def test_login_rehashes_outdated_password(self, client, test_user, db_session, monkeypatch):
+        """Тест: после входа пароль пересохраняется с новыми параметрами"""
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+        
+        response = client.post("/api/v1/auth/login", json={
+            "username": "testuser",
+            "password": "testpassword123"
+        })
+        assert response.status_code == 200
+        self.wait_for_rehash()
+        
+        db_session.refresh(test_user)
+        assert test_user.hashed_password.startswith("$2b$04$")
+        
+        response = client.post("/api/v1/auth/login", json={
+            "username": "testuser",
+            "password": "testpassword123"
+        })
+        assert response.status_code == 200
+    
+    def test_failed_login_does_not_rehash(self, client, test_user, db_session, monkeypatch):
+        """Тест: неверный пароль не запускает перехэширование"""
+        old_hash = test_user.hashed_password
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+        
+        client.post("/api/v1/auth/login", json={
+            "username": "testuser",
+            "password": "wrongpassword"
+        })
+        self.wait_for_rehash()
+        
+        db_session.refresh(test_user)
+        assert test_user.hashed_password == old_hash
+
+
+class TestLoginThrottle:
+    """Тесты ограничения попыток входа"""
+    
+    def test_username_throttled(self, client, test_user):
+        """Тест: после серии неудачных попыток вход блокируется до проверки пароля"""
+        for _ in range(settings.LOGIN_USERNAME_BURST):
+            response = client.post("/api/v1/auth/login", json={
+                "username": "testuser",
+                "password": "wrongpassword"
+            })
+            assert response.status_code == 401
+        
+        response = client.post("/api/v1/auth/login", json={
+            "username": "testuser",
+            "password": "testpassword123"
+        })
+        
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+    
+    def test_ip_throttled(self, client, monkeypatch):
+        """Тест: перебор разных имён с одного адреса упирается в лимит на IP"""
+        monkeypatch.setattr(settings, "LOGIN_IP_BURST", 3)
+        codes = [
+            client.post("/api/v1/auth/login", json={"username": f"user{i}", "password": "password"}).status_code
+            for i in range(4)
+        ]
+        
+        assert codes == [401, 401, 401, 429]
+
+
 class TestRefreshToken:
     """Тесты обновления токена"""
     
@@ -156,6 +240,219 @@ class TestRefreshToken:
         
         assert response.status_code == 401
 
+    def login(self, client):
+        response = client.post("/api/v1/auth/login", json={
+            "username": "testuser",
+            "password": "testpassword123"
+        })
+        return response.json()["refresh_token"]
+    
+    def test_refresh_token_stored_as_digest(self, client, test_user, db_session):
+        """Тест: в БД хранится только SHA-256 от токена"""
+        refresh_token = self.login(client)
+        
+        stored = db_session.query(RefreshToken).filter(RefreshToken.user_id == test_user.id).one()
+        assert stored.token_hash == hash_token(refresh_token)
+        assert len(stored.token_hash) == 32
+    
+    def test_refresh_token_rotation(self, client, test_user):
+        """Тест: новый refresh токен работает, старый больше не принимается"""
+        first = self.login(client)
+        second = client.post("/api/v1/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+        
+        assert second != first
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": second})
+        assert response.status_code == 200
+    
+    def test_refresh_token_reuse_revokes_family(self, client, test_user):
+        """Тест: повторное использование токена отзывает всю цепочку"""
+        first = self.login(client)
+        second = client.post("/api/v1/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+        
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+        assert response.status_code == 401
+        
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": second})
+        assert response.status_code == 401
+    
+    def test_refresh_token_multiple_devices(self, client, test_user):
+        """Тест: вход на втором устройстве не отзывает токен первого"""
+        first_device = self.login(client)
+        second_device = self.login(client)
+        
+        # Кража на одном устройстве не затрагивает другое
+        client.post("/api/v1/auth/refresh", json={"refresh_token": second_device})
+        client.post("/api/v1/auth/refresh", json={"refresh_token": second_device})
+        
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": first_device})
+        assert response.status_code == 200
+    
+    def test_refresh_token_expired(self, client, test_user, db_session):
+        """Тест: просроченный refresh токен отклоняется"""
+        refresh_token = self.login(client)
+        db_session.query(RefreshToken).update({RefreshToken.expires_at: datetime.utcnow() - timedelta(minutes=1)})
+        db_session.commit()
+        
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 401
+
+
+class TestLogout:
+    """Тесты выхода"""
+    
+    def login(self, client):
+        return client.post("/api/v1/auth/login", json={
+            "username": "testuser",
+            "password": "testpassword123"
+        }).json()
+    
+    def test_logout_revokes_access_token(self, client, test_user):
+        """Тест: после выхода access токен больше не принимается"""
+        tokens = self.login(client)
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        
+        response = client.post("/api/v1/auth/logout", headers=headers)
+        assert response.status_code == 204
+        
+        response = client.get("/api/v1/users/me", headers=headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Токен отозван"
+    
+    def test_logout_keeps_other_sessions(self, client, test_user):
+        """Тест: другие access токены пользователя продолжают работать"""
+        first = self.login(client)
+        second = self.login(client)
+        
+        client.post("/api/v1/auth/logout", headers={"Authorization": f"Bearer {first['access_token']}"})
+        
+        response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {second['access_token']}"})
+        assert response.status_code == 200
+    
+    def test_logout_revokes_refresh_token(self, client, test_user):
+        """Тест: переданный при выходе refresh токен отзывается"""
+        tokens = self.login(client)
+        
+        client.post(
+            "/api/v1/auth/logout",
+            json={"refresh_token": tokens["refresh_token"]},
+            headers={"Authorization": f"Bearer {tokens['access_token']}"}
+        )
+        
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == 401
+    
+    def test_revocation_survives_restart(self, client, test_user):
+        """Тест: отзыв читается из БД после сброса фильтра в памяти"""
+        tokens = self.login(client)
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        client.post("/api/v1/auth/logout", headers=headers)
+        
+        revocation_list.clear()
+        
+        response = client.get("/api/v1/users/me", headers=headers)
+        assert response.status_code == 401
+    
+    def test_sync_worker_reads_app_database(self, client, test_user, db_session):
+        """Тест: фоновая синхронизация видит отзывы из БД обработчиков"""
+        tokens = self.login(client)
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        claims = jwt.get_unverified_claims(tokens["access_token"])
+        db_session.add(RevokedToken(
+            jti=claims["jti"], user_id=test_user.id,
+            revoked_at=datetime.utcnow(), expires_at=datetime.utcnow() + timedelta(hours=1)
+        ))
+        db_session.commit()
+        worker = next(worker for worker in background_workers(app) if worker.name == "revocation-sync")
+        
+        worker.job()
+        
+        response = client.get("/api/v1/users/me", headers=headers)
+        assert response.status_code == 401
+    
+    def test_logout_unauthorized(self, client):
+        """Тест: выход без токена"""
+        response = client.post("/api/v1/auth/logout")
+        
+        assert response.status_code == 401
+
+
+class TestMembershipClaims:
+    """Тесты claims членства в access токене"""
+    
+    @pytest.fixture(autouse=True)
+    def enable_claims(self, monkeypatch):
+        monkeypatch.setattr(settings, "MEMBERSHIP_CLAIMS_ENABLED", True)
+    
+    @pytest.fixture
+    def shared_project(self, db_session, test_user, second_user):
+        project = Project(name="Shared", owner_id=second_user.id)
+        db_session.add(project)
+        db_session.commit()
+        db_session.add(ProjectMember(project_id=project.id, user_id=test_user.id, role=ProjectRole.MEMBER))
+        db_session.commit()
+        return project.id
+    
+    def login(self, client):
+        response = client.post("/api/v1/auth/login", json={
+            "username": "testuser",
+            "password": "testpassword123"
+        })
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    def count_member_queries(self, func):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response = func()
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return response, sum("FROM project_members" in statement for statement in statements)
+    
+    def test_token_contains_memberships(self, client, shared_project):
+        """Тест: access токен содержит проекты пользователя по ролям"""
+        headers = self.login(client)
+        payload = jwt.decode(headers["Authorization"][7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        
+        assert payload["mbr"] == {"e": 0, "r": {"member": [shared_project]}}
+    
+    def test_access_without_membership_query(self, client, shared_project):
+        """Тест: доступ к проекту подтверждается токеном без запроса к project_members"""
+        headers = self.login(client)
+        
+        response, member_queries = self.count_member_queries(
+            lambda: client.get(f"/api/v1/projects/{shared_project}/tasks", headers=headers)
+        )
+        
+        assert response.status_code == 200
+        assert member_queries == 0
+    
+    def test_removed_member_loses_access(self, client, shared_project, test_user, second_user):
+        """Тест: после удаления из проекта claims старого токена не принимаются"""
+        headers = self.login(client)
+        owner_token = create_access_token(second_user.id)
+        
+        response = client.delete(
+            f"/api/v1/projects/{shared_project}/members/{test_user.id}",
+            headers={"Authorization": f"Bearer {owner_token}"}
+        )
+        assert response.status_code == 204
+        
+        response = client.get(f"/api/v1/projects/{shared_project}/tasks", headers=headers)
+        assert response.status_code == 403
+    
+    def test_new_project_checked_in_db(self, client, test_user, second_user, db_session):
+        """Тест: проект, в который добавили после выдачи токена, доступен через БД"""
+        headers = self.login(client)
+        project = Project(name="Later", owner_id=second_user.id)
+        db_session.add(project)
+        db_session.commit()
+        db_session.add(ProjectMember(project_id=project.id, user_id=test_user.id))
+        db_session.commit()
+        
+        response = client.get(f"/api/v1/projects/{project.id}/tasks", headers=headers)
+        assert response.status_code == 200
+
 
 class TestGetCurrentUser:
     """Тесты получения текущего пользователя"""
@@ -0,0 +1,73 @@
+"""
+Интеграционные тесты для каскадного удаления на стороне БД (app/deletion.py)
+"""
+import pytest
+
+from app.deletion import hard_delete_task, hard_delete_project
+from app.models import Project, ProjectMember, Task, Comment, Tag, task_tags
+
+
+@pytest.fixture
+def project_tree(db_session, test_user, second_user):
+    """Проект второго пользователя с задачей, комментариями и тегом"""
+    project = Project(name="Project", owner_id=second_user.id)
+    db_session.add(project)
+    db_session.commit()
+    
+    task = Task(title="Task", project_id=project.id, assignee_id=test_user.id)
+    task.tags.append(Tag(name="backend"))
+    db_session.add_all([task, ProjectMember(project_id=project.id, user_id=test_user.id)])
+    db_session.commit()
+    
+    db_session.add_all([
+        Comment(content=f"Comment {i}", task_id=task.id, author_id=second_user.id)
+        for i in range(3)
+    ])
+    db_session.commit()
+    return project, task
+
+
+def count(db_session, model):
+    return db_session.query(model).count()
+
+
+class TestHardDelete:
+    """Тесты жёсткого удаления"""
+    
+    def test_delete_task_cascades(self, db_session, project_tree):
+        """Тест: удаление задачи удаляет комментарии и связи с тегами"""
+        _, task = project_tree
+        
+        assert hard_delete_task(db_session, task.id) == 1
+        db_session.commit()
+        
+        assert count(db_session, Comment) == 0
+        assert db_session.execute(task_tags.select()).all() == []
+        assert count(db_session, Tag) == 1
+    
+    def test_delete_project_cascades(self, db_session, project_tree):
+        """Тест: удаление проекта удаляет задачи, комментарии и участников"""
+        project, _ = project_tree
+        
+        hard_delete_project(db_session, project.id)
+        db_session.commit()
+        
+        assert count(db_session, Task) == 0
+        assert count(db_session, Comment) == 0
+        assert count(db_session, ProjectMember) == 0
+    
+    def test_delete_task_endpoint_cascades(self, authorized_client, db_session, test_user):
+        """Тест: эндпоинт удаления задачи удаляет и её комментарии"""
+        project = Project(name="Own", owner_id=test_user.id)
+        db_session.add(project)
+        db_session.commit()
+        task = Task(title="Task", project_id=project.id)
+        db_session.add(task)
+        db_session.commit()
+        db_session.add(Comment(content="Comment", task_id=task.id, author_id=test_user.id))
+        db_session.commit()
+        
+        response = authorized_client.delete(f"/api/v1/tasks/{task.id}")
+        
+        assert response.status_code == 204
+        assert count(db_session, Comment) == 0
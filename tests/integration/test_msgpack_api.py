@@ -0,0 +1,130 @@
+"""
+Интеграционные тесты для согласования формата MessagePack (app/negotiation.py)
+"""
+import pytest
+
+from app.models import Project
+from app.negotiation import accepts_msgpack
+
+msgpack = pytest.importorskip("msgpack")
+
+MSGPACK = "application/msgpack"
+
+
+@pytest.fixture
+def test_project(db_session, test_user):
+    """Фикстура для создания тестового проекта"""
+    project = Project(name="Test Project", owner_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    db_session.refresh(project)
+    return project
+
+
+class TestAcceptHeader:
+    """Тесты разбора заголовка Accept"""
+    
+    def test_empty_accept(self):
+        """Тест: без Accept используется JSON"""
+        assert accepts_msgpack("") is False
+    
+    def test_msgpack_accept(self):
+        """Тест: явный запрос MessagePack"""
+        assert accepts_msgpack("application/msgpack") is True
+        assert accepts_msgpack("application/x-msgpack") is True
+    
+    def test_json_preferred_by_quality(self):
+        """Тест: JSON с большим q имеет приоритет"""
+        assert accepts_msgpack("application/msgpack;q=0.5, application/json") is False
+        assert accepts_msgpack("application/json;q=0.5, application/msgpack") is True
+    
+    def test_wildcard_only(self):
+        """Тест: */* не включает MessagePack"""
+        assert accepts_msgpack("*/*") is False
+
+
+class TestMsgPackNegotiation:
+    """Тесты запросов и ответов в MessagePack"""
+    
+    def test_json_is_default(self, authorized_client, test_project):
+        """Тест: без Accept ответ в JSON"""
+        response = authorized_client.get(f"/api/v1/projects/{test_project.id}")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/json")
+        assert response.json()["name"] == "Test Project"
+    
+    def test_msgpack_response(self, authorized_client, test_project):
+        """Тест: ответ в MessagePack по заголовку Accept"""
+        response = authorized_client.get(
+            f"/api/v1/projects/{test_project.id}",
+            headers={"Accept": MSGPACK}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == MSGPACK
+        data = msgpack.unpackb(response.content)
+        assert data["name"] == "Test Project"
+        assert data["created_at"].endswith("+00:00")
+    
+    def test_msgpack_request_body(self, authorized_client, test_project):
+        """Тест: создание задачи с телом в MessagePack"""
+        response = authorized_client.post(
+            f"/api/v1/projects/{test_project.id}/tasks",
+            content=msgpack.packb({"title": "Packed Task", "priority": "high"}),
+            headers={"Content-Type": MSGPACK, "Accept": MSGPACK}
+        )
+        
+        assert response.status_code == 201
+        data = msgpack.unpackb(response.content)
+        assert data["title"] == "Packed Task"
+        assert data["priority"] == "high"
+    
+    def test_msgpack_request_validation(self, authorized_client, test_project):
+        """Тест: тело в MessagePack проходит обычную валидацию"""
+        response = authorized_client.post(
+            f"/api/v1/projects/{test_project.id}/tasks",
+            content=msgpack.packb({"title": ""}),
+            headers={"Content-Type": MSGPACK}
+        )
+        
+        assert response.status_code == 422
+    
+    def test_msgpack_invalid_body(self, authorized_client, test_project):
+        """Тест: повреждённое тело MessagePack"""
+        response = authorized_client.post(
+            f"/api/v1/projects/{test_project.id}/tasks",
+            content=b"\xc1",
+            headers={"Content-Type": MSGPACK}
+        )
+        
+        assert response.status_code == 400
+    
+    def test_msgpack_list_fast_path(self, authorized_client, test_project, monkeypatch):
+        """Тест: быстрый путь сериализации также поддерживает MessagePack"""
+        from app.config import settings
+        
+        authorized_client.post(f"/api/v1/projects/{test_project.id}/tasks", json={"title": "Task"})
+        monkeypatch.setattr(settings, "FAST_JSON", True)
+        response = authorized_client.get(
+            f"/api/v1/projects/{test_project.id}/tasks",
+            headers={"Accept": MSGPACK}
+        )
+        
+        assert response.headers["content-type"] == MSGPACK
+        assert msgpack.unpackb(response.content)[0]["title"] == "Task"
+    
+    def test_vary_accept_on_every_format(self, authorized_client, test_project):
+        """Тест: JSON, MessagePack и ответы из кэша помечены Vary: Accept"""
+        url = f"/api/v1/projects/{test_project.id}"
+        responses = [
+            authorized_client.get(url),
+            authorized_client.get(url),
+            authorized_client.get(url, headers={"Accept": MSGPACK}),
+            authorized_client.get(url, headers={"Accept": MSGPACK}),
+            authorized_client.get(f"/api/v1/projects/{test_project.id}/tasks"),
+        ]
+        
+        for response in responses:
+            assert response.status_code == 200
+            assert [item.strip() for item in response.headers["vary"].split(",")].count("Accept") == 1
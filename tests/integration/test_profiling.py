@@ -0,0 +1,107 @@
+"""
+Интеграционные тесты для профилирования запросов (app/profiling.py)
+"""
+import json
+import re
+
+import pytest
+
+from app.config import Settings, settings
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILE_INTERVAL_MS", 0.5)
+    # Без DEBUG заголовок действует только для администраторов
+    monkeypatch.setattr(settings, "DEBUG", False)
+    return tmp_path
+
+
+@pytest.fixture
+def admin_client(authorized_client, test_user, db_session):
+    test_user.is_admin = True
+    db_session.commit()
+    return authorized_client
+
+
+def read_profile(profile_dir, profile_id):
+    report = json.loads((profile_dir / f"{profile_id}.json").read_text(encoding="utf-8"))
+    collapsed = (profile_dir / f"{profile_id}.collapsed").read_text(encoding="utf-8")
+    return report, collapsed
+
+
+class TestProfiling:
+    """Тесты заголовка X-Profile"""
+    
+    def test_without_header_not_profiled(self, admin_client, profile_dir):
+        """Тест: без заголовка профиль не пишется"""
+        response = admin_client.get("/api/v1/users/me")
+        
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert list(profile_dir.iterdir()) == []
+    
+    def test_disabled_by_default(self, admin_client, profile_dir, monkeypatch):
+        """Тест: без явного PROFILE_ENABLED заголовок игнорируется"""
+        monkeypatch.setattr(settings, "PROFILE_ENABLED", Settings.model_fields["PROFILE_ENABLED"].default)
+        response = admin_client.get("/api/v1/users/me", headers={"X-Profile": "1"})
+        
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert list(profile_dir.iterdir()) == []
+    
+    def test_admin_request_profiled(self, admin_client, profile_dir):
+        """Тест: запрос администратора - стеки и хронология SQL в каталоге профилей"""
+        project = admin_client.post("/api/v1/projects", json={"name": "Profiled"}).json()
+        for i in range(20):
+            admin_client.post(f"/api/v1/projects/{project['id']}/tasks", json={"title": f"Task {i}"})
+        
+        response = admin_client.get(f"/api/v1/projects/{project['id']}/tasks", headers={"X-Profile": "1"})
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 20
+        report, collapsed = read_profile(profile_dir, response.headers["X-Profile-Id"])
+        assert report["method"] == "GET"
+        assert report["path"] == f"/api/v1/projects/{project['id']}/tasks"
+        assert report["status_code"] == 200
+        assert set(report["breakdown_ms"]) == {"auth", "db", "pydantic", "json", "other"}
+        assert report["wall_ms"] > 0
+        
+        statements = [query["statement"] for query in report["sql"]]
+        assert any("FROM users" in statement for statement in statements)
+        assert any("FROM tasks" in statement for statement in statements)
+        starts = [query["start_ms"] for query in report["sql"]]
+        assert starts == sorted(starts)
+        assert all(re.fullmatch(r"\S.* \d+", line) for line in collapsed.splitlines())
+    
+    def test_non_admin_header_ignored(self, authorized_client, profile_dir):
+        """Тест: без прав администратора заголовок игнорируется, запрос выполняется"""
+        response = authorized_client.get("/api/v1/users/me", headers={"X-Profile": "1"})
+        
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert list(profile_dir.iterdir()) == []
+    
+    def test_debug_allows_any_client(self, client, profile_dir, monkeypatch):
+        """Тест: в DEBUG профилируется запрос без авторизации"""
+        monkeypatch.setattr(settings, "DEBUG", True)
+        
+        response = client.get("/health", headers={"X-Profile": "1"})
+        
+        assert response.status_code == 200
+        report, _ = read_profile(profile_dir, response.headers["X-Profile-Id"])
+        assert report["path"] == "/health"
+        assert report["sql"] == []
+    
+    def test_profile_count_capped(self, client, profile_dir, monkeypatch):
+        """Тест: в каталоге остаётся не больше PROFILE_MAX_PROFILES профилей"""
+        monkeypatch.setattr(settings, "DEBUG", True)
+        monkeypatch.setattr(settings, "PROFILE_MAX_PROFILES", 2)
+        
+        for _ in range(4):
+            assert "X-Profile-Id" in client.get("/health", headers={"X-Profile": "1"}).headers
+        
+        assert len(list(profile_dir.glob("*.json"))) == 2
+        assert len(list(profile_dir.glob("*.collapsed"))) == 2
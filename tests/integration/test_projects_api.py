@@ -2,8 +2,13 @@
 Интеграционные тесты для эндпоинтов проектов (app/routers/projects.py)
 """
 import pytest
+from sqlalchemy import event
 
-from app.models import Project, ProjectMember, ProjectRole
+from app.auth import create_access_token
+from app.models import Project, ProjectMember, ProjectRole, Task, TaskStatus, Comment
+from app.response_cache import RedisCacheBackend, cache_requests, response_cache
+from tests.conftest import engine
+from tests.redis_stub import FakeRedis
 
 
 @pytest.fixture
@@ -20,6 +25,17 @@ def test_project(db_session, test_user):
     return project
 
 
+def count_queries(func):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = func()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return response, len(statements)
+
+
 class TestCreateProject:
     """Тесты создания проекта"""
     
@@ -288,3 +304,129 @@ class TestProjectStats:
         assert "in_progress_tasks" in data
         assert "done_tasks" in data
         assert "total_members" in data
+
+
+class TestProjectBoard:
+    """Тесты снимка доски проекта"""
+    
+    @pytest.fixture
+    def board_project(self, db_session, test_project, test_user, second_user):
+        db_session.add(ProjectMember(project_id=test_project.id, user_id=second_user.id))
+        tasks = [
+            Task(title=f"Task {i}", project_id=test_project.id, status=status)
+            for i, status in enumerate([TaskStatus.TODO, TaskStatus.TODO, TaskStatus.DONE])
+        ]
+        db_session.add_all(tasks)
+        db_session.commit()
+        db_session.add(Comment(content="Comment", task_id=tasks[0].id, author_id=test_user.id))
+        db_session.commit()
+        return test_project
+    
+    def test_board_snapshot(self, authorized_client, board_project, second_user, db_session):
+        """Тест: доска содержит проект, участников, задачи по статусам и счётчики"""
+        first_task = db_session.query(Task).order_by(Task.id).first()
+        authorized_client.post(f"/api/v1/tasks/{first_task.id}/tags", json={"tag_name": "backend"})
+        response = authorized_client.get(f"/api/v1/projects/{board_project.id}/board")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["project"]["id"] == board_project.id
+        assert [m["user"]["id"] for m in data["members"]] == [second_user.id]
+        assert set(data["tasks"]) == {"todo", "in_progress", "review", "done"}
+        assert [t["title"] for t in data["tasks"]["todo"]] == ["Task 0", "Task 1"]
+        assert data["tasks"]["todo"][0]["comments_count"] == 1
+        assert data["tasks"]["todo"][0]["tag_ids"] == [data["tags"][0]["id"]]
+        assert data["stats"]["total_tasks"] == 3
+        assert data["stats"]["done_tasks"] == 1
+        assert data["stats"]["total_comments"] == 1
+    
+    def test_board_constant_queries(self, authorized_client, board_project, db_session, test_user):
+        """Тест: число запросов не зависит от числа задач"""
+        url = f"/api/v1/projects/{board_project.id}/board"
+        # Первый запрос процесса загружает список отозванных токенов
+        authorized_client.get("/api/v1/users/me")
+        _, small = count_queries(lambda: authorized_client.get(url))
+        
+        db_session.add_all([Task(title=f"Extra {i}", project_id=board_project.id) for i in range(20)])
+        db_session.query(Project).filter(Project.id == board_project.id).update({Project.version: 99})
+        db_session.commit()
+        
+        response, large = count_queries(lambda: authorized_client.get(url))
+        assert response.json()["stats"]["total_tasks"] == 23
+        assert large == small
+    
+    def test_board_etag(self, authorized_client, board_project):
+        """Тест: повторный запрос с If-None-Match возвращает 304"""
+        url = f"/api/v1/projects/{board_project.id}/board"
+        etag = authorized_client.get(url).headers["ETag"]
+        
+        response = authorized_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+    
+    def test_board_version_bumped_on_write(self, authorized_client, board_project):
+        """Тест: запись в проект меняет ETag и содержимое доски"""
+        url = f"/api/v1/projects/{board_project.id}/board"
+        first = authorized_client.get(url)
+        
+        authorized_client.post(f"/api/v1/projects/{board_project.id}/tasks", json={"title": "New"})
+        second = authorized_client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        
+        assert second.status_code == 200
+        assert second.headers["ETag"] != first.headers["ETag"]
+        assert second.json()["stats"]["total_tasks"] == 4
+        assert second.json()["project"]["version"] == first.json()["project"]["version"] + 1
+    
+    def test_board_no_access(self, authorized_client, db_session, second_user):
+        """Тест: нет доступа к доске чужого проекта"""
+        other_project = Project(name="Other Project", owner_id=second_user.id)
+        db_session.add(other_project)
+        db_session.commit()
+        
+        response = authorized_client.get(f"/api/v1/projects/{other_project.id}/board")
+        
+        assert response.status_code == 403
+
+
+class TestResponseCache:
+    """Тесты кэша ответов GET"""
+    
+    def test_repeat_read_served_from_cache(self, authorized_client, test_project):
+        """Тест: повторное чтение той же версии не считает статистику заново"""
+        url = f"/api/v1/projects/{test_project.id}/stats"
+        hits = cache_requests.value(endpoint="/projects/{project_id}/stats", result="hit")
+        first, cold = count_queries(lambda: authorized_client.get(url))
+        second, warm = count_queries(lambda: authorized_client.get(url))
+        
+        assert second.content == first.content
+        assert warm < cold
+        assert cache_requests.value(endpoint="/projects/{project_id}/stats", result="hit") == hits + 1
+    
+    def test_write_invalidates_by_version(self, authorized_client, test_project):
+        """Тест: после записи ответ строится заново по новой версии проекта"""
+        url = f"/api/v1/projects/{test_project.id}/tasks"
+        assert authorized_client.get(url).json() == []
+        
+        authorized_client.post(url, json={"title": "New"})
+        
+        assert [t["title"] for t in authorized_client.get(url).json()] == ["New"]
+        assert authorized_client.get(f"/api/v1/projects/{test_project.id}").json()["version"] == 2
+    
+    def test_access_checked_before_cache(self, authorized_client, client, test_project, db_session, second_user):
+        """Тест: закэшированный ответ не отдаётся пользователю без доступа"""
+        url = f"/api/v1/projects/{test_project.id}/stats"
+        assert authorized_client.get(url).status_code == 200
+        
+        other = {"Authorization": f"Bearer {create_access_token(second_user.id)}"}
+        assert client.get(url, headers=other).status_code == 403
+    
+    def test_shared_backend(self, authorized_client, test_project, monkeypatch):
+        """Тест: с Redis ответ кэшируется на сервере и читается из него"""
+        client = FakeRedis()
+        monkeypatch.setattr(response_cache, "backend", RedisCacheBackend(client, ttl=60))
+        url = f"/api/v1/projects/{test_project.id}/board"
+        first = authorized_client.get(url)
+        second = authorized_client.get(url)
+        
+        assert len(client.data) == 1
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
@@ -0,0 +1,119 @@
+"""
+Интеграционные тесты для фоновой очистки неактивных проектов (app/purge.py)
+"""
+import time
+import pytest
+from datetime import datetime, timedelta
+
+from app.auth import create_access_token
+from app.claims import build_membership_claim
+from app.config import settings
+from app.metrics import registry
+from app.models import Project, ProjectMember, Task, Comment
+from app.purge import ProjectPurger, purged_projects
+from tests.conftest import TestingSessionLocal
+
+
+def make_project(db_session, owner_id, deleted_days_ago=None, tasks=0, comments=0):
+    project = Project(name="Project", owner_id=owner_id)
+    if deleted_days_ago is not None:
+        project.is_active = False
+        project.deleted_at = datetime.utcnow() - timedelta(days=deleted_days_ago)
+    db_session.add(project)
+    db_session.commit()
+    
+    for i in range(tasks):
+        task = Task(title=f"Task {i}", project_id=project.id)
+        db_session.add(task)
+        db_session.flush()
+        db_session.add_all([
+            Comment(content="Comment", task_id=task.id, author_id=owner_id)
+            for _ in range(comments)
+        ])
+    db_session.commit()
+    return project.id
+
+
+@pytest.fixture
+def purger():
+    return ProjectPurger(
+        session_factory=TestingSessionLocal,
+        retention_days=30,
+        batch_size=3,
+        max_run_seconds=5,
+        pause_seconds=0
+    )
+
+
+class TestProjectPurger:
+    """Тесты очистки неактивных проектов"""
+    
+    def test_purges_only_expired(self, db_session, test_user, purger):
+        """Тест: удаляются только неактивные проекты старше срока хранения"""
+        expired = make_project(db_session, test_user.id, deleted_days_ago=31, tasks=2, comments=4)
+        recent = make_project(db_session, test_user.id, deleted_days_ago=1)
+        active = make_project(db_session, test_user.id, tasks=1)
+        
+        assert purger.run_once() == 1
+        
+        db_session.expire_all()
+        ids = {project.id for project in db_session.query(Project).all()}
+        assert ids == {recent, active}
+        assert db_session.query(Task).filter(Task.project_id == expired).count() == 0
+        assert db_session.query(Comment).count() == 0
+    
+    def test_time_budget_resumes_next_run(self, db_session, test_user, purger):
+        """Тест: при исчерпании времени проект дочищается следующим запуском"""
+        project_id = make_project(db_session, test_user.id, deleted_days_ago=40, tasks=2, comments=5)
+        
+        with TestingSessionLocal() as db:
+            assert purger.purge_project(db, project_id, deadline=time.monotonic()) is False
+        
+        # Удалена одна порция комментариев, проект ещё на месте
+        assert db_session.query(Comment).count() == 10 - purger.batch_size
+        assert db_session.query(Project).count() == 1
+        
+        assert purger.run_once() == 1
+        assert db_session.query(Project).count() == 0
+    
+    def test_purged_id_reuse_denies_old_owner(self, authorized_client, client, db_session, second_user, purger, monkeypatch):
+        """Тест: токен владельца удалённого проекта не даёт доступа к новому проекту с тем же id"""
+        monkeypatch.setattr(settings, "MEMBERSHIP_CLAIMS_ENABLED", True)
+        project_id = make_project(db_session, second_user.id, deleted_days_ago=31)
+        old_token = create_access_token(second_user.id, build_membership_claim(db_session, second_user))
+        
+        assert purger.run_once() == 1
+        response = authorized_client.post("/api/v1/projects", json={"name": "Reused"})
+        assert response.json()["id"] == project_id
+        
+        response = client.get(
+            f"/api/v1/projects/{project_id}", headers={"Authorization": f"Bearer {old_token}"}
+        )
+        
+        assert response.status_code == 403
+    
+    def test_metrics_reported(self, db_session, test_user, purger):
+        """Тест: прогресс очистки виден в метриках"""
+        before = purged_projects.value()
+        make_project(db_session, test_user.id, deleted_days_ago=31, tasks=1, comments=1)
+        
+        purger.run_once()
+        
+        assert purged_projects.value() == before + 1
+        assert "taskmanager_purge_rows_total" in registry.render()
+    
+    def test_delete_endpoint_sets_deleted_at(self, authorized_client, db_session, test_user):
+        """Тест: soft delete проставляет время удаления"""
+        project_id = make_project(db_session, test_user.id)
+        
+        authorized_client.delete(f"/api/v1/projects/{project_id}")
+        
+        db_session.expire_all()
+        assert db_session.get(Project, project_id).deleted_at is not None
+    
+    def test_metrics_endpoint(self, client):
+        """Тест: эндпоинт метрик"""
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert "# TYPE taskmanager_purge_runs_total counter" in response.text
@@ -0,0 +1,119 @@
+"""
+Интеграционные тесты для проверки готовности (app/readiness.py)
+"""
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import readiness
+from app.config import settings
+from app.readiness import ReadinessProbe, migration_heads
+from tests.conftest import engine
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    probe = ReadinessProbe(engine)
+    monkeypatch.setattr(readiness, "_probe", probe)
+    monkeypatch.setattr(settings, "READY_CACHE_SECONDS", 0)
+    return probe
+
+
+@pytest.fixture
+def migrated(client):
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": migration_heads()[0]})
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+
+
+class TestReadiness:
+    """Тесты /ready"""
+    
+    def test_ready(self, client, probe, migrated):
+        """Тест: БД на последней миграции - готов, в ответе задержка и пулы"""
+        response = client.get("/ready")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["database"]["revision"] == list(migration_heads())
+        assert data["database"]["latency_ms"] >= 0
+        assert data["threadpool"]["size"] == settings.THREADPOOL_SIZE
+    
+    def test_migrations_behind(self, client, probe):
+        """Тест: БД без последней миграции - не готов"""
+        response = client.get("/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["failed"] == ["migrations"]
+    
+    def test_slow_database_bounded(self, client, probe, migrated, monkeypatch):
+        """Тест: зависший запрос к БД ограничен таймаутом и не запускается повторно"""
+        monkeypatch.setattr(settings, "READY_PROBE_TIMEOUT_SECONDS", 0.05)
+        release = threading.Event()
+        calls = []
+        
+        def stuck_query():
+            calls.append(1)
+            release.wait(5)
+            return {"latency_ms": 0.0, "revision": list(migration_heads())}
+        
+        monkeypatch.setattr(probe, "_query", stuck_query)
+        try:
+            first = client.get("/ready")
+            second = client.get("/ready")
+        finally:
+            release.set()
+        
+        assert first.status_code == second.status_code == 503
+        assert first.json()["database"] == {"error": "timeout"}
+        assert len(calls) == 1
+    
+    def test_threadpool_backlog(self, client, probe, migrated, monkeypatch):
+        """Тест: очередь к пулу потоков выше порога - не готов"""
+        monkeypatch.setattr(settings, "READY_MAX_THREADPOOL_BACKLOG", -1)
+        
+        response = client.get("/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["failed"] == ["threadpool"]
+    
+    def test_pool_exhausted(self, client, tmp_path, monkeypatch):
+        """Тест: исчерпанный пул соединений - не готов, БД не опрашивается"""
+        file_engine = create_engine(f"sqlite:///{tmp_path / 'ready.db'}", pool_size=1, max_overflow=0)
+        monkeypatch.setattr(readiness, "_probe", ReadinessProbe(file_engine))
+        
+        with file_engine.connect():
+            response = client.get("/ready")
+        
+        assert response.status_code == 503
+        data = response.json()
+        assert data["failed"] == ["db_pool", "database"]
+        assert data["db_pool"]["checkedout"] == 1
+        assert data["database"] == {"error": "pool_exhausted"}
+        file_engine.dispose()
+    
+    def test_locked_sqlite_file(self, client, tmp_path, monkeypatch):
+        """Тест: заблокированный другим процессом файл SQLite - не готов по таймауту"""
+        path = tmp_path / "locked.db"
+        file_engine = create_engine(f"sqlite:///{path}")
+        with file_engine.begin() as connection:
+            connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        monkeypatch.setattr(readiness, "_probe", ReadinessProbe(file_engine))
+        monkeypatch.setattr(settings, "READY_PROBE_TIMEOUT_SECONDS", 0.2)
+        
+        writer = sqlite3.connect(path, isolation_level=None)
+        writer.execute("BEGIN EXCLUSIVE")
+        try:
+            response = client.get("/ready")
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+        
+        assert response.status_code == 503
+        assert response.json()["database"] == {"error": "timeout"}
@@ -0,0 +1,61 @@
+"""
+Интеграционные тесты для быстрого холодного старта (app/startup.py)
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from app.main import app
+from app.startup import OPENAPI_PATH
+
+ROOT = Path(__file__).resolve().parents[2]
+
+FAST_STARTUP_SCRIPT = textwrap.dedent("""
+    import json, sys
+    from app.main import app
+    assert "app.routers.tasks" not in sys.modules
+    assert "jose" not in sys.modules
+
+    from app import models
+    from app.database import Base, engine
+    Base.metadata.create_all(engine)
+
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        assert engine.pool.checkedin() == 2
+        response = client.post("/api/v1/auth/login", json={"username": "nobody", "password": "password"})
+        assert response.status_code == 401, response.text
+        with open(sys.argv[1], encoding="utf-8") as prebuilt:
+            assert client.get("/openapi.json").json() == json.load(prebuilt)
+""")
+
+
+class TestFastStartup:
+    """Тесты режима FAST_STARTUP"""
+    
+    def test_prebuilt_openapi_is_current(self):
+        """Тест: app/openapi.json совпадает со схемой по текущим маршрутам (python -m app.startup)"""
+        with open(OPENAPI_PATH, encoding="utf-8") as prebuilt:
+            assert json.load(prebuilt) == FastAPI.openapi(app)
+    
+    def test_routers_loaded_at_startup(self, tmp_path):
+        """Тест: роутеры не импортируются с модулем, а подключаются и прогреваются при запуске"""
+        env = {
+            **os.environ,
+            "FAST_STARTUP": "1",
+            "WARMUP_DB_CONNECTIONS": "2",
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}",
+            "TOKEN_SWEEP_ENABLED": "0",
+            "REVOCATION_SYNC_ENABLED": "0",
+        }
+        result = subprocess.run(
+            [sys.executable, "-c", FAST_STARTUP_SCRIPT, str(OPENAPI_PATH)],
+            cwd=ROOT, env=env, capture_output=True, text=True
+        )
+        
+        assert result.returncode == 0, result.stderr
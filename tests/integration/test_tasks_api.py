@@ -131,6 +131,18 @@ class TestGetTasks:
         data = response.json()
         assert len(data) == 1
         assert data[0]["title"] == "Test Task"
+    
+    def test_get_tasks_fast_json(self, authorized_client, test_project, test_task, monkeypatch):
+        """Тест: быстрый путь сериализации отдаёт тот же ответ"""
+        from app.config import settings
+        
+        expected = authorized_client.get(f"/api/v1/projects/{test_project.id}/tasks").json()
+        monkeypatch.setattr(settings, "FAST_JSON", True)
+        response = authorized_client.get(f"/api/v1/projects/{test_project.id}/tasks")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == expected
 
 
 class TestUpdateTask:
@@ -247,6 +259,79 @@ class TestTaskComments:
         assert response.status_code == 204
 
 
+class TestCommentPagination:
+    """Тесты постраничной выдачи комментариев"""
+    
+    @pytest.fixture
+    def comments(self, db_session, test_task, test_user, second_user):
+        # Все комментарии создаются в одну секунду - порядок задаёт id
+        authors = [test_user.id, second_user.id]
+        db_session.add_all([
+            Comment(content=f"Comment {i}", task_id=test_task.id, author_id=authors[i % 2])
+            for i in range(5)
+        ])
+        db_session.commit()
+    
+    def test_pages_cover_all_comments(self, authorized_client, test_task, comments):
+        """Тест: страницы по курсору без пропусков и повторов"""
+        url = f"/api/v1/tasks/{test_task.id}/comments"
+        contents = []
+        response = authorized_client.get(url, params={"limit": 2})
+        
+        while True:
+            assert response.status_code == 200
+            assert len(response.json()) <= 2
+            contents += [comment["content"] for comment in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            response = authorized_client.get(url, params={"limit": 2, "cursor": cursor})
+        
+        assert contents == [f"Comment {i}" for i in range(5)]
+    
+    def test_cached_page_keeps_cursor(self, authorized_client, test_task, comments):
+        """Тест: повторный запрос страницы из кэша возвращает тот же курсор"""
+        url = f"/api/v1/tasks/{test_task.id}/comments"
+        first = authorized_client.get(url, params={"limit": 2})
+        second = authorized_client.get(url, params={"limit": 2})
+
+        assert second.json() == first.json()
+        assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+    def test_without_limit_returns_all(self, authorized_client, test_task, comments):
+        """Тест: без limit и cursor возвращаются все комментарии"""
+        response = authorized_client.get(f"/api/v1/tasks/{test_task.id}/comments")
+        
+        assert len(response.json()) == 5
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_invalid_cursor(self, authorized_client, test_task):
+        """Тест: некорректный курсор"""
+        response = authorized_client.get(
+            f"/api/v1/tasks/{test_task.id}/comments",
+            params={"cursor": "not-a-cursor"}
+        )
+        
+        assert response.status_code == 400
+    
+    def test_compact_thread(self, authorized_client, test_task, comments, test_user, second_user):
+        """Тест: компактная лента с таблицей авторов"""
+        url = f"/api/v1/tasks/{test_task.id}/comments/thread"
+        response = authorized_client.get(url, params={"limit": 3})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["comments"]) == 3
+        assert "author" not in data["comments"][0]
+        assert set(data["authors"]) == {str(test_user.id), str(second_user.id)}
+        assert data["next_cursor"]
+        
+        response = authorized_client.get(url, params={"limit": 3, "cursor": data["next_cursor"]})
+        data = response.json()
+        assert [c["content"] for c in data["comments"]] == ["Comment 3", "Comment 4"]
+        assert data["next_cursor"] is None
+
+
 class TestTaskTags:
     """Тесты тегов задач"""
     
@@ -0,0 +1,66 @@
+"""
+Интеграционные тесты для пула потоков обработчиков (app/threadpool.py)
+"""
+import time
+
+import anyio
+import anyio.to_thread
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import pool_options
+from app.main import app
+from app.threadpool import TimedLimiter, configure_threadpool, exec_seconds, pool_calls, pool_size, wait_seconds
+
+
+class TestThreadpool:
+    """Тесты размера пула и замера ожидания потока"""
+    
+    def test_pool_size_from_settings(self, monkeypatch):
+        """Тест: размер пула берётся из настроек при запуске приложения"""
+        monkeypatch.setattr(settings, "THREADPOOL_SIZE", 7)
+        
+        with TestClient(app):
+            assert pool_size.value() == 7
+    
+    def test_every_hop_measured(self, authorized_client):
+        """Тест: каждый переход запроса в пул (get_db, get_current_user, обработчик) учитывается"""
+        calls = pool_calls.value()
+        waited = wait_seconds.value()
+        executed = exec_seconds.value()
+        
+        assert authorized_client.get("/api/v1/users/me").status_code == 200
+        
+        assert pool_calls.value() >= calls + 3
+        assert wait_seconds.value() > waited
+        assert exec_seconds.value() > executed
+    
+    def test_wait_separate_from_exec(self, monkeypatch):
+        """Тест: ожидание занятого потока не входит во время выполнения"""
+        monkeypatch.setattr(settings, "THREADPOOL_SIZE", 1)
+        
+        async def run():
+            configure_threadpool()
+            assert isinstance(anyio.to_thread.current_default_thread_limiter(), TimedLimiter)
+            async with anyio.create_task_group() as group:
+                for _ in range(2):
+                    group.start_soon(anyio.to_thread.run_sync, time.sleep, 0.1)
+        
+        waited = wait_seconds.value()
+        executed = exec_seconds.value()
+        anyio.run(run)
+        
+        # Второй вызов ждал, пока первый освободит единственный поток
+        assert wait_seconds.value() - waited == pytest.approx(0.1, abs=0.05)
+        assert exec_seconds.value() - executed == pytest.approx(0.2, abs=0.05)
+    
+    def test_db_pool_matches_threadpool(self, monkeypatch):
+        """Тест: пул соединений файловой БД рассчитан на пул потоков"""
+        monkeypatch.setattr(settings, "THREADPOOL_SIZE", 16)
+        monkeypatch.setattr(settings, "DB_POOL_OVERFLOW", 4)
+        
+        options = pool_options("sqlite:///./taskmanager.db")
+        assert options["pool_size"] == 16
+        assert options["max_overflow"] == 4
+        assert pool_options("sqlite:///:memory:") == {}
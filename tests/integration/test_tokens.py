@@ -0,0 +1,47 @@
+"""
+Интеграционные тесты для удаления просроченных refresh токенов (app/tokens.py)
+"""
+import secrets
+from datetime import datetime, timedelta
+
+from app.auth import hash_token
+from app.models import RefreshToken
+from app.tokens import TokenSweeper
+from tests.conftest import TestingSessionLocal
+
+
+def make_tokens(db_session, user_id, count, expires_in):
+    db_session.add_all([
+        RefreshToken(
+            token_hash=hash_token(secrets.token_urlsafe(16)),
+            family_id=secrets.token_hex(16),
+            user_id=user_id,
+            expires_at=datetime.utcnow() + expires_in
+        )
+        for _ in range(count)
+    ])
+    db_session.commit()
+
+
+class TestTokenSweeper:
+    """Тесты удаления просроченных токенов"""
+    
+    def test_sweeps_expired_in_batches(self, db_session, test_user):
+        """Тест: просроченные токены удаляются порциями, действующие остаются"""
+        make_tokens(db_session, test_user.id, 7, timedelta(days=-1))
+        make_tokens(db_session, test_user.id, 2, timedelta(days=1))
+        
+        sweeper = TokenSweeper(session_factory=TestingSessionLocal, batch_size=3)
+        
+        assert sweeper.run_once() == 7
+        assert db_session.query(RefreshToken).count() == 2
+        assert sweeper.run_once() == 0
+    
+    def test_respects_time_budget(self, db_session, test_user):
+        """Тест: запуск без бюджета времени ничего не удаляет"""
+        make_tokens(db_session, test_user.id, 2, timedelta(days=-1))
+        
+        sweeper = TokenSweeper(session_factory=TestingSessionLocal, batch_size=1, max_run_seconds=0)
+        
+        assert sweeper.run_once() == 0
+        assert db_session.query(RefreshToken).count() == 2
@@ -0,0 +1,112 @@
+"""
+Интеграционные тесты для трассировки запросов (app/tracing.py)
+"""
+import pytest
+
+from app.config import settings
+from app.tracing import parse_traceparent, span_buffer
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+
+@pytest.fixture
+def tracing(monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 1.0)
+
+
+@pytest.fixture
+def project(authorized_client):
+    return authorized_client.post("/api/v1/projects", json={"name": "Traced"}).json()
+
+
+def span_tree(spans):
+    by_id = {span.span_id: span for span in spans}
+    children = {}
+    for span in spans:
+        children.setdefault(span.parent_id, []).append(span)
+    roots = [span for span in spans if span.parent_id not in by_id]
+    return roots, children
+
+
+class TestTracing:
+    """Тесты спанов запроса"""
+    
+    def test_span_tree(self, authorized_client, project, tracing):
+        """Тест: корневой спан, авторизация, проверка доступа, SQL и commit с INSERT внутри"""
+        span_buffer.clear()
+        
+        response = authorized_client.post(f"/api/v1/projects/{project['id']}/tasks", json={"title": "Task"})
+        
+        assert response.status_code == 201
+        roots, children = span_tree(span_buffer.drain())
+        assert len(roots) == 1
+        root = roots[0]
+        assert root.name == "POST /projects/{project_id}/tasks"
+        assert root.attributes["http.status_code"] == 201
+        
+        names = [span.name for span in children[root.span_id]]
+        assert "auth.get_current_user" in names
+        assert "access.check_project_access" in names
+        assert "db.commit" in names
+        auth = next(span for span in children[root.span_id] if span.name == "auth.get_current_user")
+        assert [span.name for span in children[auth.span_id]] == ["db.query"]
+        commit = next(span for span in children[root.span_id] if span.name == "db.commit")
+        assert any(span.attributes["db.statement"].startswith("INSERT INTO tasks") for span in children[commit.span_id])
+        assert {span.trace_id for span in children[root.span_id]} == {root.trace_id}
+    
+    def test_serialization_span(self, authorized_client, project, tracing, monkeypatch):
+        """Тест: сериализация ответа - отдельный спан"""
+        monkeypatch.setattr(settings, "FAST_JSON", True)
+        span_buffer.clear()
+        
+        authorized_client.get(f"/api/v1/projects/{project['id']}/tasks")
+        
+        assert "serialize" in [span.name for span in span_buffer.drain()]
+    
+    def test_serialization_span_without_fast_path(self, authorized_client, project, tracing, monkeypatch):
+        """Тест: штатная сериализация FastAPI (без respond) тоже даёт спан serialize"""
+        monkeypatch.setattr(settings, "FAST_JSON", False)
+        span_buffer.clear()
+        
+        response = authorized_client.get("/api/v1/users/me")
+        
+        assert response.status_code == 200
+        assert "serialize" in [span.name for span in span_buffer.drain()]
+    
+    def test_traceparent_continued(self, authorized_client, tracing, monkeypatch):
+        """Тест: входящий traceparent продолжается, ответ несёт id корневого спана"""
+        monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 0.0)
+        span_buffer.clear()
+        
+        response = authorized_client.get(
+            "/api/v1/users/me", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+        )
+        
+        trace_id, span_id, sampled = parse_traceparent(response.headers["traceparent"])
+        assert (trace_id, sampled) == (TRACE_ID, True)
+        root = next(span for span in span_buffer.drain() if span.span_id == span_id)
+        assert root.parent_id == PARENT_ID
+    
+    def test_unsampled_request(self, authorized_client, tracing, monkeypatch):
+        """Тест: невыбранный запрос ничего не пишет, но traceparent распространяется"""
+        monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 0.0)
+        span_buffer.clear()
+        
+        response = authorized_client.get(
+            "/api/v1/users/me", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"}
+        )
+        fresh = authorized_client.get("/api/v1/users/me")
+        
+        assert response.status_code == 200
+        assert parse_traceparent(response.headers["traceparent"])[::2] == (TRACE_ID, False)
+        assert parse_traceparent(fresh.headers["traceparent"])[2] is False
+        assert len(span_buffer) == 0
+    
+    def test_disabled(self, authorized_client):
+        """Тест: при TRACE_ENABLED=False заголовок не добавляется"""
+        response = authorized_client.get("/api/v1/users/me")
+        
+        assert "traceparent" not in response.headers
+        assert len(span_buffer) == 0
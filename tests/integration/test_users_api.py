@@ -0,0 +1,242 @@
+"""
+Интеграционные тесты для эндпоинтов пользователей (app/routers/users.py)
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.api_keys import digest_api_key
+from app.models import Project, ProjectMember, Task, TaskStatus, TaskPriority, ApiKey
+from tests.conftest import engine
+
+
+@pytest.fixture
+def assigned_tasks(db_session, test_user, second_user):
+    """Задачи текущего пользователя в своём и чужом проекте"""
+    own = Project(name="Own Project", owner_id=test_user.id)
+    shared = Project(name="Shared Project", owner_id=second_user.id)
+    foreign = Project(name="Foreign Project", owner_id=second_user.id)
+    db_session.add_all([own, shared, foreign])
+    db_session.commit()
+    db_session.add(ProjectMember(project_id=shared.id, user_id=test_user.id))
+    
+    now = datetime.utcnow()
+    db_session.add_all([
+        Task(title="Low later", project_id=own.id, assignee_id=test_user.id,
+             priority=TaskPriority.LOW, due_date=now + timedelta(days=10)),
+        Task(title="Urgent no date", project_id=shared.id, assignee_id=test_user.id,
+             priority=TaskPriority.URGENT),
+        Task(title="Urgent soon", project_id=own.id, assignee_id=test_user.id,
+             priority=TaskPriority.URGENT, due_date=now + timedelta(days=1)),
+        Task(title="High overdue", project_id=shared.id, assignee_id=test_user.id,
+             priority=TaskPriority.HIGH, due_date=now - timedelta(days=1)),
+        Task(title="Done overdue", project_id=own.id, assignee_id=test_user.id,
+             status=TaskStatus.DONE, due_date=now - timedelta(days=2)),
+        # Нет доступа к проекту - задача не должна попасть в выдачу
+        Task(title="Foreign", project_id=foreign.id, assignee_id=test_user.id),
+        Task(title="Unassigned", project_id=own.id),
+    ])
+    db_session.commit()
+
+
+class TestMyTasks:
+    """Тесты списка задач текущего пользователя"""
+    
+    def test_my_tasks_sorted(self, authorized_client, assigned_tasks):
+        """Тест: задачи из всех проектов по приоритету и сроку"""
+        response = authorized_client.get("/api/v1/users/me/tasks")
+        
+        assert response.status_code == 200
+        titles = [task["title"] for task in response.json()]
+        assert titles == ["Urgent soon", "Urgent no date", "High overdue", "Done overdue", "Low later"]
+        assert all("project_id" in task for task in response.json())
+    
+    def test_my_tasks_status_filter(self, authorized_client, assigned_tasks):
+        """Тест: фильтр по статусу"""
+        response = authorized_client.get("/api/v1/users/me/tasks", params={"status": ["done"]})
+        
+        assert [task["title"] for task in response.json()] == ["Done overdue"]
+    
+    def test_my_tasks_overdue(self, authorized_client, assigned_tasks):
+        """Тест: просроченные незавершённые задачи"""
+        response = authorized_client.get("/api/v1/users/me/tasks", params={"overdue": True})
+        
+        assert [task["title"] for task in response.json()] == ["High overdue"]
+    
+    def test_my_tasks_due_within(self, authorized_client, assigned_tasks):
+        """Тест: задачи со сроком в ближайшие N дней"""
+        response = authorized_client.get("/api/v1/users/me/tasks", params={"due_within_days": 3})
+        
+        assert [task["title"] for task in response.json()] == ["Urgent soon"]
+    
+    def test_my_tasks_pagination(self, authorized_client, assigned_tasks):
+        """Тест: постраничная выдача по курсору"""
+        titles = []
+        params = {"limit": 2}
+        
+        while True:
+            response = authorized_client.get("/api/v1/users/me/tasks", params=params)
+            assert response.status_code == 200
+            titles += [task["title"] for task in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            params = {"limit": 2, "cursor": cursor}
+        
+        assert titles == ["Urgent soon", "Urgent no date", "High overdue", "Done overdue", "Low later"]
+    
+    def test_my_tasks_order_comes_from_index(self, authorized_client, assigned_tasks):
+        """Тест: страницы читаются по индексу в нужном порядке, без сортировки"""
+        queries = []
+        
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            if "FROM tasks JOIN projects" in statement:
+                queries.append((statement, parameters))
+        
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response = authorized_client.get("/api/v1/users/me/tasks", params={"limit": 2})
+            authorized_client.get(
+                "/api/v1/users/me/tasks", params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        
+        assert len(queries) == 2
+        with engine.connect() as connection:
+            for statement, parameters in queries:
+                plan = " | ".join(row[3] for row in connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                ))
+                assert "SEARCH tasks USING INDEX ix_tasks_assignee_id_priority_rank_due_date_id" in plan
+                assert "TEMP B-TREE" not in plan
+    
+    def test_my_tasks_unauthorized(self, client):
+        """Тест: без авторизации"""
+        response = client.get("/api/v1/users/me/tasks")
+        
+        assert response.status_code == 401
+
+
+class TestApiKeys:
+    """Тесты API ключей"""
+    
+    @pytest.fixture
+    def projects(self, db_session, test_user):
+        first = Project(name="First", owner_id=test_user.id)
+        second = Project(name="Second", owner_id=test_user.id)
+        db_session.add_all([first, second])
+        db_session.commit()
+        return first.id, second.id
+    
+    def create_key(self, client, **data):
+        response = client.post("/api/v1/users/me/api-keys", json={"name": "ci", **data})
+        assert response.status_code == 201
+        return response.json()
+    
+    def test_create_key_returns_secret_once(self, authorized_client, db_session):
+        """Тест: ключ возвращается при создании, в БД хранится только HMAC"""
+        created = self.create_key(authorized_client)
+        
+        assert created["key"].startswith("tm_" + created["prefix"] + "_")
+        stored = db_session.query(ApiKey).one()
+        assert stored.key_hash == digest_api_key(created["key"])
+        
+        listed = authorized_client.get("/api/v1/users/me/api-keys").json()
+        assert [key["id"] for key in listed] == [created["id"]]
+        assert "key" not in listed[0]
+    
+    def test_authenticate_with_key(self, authorized_client, client, test_user):
+        """Тест: ключ принимается вместо bearer JWT"""
+        key = self.create_key(authorized_client)["key"]
+        
+        response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {key}"})
+        
+        assert response.status_code == 200
+        assert response.json()["id"] == test_user.id
+    
+    def test_invalid_key(self, client, authorized_client):
+        """Тест: ключ с верным префиксом, но чужим секретом отклоняется"""
+        created = self.create_key(authorized_client)
+        forged = f"tm_{created['prefix']}_forged"
+        
+        response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {forged}"})
+        
+        assert response.status_code == 401
+        assert response.json()["detail"] == "API ключ недействителен"
+    
+    def test_key_scope_limits_projects(self, authorized_client, projects):
+        """Тест: ключ с ограничением допускает только свои проекты"""
+        first, second = projects
+        key = self.create_key(authorized_client, project_ids=[first])["key"]
+        headers = {"Authorization": f"Bearer {key}"}
+        
+        assert authorized_client.get(f"/api/v1/projects/{first}/tasks", headers=headers).status_code == 200
+        assert authorized_client.get(f"/api/v1/projects/{second}/tasks", headers=headers).status_code == 403
+        
+        listed = authorized_client.get("/api/v1/projects", headers=headers).json()
+        assert [project["id"] for project in listed] == [first]
+    
+    def test_scoped_key_cannot_widen_scope(self, authorized_client, projects):
+        """Тест: ключ с ограничением не может выпустить ключ шире себя"""
+        first, second = projects
+        key = self.create_key(authorized_client, project_ids=[first])["key"]
+        
+        response = authorized_client.post(
+            "/api/v1/users/me/api-keys",
+            json={"name": "wider", "project_ids": [first, second]},
+            headers={"Authorization": f"Bearer {key}"}
+        )
+        
+        assert response.status_code == 403
+    
+    def test_scope_requires_project_access(self, authorized_client, db_session, second_user):
+        """Тест: нельзя ограничить ключ чужим проектом"""
+        foreign = Project(name="Foreign", owner_id=second_user.id)
+        db_session.add(foreign)
+        db_session.commit()
+        
+        response = authorized_client.post(
+            "/api/v1/users/me/api-keys",
+            json={"name": "ci", "project_ids": [foreign.id]}
+        )
+        
+        assert response.status_code == 403
+    
+    def test_deleted_key_rejected(self, authorized_client, client):
+        """Тест: удалённый ключ сразу перестаёт приниматься, несмотря на кэш"""
+        created = self.create_key(authorized_client)
+        headers = {"Authorization": f"Bearer {created['key']}"}
+        assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+        
+        response = authorized_client.delete(f"/api/v1/users/me/api-keys/{created['id']}")
+        assert response.status_code == 204
+        
+        assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+    
+    def test_expired_key_rejected(self, authorized_client, client, db_session):
+        """Тест: просроченный ключ отклоняется"""
+        created = self.create_key(authorized_client, expires_in_days=1)
+        db_session.query(ApiKey).update({ApiKey.expires_at: datetime.utcnow() - timedelta(minutes=1)})
+        db_session.commit()
+        
+        response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {created['key']}"})
+        
+        assert response.status_code == 401
+    
+    def test_cached_key_skips_lookup(self, authorized_client, client):
+        """Тест: повторная проверка ключа не обращается к api_keys"""
+        key = self.create_key(authorized_client)["key"]
+        headers = {"Authorization": f"Bearer {key}"}
+        client.get("/api/v1/users/me", headers=headers)
+        
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        
+        assert not any("FROM api_keys" in statement for statement in statements)
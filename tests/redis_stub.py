@@ -0,0 +1,70 @@
+"""
+Клиент Redis без сервера для тестов: get, set, scan_iter, delete и
+register_script. Данные в словаре, TTL только запоминается, время сервера
+(TIME) - поле now, которое тесты сдвигают сами. Скрипты приложения
+повторены на Python поверх тех же данных; неизвестный скрипт - ошибка.
+С error каждая команда поднимает эту ошибку, как при недоступном сервере
+"""
+import fnmatch
+import math
+
+from app.ratelimit import TAKE_SCRIPT
+
+
+class FakeRedis:
+    def __init__(self, error=None):
+        self.data = {}
+        self.ttl = {}
+        self.now = 1000.0
+        self.error = error
+        self.scripts = []
+        self.script_calls = []
+
+    def _check(self):
+        if self.error is not None:
+            raise self.error
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+        self.ttl[key] = ex
+        return True
+
+    def scan_iter(self, match="*", count=None):
+        self._check()
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+    def delete(self, *keys):
+        self._check()
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def register_script(self, script):
+        handler = {TAKE_SCRIPT: self._take}[script]
+        self.scripts.append(script)
+
+        def run(keys, args):
+            self._check()
+            self.script_calls.append((keys, args))
+            return handler(keys, args)
+
+        return run
+
+    def _take(self, keys, args):
+        """TAKE_SCRIPT: корзина в хэше tokens/ts, EXPIRE на время полного восполнения"""
+        capacity, rate = float(args[0]), float(args[1])
+        bucket = self.data.get(keys[0], {})
+        tokens = float(bucket.get("tokens", capacity))
+        ts = float(bucket.get("ts", self.now))
+        tokens = min(capacity, tokens + (self.now - ts) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self.data[keys[0]] = {"tokens": tokens, "ts": self.now}
+        self.ttl[keys[0]] = math.ceil(capacity / rate) + 1
+        return repr(wait).encode()
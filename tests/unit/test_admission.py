@@ -0,0 +1,81 @@
+"""
+Unit-тесты для допуска запросов (app/admission.py)
+"""
+import asyncio
+
+import pytest
+
+from app.admission import DbLatency, RouteLimiter, db_latency
+from app.config import settings
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "ROUTE_CONCURRENCY", {"default": 2, "reports": 1})
+    monkeypatch.setattr(settings, "DB_LATENCY_TARGET_MS", 50)
+    monkeypatch.setattr(settings, "DB_LATENCY_MIN_ADMISSION", 0.1)
+    yield settings.ROUTE_CONCURRENCY
+    db_latency.reset()
+
+
+class TestDbLatency:
+    """Тесты сглаженной задержки БД"""
+    
+    def test_factor_below_target(self, limits):
+        """Тест: при задержке ниже цели лимиты не меняются"""
+        latency = DbLatency()
+        latency.observe(0.01)
+        
+        assert latency.admission_factor() == 1.0
+    
+    def test_factor_scales_down(self, limits):
+        """Тест: задержка вдвое выше цели вдвое уменьшает допуск, но не ниже минимума"""
+        latency = DbLatency(alpha=1.0)
+        latency.observe(0.1)
+        assert latency.admission_factor() == pytest.approx(0.5)
+        
+        latency.observe(10.0)
+        assert latency.admission_factor() == pytest.approx(0.1)
+
+
+class TestRouteLimiter:
+    """Тесты лимита одновременных запросов группы"""
+    
+    def test_queue_timeout(self, limits):
+        """Тест: при занятой группе запрос ждёт не дольше таймаута"""
+        async def scenario():
+            limiter = RouteLimiter("reports")
+            assert await limiter.acquire(0.01)
+            assert not await limiter.acquire(0.01)
+            assert limiter.waiting == 0
+            limiter.release()
+            assert limiter.active == 0
+        
+        asyncio.run(scenario())
+    
+    def test_release_hands_slot_to_waiter(self, limits):
+        """Тест: освобождённое место получает первый в очереди"""
+        async def scenario():
+            limiter = RouteLimiter("reports")
+            await limiter.acquire(1)
+            waiter = asyncio.ensure_future(limiter.acquire(1))
+            await asyncio.sleep(0)
+            assert limiter.waiting == 1
+            
+            limiter.release()
+            assert await waiter
+            assert limiter.active == 1
+        
+        asyncio.run(scenario())
+    
+    def test_slow_db_reduces_capacity(self, limits):
+        """Тест: медленная БД уменьшает число допускаемых запросов"""
+        async def scenario():
+            limiter = RouteLimiter("other")
+            assert limiter.capacity == 2
+            db_latency.observe(1.0)
+            assert limiter.capacity == 1
+            assert await limiter.acquire(0.01)
+            assert not await limiter.acquire(0.01)
+        
+        asyncio.run(scenario())
@@ -0,0 +1,46 @@
+"""
+Unit-тесты для claims членства в access токене (app/claims.py)
+"""
+from app.claims import IdSet, MembershipClaims
+from app.models import ProjectRole
+
+
+class TestIdSet:
+    """Тесты кодирования множеств id проектов"""
+    
+    def test_sparse_set_encoded_as_list(self):
+        """Тест: несколько далёких id кодируются списком"""
+        encoded = IdSet.encode([5, 100000])
+        
+        assert encoded == [5, 100000]
+        assert 100000 in IdSet(encoded)
+        assert 6 not in IdSet(encoded)
+    
+    def test_dense_set_encoded_as_bitmap(self):
+        """Тест: плотное множество кодируется битовой картой и короче списка"""
+        ids = list(range(1000, 1500))
+        encoded = IdSet.encode(ids)
+        
+        assert isinstance(encoded, str) and encoded.startswith("b:1000:")
+        assert len(encoded) < len(",".join(map(str, ids)))
+        
+        id_set = IdSet(encoded)
+        assert all(project_id in id_set for project_id in ids)
+        assert 999 not in id_set
+        assert 1500 not in id_set
+    
+    def test_empty_set(self):
+        """Тест: пустое множество"""
+        assert 1 not in IdSet(IdSet.encode([]))
+
+
+class TestMembershipClaims:
+    """Тесты разбора claims"""
+    
+    def test_role_for(self):
+        """Тест: роль определяется по множеству, в котором есть проект"""
+        claims = MembershipClaims({"e": 0, "r": {"owner": [1], "viewer": IdSet.encode(range(10, 200))}})
+        
+        assert claims.role_for(1) == ProjectRole.OWNER
+        assert claims.role_for(150) == ProjectRole.VIEWER
+        assert claims.role_for(5) is None
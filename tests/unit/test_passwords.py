@@ -0,0 +1,59 @@
+"""
+Unit-тесты для хэширования паролей (app/passwords.py)
+"""
+import pytest
+
+from app.config import settings
+from app.passwords import get_password_hash, verify_password, needs_rehash
+
+
+@pytest.fixture
+def fast_scrypt(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "scrypt")
+    monkeypatch.setattr(settings, "SCRYPT_N_LOG2", 10)
+
+
+class TestScrypt:
+    """Тесты схемы scrypt"""
+    
+    def test_scrypt_roundtrip(self, fast_scrypt):
+        """Тест: хэш scrypt проверяется и хранит свои параметры"""
+        hashed = get_password_hash("password123")
+        
+        assert hashed.startswith("$scrypt$ln=10,r=8,p=1$")
+        assert verify_password("password123", hashed) is True
+        assert verify_password("wrong", hashed) is False
+    
+    def test_old_params_still_verify(self, fast_scrypt, monkeypatch):
+        """Тест: хэш с прежними параметрами проверяется после смены настроек"""
+        hashed = get_password_hash("password123")
+        monkeypatch.setattr(settings, "SCRYPT_N_LOG2", 11)
+        
+        assert verify_password("password123", hashed) is True
+        assert needs_rehash(hashed) is True
+
+
+class TestNeedsRehash:
+    """Тесты определения устаревших хэшей"""
+    
+    def test_current_bcrypt(self, monkeypatch):
+        """Тест: хэш с текущей стоимостью не требует перехэширования"""
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+        
+        assert needs_rehash(get_password_hash("password123")) is False
+    
+    def test_bcrypt_cost_changed(self, monkeypatch):
+        """Тест: смена стоимости bcrypt делает старые хэши устаревшими"""
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+        hashed = get_password_hash("password123")
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+        
+        assert needs_rehash(hashed) is True
+    
+    def test_scheme_changed(self, monkeypatch, fast_scrypt):
+        """Тест: bcrypt-хэш устаревает при переходе на scrypt"""
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "bcrypt")
+        hashed = get_password_hash("password123")
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "scrypt")
+        
+        assert needs_rehash(hashed) is True
@@ -0,0 +1,130 @@
+"""
+Тесты для профилировщика запросов (app/profiling.py)
+"""
+import asyncio
+import os
+import threading
+import time
+
+import anyio.to_thread
+
+from app import profiling
+from app.profiling import RequestProfile, active_profile, classify, prune_profiles
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def request_work():
+    spin(0.15)
+
+
+def foreign_work(stop):
+    while not stop.is_set():
+        spin(0.01)
+
+
+class TestClassify:
+    """Тесты категорий выборок"""
+    
+    def test_deepest_matching_frame_wins(self):
+        """Тест: SQL внутри проверки токена - db, а не auth"""
+        stack = [
+            "app/main.py:root",
+            "app/auth.py:get_current_user",
+            "sqlalchemy/orm/query.py:Query.first",
+            "sqlalchemy/engine/default.py:DefaultExecutionContext._exec",
+        ]
+        
+        assert classify(stack) == "db"
+        assert classify(stack[:2]) == "auth"
+    
+    def test_json_before_pydantic(self):
+        """Тест: dump_json TypeAdapter - кодирование JSON, validate_python - pydantic"""
+        assert classify(["app/responses.py:respond", "pydantic/type_adapter.py:TypeAdapter.dump_json"]) == "json"
+        assert classify(["app/responses.py:respond", "pydantic/type_adapter.py:TypeAdapter.validate_python"]) == "pydantic"
+        assert classify(["json/encoder.py:JSONEncoder.encode"]) == "json"
+        assert classify(["app/routers/tasks.py:get_project_tasks"]) == "other"
+
+
+class TestRequestProfile:
+    """Тесты выборки стеков"""
+    
+    def test_samples_only_request_threads(self):
+        """Тест: в профиль попадает поток пула с вызовом запроса, чужой поток - нет"""
+        stop = threading.Event()
+        foreign = threading.Thread(target=foreign_work, args=(stop,))
+        foreign.start()
+        
+        async def scenario():
+            profile = RequestProfile("test", "GET", "/", 0.002)
+            token = active_profile.set(profile)
+            profile.start()
+            try:
+                await anyio.to_thread.run_sync(request_work)
+            finally:
+                profile.stop()
+                active_profile.reset(token)
+            return profile
+        
+        try:
+            profile = asyncio.run(scenario())
+        finally:
+            stop.set()
+            foreign.join()
+        
+        stacks = "\n".join(profile.stacks)
+        assert profile.samples > 10
+        assert "request_work" in stacks
+        assert "foreign_work" not in stacks
+        assert profile.report()["breakdown_ms"]["other"] > 0
+    
+    def test_relied_on_internals_present(self):
+        """Тест: внутреннее устройство asyncio и anyio, на которое опирается отбор потоков, на месте"""
+        assert isinstance(profiling._CURRENT_TASKS, dict)
+        assert profiling._WORKER_RUN is not None
+        assert "context" in profiling._WORKER_RUN.co_varnames
+        
+        async def scenario():
+            return RequestProfile("test", "GET", "/", 0.002)
+        
+        assert asyncio.run(scenario()).report()["degraded"] is False
+    
+    def test_failed_sample_marks_report_degraded(self, monkeypatch, caplog):
+        """Тест: ошибка выборки логируется один раз, отчёт помечается неполным"""
+        def broken(thread_id, frame):
+            raise AttributeError("_current_tasks")
+        
+        async def scenario():
+            profile = RequestProfile("test", "GET", "/", 0.002)
+            monkeypatch.setattr(profile, "_request_frames", broken)
+            profile.sample(0.002)
+            profile.sample(0.002)
+            return profile
+        
+        profile = asyncio.run(scenario())
+        
+        assert profile.report()["degraded"] is True
+        assert profile.samples == 0
+        assert caplog.text.count("выборка не удалась") == 1
+
+
+class TestPruneProfiles:
+    """Тесты ограничения числа сохранённых профилей"""
+    
+    def test_oldest_removed(self, tmp_path):
+        """Тест: удаляются оба файла самых старых профилей, новые остаются"""
+        for i, name in enumerate(["c", "a", "b"]):
+            for suffix in ("json", "collapsed"):
+                path = tmp_path / f"{name}.{suffix}"
+                path.write_text("", encoding="utf-8")
+                os.utime(path, ns=(i * 10**9, i * 10**9))
+        
+        assert prune_profiles(tmp_path, keep=2) == 1
+        
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["a.collapsed", "a.json", "b.collapsed", "b.json"]
+        assert prune_profiles(tmp_path, keep=2) == 0
+
@@ -0,0 +1,180 @@
+"""
+Unit-тесты для ограничения попыток входа (app/ratelimit.py)
+
+
+Общие корзины проверяются на FakeRedis и, если доступен, на настоящем
+Redis по REDIS_TEST_URL (по умолчанию redis://localhost:6379/15)
+"""
+import os
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app import ratelimit
+from app.ratelimit import MemoryBackend, RedisBackend, LoginThrottle, TAKE_SCRIPT
+from app.redis_client import RedisError, redis
+from tests.redis_stub import FakeRedis
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+class SharedBuckets:
+    """RedisBackend с управлением временем: у FakeRedis сдвигается now, у сервера - ожидание"""
+
+    def __init__(self, client, namespace: str):
+        self.client = client
+        self.namespace = namespace
+        self.backend = RedisBackend(client, namespace=namespace)
+
+    def advance(self, seconds: float) -> None:
+        if isinstance(self.client, FakeRedis):
+            self.client.now += seconds
+        else:
+            time.sleep(seconds)
+
+    def expiry(self, key: str) -> int:
+        if isinstance(self.client, FakeRedis):
+            return self.client.ttl[self.namespace + key]
+        return self.client.ttl(self.namespace + key)
+
+
+@pytest.fixture(params=["fake", "server"])
+def shared(request):
+    namespace = f"taskmanager:test:{uuid.uuid4().hex}:"
+    if request.param == "fake":
+        yield SharedBuckets(FakeRedis(), namespace)
+        return
+    if redis is None:
+        pytest.skip("пакет redis не установлен")
+    client = redis.Redis.from_url(os.environ.get("REDIS_TEST_URL", "redis://localhost:6379/15"), socket_timeout=1)
+    try:
+        client.ping()
+    except redis.RedisError:
+        pytest.skip("Redis недоступен")
+    yield SharedBuckets(client, namespace)
+    keys = list(client.scan_iter(match=namespace + "*"))
+    if keys:
+        client.delete(*keys)
+
+
+class TestMemoryBackend:
+    """Тесты корзин в памяти"""
+    
+    def test_burst_then_wait(self, clock):
+        """Тест: после исчерпания корзины возвращается время ожидания"""
+        backend = MemoryBackend(max_entries=10)
+        
+        assert [backend.take("key", 3, 1.0) for _ in range(3)] == [0, 0, 0]
+        assert backend.take("key", 3, 1.0) == pytest.approx(1.0)
+    
+    def test_refill(self, clock):
+        """Тест: жетоны восполняются со временем, но не выше ёмкости"""
+        backend = MemoryBackend(max_entries=10)
+        for _ in range(3):
+            backend.take("key", 3, 1.0)
+        
+        clock[0] += 100
+        
+        assert [backend.take("key", 3, 1.0) for _ in range(3)] == [0, 0, 0]
+        assert backend.take("key", 3, 1.0) > 0
+    
+    def test_lru_bound(self, clock):
+        """Тест: число ключей ограничено, вытесняются давно не использованные"""
+        backend = MemoryBackend(max_entries=2)
+        backend.take("a", 1, 1.0)
+        backend.take("b", 1, 1.0)
+        backend.take("a", 1, 1.0)
+        backend.take("c", 1, 1.0)
+        
+        assert len(backend) == 2
+        # "a" сохранил пустую корзину, "b" вытеснен и начинается с полной
+        assert backend.take("a", 1, 1.0) > 0
+        assert backend.take("b", 1, 1.0) == 0
+
+
+class TestRedisBackend:
+    """Тесты корзин в Redis"""
+    
+    def test_script_call(self):
+        """Тест: корзина берётся скриптом по ключу с префиксом"""
+        client = FakeRedis()
+        backend = RedisBackend(client)
+        
+        assert backend.take("login:ip:10.0.0.1", 3, 0.5) == 0
+        assert client.scripts == [TAKE_SCRIPT]
+        assert client.script_calls[0] == (["taskmanager:ratelimit:login:ip:10.0.0.1"], [3, 0.5])
+    
+    def test_burst_then_wait(self, shared):
+        """Тест: после исчерпания общей корзины возвращается время ожидания"""
+        assert [shared.backend.take("key", 3, 1.0) for _ in range(3)] == [0, 0, 0]
+        assert shared.backend.take("key", 3, 1.0) == pytest.approx(1.0, abs=0.05)
+    
+    def test_refill(self, shared):
+        """Тест: жетоны восполняются со временем, но не выше ёмкости"""
+        for _ in range(3):
+            shared.backend.take("key", 3, 10.0)
+        
+        shared.advance(0.5)
+        
+        assert [shared.backend.take("key", 3, 10.0) for _ in range(3)] == [0, 0, 0]
+        assert shared.backend.take("key", 3, 10.0) > 0
+    
+    def test_bucket_expires_after_full_refill(self, shared):
+        """Тест: ключ корзины живёт время полного восполнения плюс секунда"""
+        shared.backend.take("key", 3, 0.5)
+        
+        assert shared.expiry("key") == pytest.approx(7, abs=1)
+    
+    def test_retry_after(self, shared):
+        """Тест: общая корзина даёт 429 с Retry-After, как корзина в памяти"""
+        throttle = LoginThrottle(shared.backend)
+        for _ in range(ratelimit.settings.LOGIN_USERNAME_BURST):
+            throttle.check("user", "10.0.0.1")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            throttle.check("User", "10.0.0.2")
+        
+        assert exc_info.value.status_code == 429
+        assert int(exc_info.value.headers["Retry-After"]) >= 1
+    
+    def test_outage_falls_back_to_memory(self, clock, caplog):
+        """Тест: при недоступном Redis лимит считается в памяти процесса"""
+        backend = RedisBackend(FakeRedis(error=RedisError("Connection refused")))
+        
+        assert [backend.take("key", 2, 1.0) for _ in range(2)] == [0, 0]
+        assert backend.take("key", 2, 1.0) == pytest.approx(1.0)
+        assert "Redis недоступен" in caplog.text
+    
+    def test_outage_keeps_login_throttled(self, clock):
+        """Тест: сбой Redis не превращается в 500 и не снимает ограничение"""
+        throttle = LoginThrottle(RedisBackend(FakeRedis(error=RedisError("Timeout"))))
+        for _ in range(ratelimit.settings.LOGIN_USERNAME_BURST):
+            throttle.check("user", "10.0.0.1")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            throttle.check("user", "10.0.0.1")
+        
+        assert exc_info.value.status_code == 429
+
+
+class TestLoginThrottle:
+    """Тесты ограничения входа"""
+    
+    def test_retry_after(self, clock):
+        """Тест: превышение лимита даёт 429 с Retry-After"""
+        throttle = LoginThrottle(MemoryBackend(max_entries=100))
+        for _ in range(ratelimit.settings.LOGIN_USERNAME_BURST):
+            throttle.check("user", "10.0.0.1")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            throttle.check("User", "10.0.0.2")
+        
+        assert exc_info.value.status_code == 429
+        assert int(exc_info.value.headers["Retry-After"]) >= 1
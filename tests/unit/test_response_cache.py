@@ -0,0 +1,87 @@
+"""
+Unit-тесты для кэша ответов (app/response_cache.py)
+"""
+from app.redis_client import RedisError
+from app.response_cache import CachedResponse, MemoryCacheBackend, RedisCacheBackend
+from tests.redis_stub import FakeRedis
+
+
+def cached(size: int, marker: bytes = b"x") -> CachedResponse:
+    return CachedResponse(marker * size, "application/json", {})
+
+
+class TestMemoryCacheBackend:
+    """Тесты кэша в памяти процесса"""
+    
+    def test_evicts_by_total_size(self):
+        """Тест: при превышении лимита байт вытесняются давно не читанные ответы"""
+        backend = MemoryCacheBackend(max_bytes=100)
+        backend.set("a", cached(40))
+        backend.set("b", cached(40))
+        backend.get("a")
+        backend.set("c", cached(40))
+    
+        assert backend.get("b") is None
+        assert backend.get("a") is not None
+        assert backend.get("c") is not None
+        assert backend.size == 80
+    
+    def test_replace_keeps_size(self):
+        """Тест: перезапись ключа не удваивает учтённый размер"""
+        backend = MemoryCacheBackend(max_bytes=100)
+        backend.set("a", cached(40))
+        backend.set("a", cached(30))
+    
+        assert backend.size == 30
+        assert len(backend) == 1
+    
+    def test_oversized_not_stored(self):
+        """Тест: ответ больше всего лимита не сохраняется и ничего не вытесняет"""
+        backend = MemoryCacheBackend(max_bytes=100)
+        backend.set("a", cached(40))
+        backend.set("big", cached(200))
+    
+        assert backend.get("big") is None
+        assert backend.get("a") is not None
+
+
+class TestRedisCacheBackend:
+    """Тесты общего кэша на Redis"""
+    
+    def test_round_trip(self):
+        """Тест: ответ с типом и заголовками читается в том же виде, с TTL"""
+        client = FakeRedis()
+        backend = RedisCacheBackend(client, ttl=60)
+        value = CachedResponse(b'{"a": 1}\n', "application/msgpack", {"X-Next-Cursor": "abc"})
+        backend.set("taskmanager:resp:1", value)
+        
+        assert backend.get("taskmanager:resp:1") == value
+        assert backend.get("taskmanager:resp:2") is None
+        assert client.ttl["taskmanager:resp:1"] == 60
+    
+    def test_shared_between_workers(self):
+        """Тест: запись одного воркера видна другому"""
+        client = FakeRedis()
+        RedisCacheBackend(client, ttl=60).set("taskmanager:resp:1", cached(10))
+        
+        assert RedisCacheBackend(client, ttl=60).get("taskmanager:resp:1") == cached(10)
+    
+    def test_clear_keeps_other_keys(self):
+        """Тест: clear удаляет только ключи кэша ответов"""
+        client = FakeRedis()
+        client.set("taskmanager:ratelimit:login:ip:10.0.0.1", b"bucket")
+        backend = RedisCacheBackend(client, ttl=60)
+        backend.set("taskmanager:resp:1", cached(10))
+        backend.clear()
+        
+        assert backend.get("taskmanager:resp:1") is None
+        assert list(client.data) == ["taskmanager:ratelimit:login:ip:10.0.0.1"]
+    
+    def test_outage_is_miss(self, caplog):
+        """Тест: недоступный Redis даёт промах, а не ошибку"""
+        backend = RedisCacheBackend(FakeRedis(error=RedisError("Connection refused")), ttl=60)
+        
+        backend.set("taskmanager:resp:1", cached(10))
+        assert backend.get("taskmanager:resp:1") is None
+        backend.clear()
+        assert "Redis недоступен" in caplog.text
@@ -0,0 +1,97 @@
+"""
+Unit-тесты для быстрого пути сериализации (app/responses.py)
+"""
+import json
+import pytest
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse, Response
+
+from app.config import settings
+from app.models import TaskStatus, TaskPriority
+from app import responses
+from app.responses import FastJSONResponse, NegotiatedResponse, respond
+from app.schemas import TaskListAdapter, TaskListResponse, serialize_utc
+
+
+@pytest.fixture
+def task_row():
+    return dict(
+        id=1,
+        title="Task",
+        status=TaskStatus.TODO,
+        priority=TaskPriority.HIGH,
+        assignee_id=None,
+        due_date=None,
+        created_at=datetime(2025, 1, 1, 12, 0, 0),
+        tags_count=2,
+        comments_count=3,
+    )
+
+
+class TestUTCSerializer:
+    """Тесты общего сериализатора дат"""
+    
+    def test_naive_datetime_is_utc(self):
+        """Тест: наивная дата получает смещение UTC"""
+        assert serialize_utc(datetime(2025, 1, 1, 12, 0)) == "2025-01-01T12:00:00+00:00"
+    
+    def test_aware_datetime_kept(self):
+        """Тест: дата с часовым поясом не меняется"""
+        dt = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        assert serialize_utc(dt) == dt.isoformat()
+    
+    def test_schema_uses_serializer(self, task_row):
+        """Тест: схема сериализует даты в UTC, None остаётся None"""
+        data = TaskListResponse(**task_row).model_dump()
+        assert data["created_at"] == "2025-01-01T12:00:00+00:00"
+        assert data["due_date"] is None
+
+
+class TestRespond:
+    """Тесты быстрого пути ответа"""
+    
+    def test_respond_disabled_returns_data(self, monkeypatch, task_row):
+        """Тест: без FAST_JSON данные возвращаются как есть"""
+        monkeypatch.setattr(settings, "FAST_JSON", False)
+        rows = [task_row]
+        assert respond(TaskListAdapter, rows) is rows
+    
+    def test_respond_enabled_returns_json(self, monkeypatch, task_row):
+        """Тест: с FAST_JSON возвращается готовый JSON-ответ"""
+        monkeypatch.setattr(settings, "FAST_JSON", True)
+        response = respond(TaskListAdapter, [task_row], status_code=201)
+        
+        assert isinstance(response, Response)
+        assert response.status_code == 201
+        assert response.media_type == "application/json"
+        data = json.loads(response.body)
+        assert data[0]["status"] == "todo"
+        assert data[0]["created_at"] == "2025-01-01T12:00:00+00:00"
+    
+    def test_fast_json_response_renders(self):
+        """Тест: FastJSONResponse кодирует словарь в JSON"""
+        response = FastJSONResponse({"status": "healthy"})
+        assert json.loads(response.body) == {"status": "healthy"}
+    
+    @pytest.mark.parametrize("response_class", [FastJSONResponse, NegotiatedResponse])
+    def test_orjson_only_with_fast_json(self, monkeypatch, response_class):
+        """Тест: orjson кодирует ответ только при FAST_JSON, иначе - штатный JSONResponse"""
+        calls = []
+        
+        class SpyOrjson:
+            OPT_NON_STR_KEYS = 0
+            
+            @staticmethod
+            def dumps(content, option=None):
+                calls.append(content)
+                return b"{}"
+        
+        monkeypatch.setattr(responses, "orjson", SpyOrjson)
+        monkeypatch.setattr(settings, "FAST_JSON", False)
+        assert response_class({"title": "Задача"}).body == JSONResponse({"title": "Задача"}).body
+        assert calls == []
+        
+        monkeypatch.setattr(settings, "FAST_JSON", True)
+        assert response_class({"title": "Задача"}).body == b"{}"
+        assert calls == [{"title": "Задача"}]
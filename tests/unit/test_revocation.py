@@ -0,0 +1,101 @@
+"""
+Unit-тесты для фильтра Блума отозванных токенов (app/revocation.py)
+"""
+import secrets
+from datetime import datetime, timedelta
+
+from app.models import RevokedToken
+from app.revocation import BloomFilter, RevocationList
+
+
+class TestBloomFilter:
+    """Тесты фильтра Блума"""
+    
+    def test_added_items_are_found(self):
+        """Тест: добавленные элементы всегда находятся"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [secrets.token_urlsafe(16) for _ in range(1000)]
+        for item in items:
+            bloom.add(item)
+        
+        assert all(item in bloom for item in items)
+    
+    def test_false_positive_rate_within_bound(self):
+        """Тест: доля ложных срабатываний близка к заданной"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for _ in range(1000):
+            bloom.add(secrets.token_urlsafe(16))
+        
+        false_positives = sum(secrets.token_urlsafe(16) in bloom for _ in range(10000))
+        assert false_positives < 300
+    
+    def test_compact_size(self):
+        """Тест: около 1.2 байта на элемент при p=0.1%"""
+        bloom = BloomFilter(capacity=100000, error_rate=0.001)
+        
+        assert len(bloom.bits) < 200000
+    
+    def test_count_ignores_repeated_items(self):
+        """Тест: повторное добавление не увеличивает count"""
+        bloom = BloomFilter(capacity=100, error_rate=0.01)
+        
+        assert bloom.add("jti")
+        assert not bloom.add("jti")
+        assert bloom.count == 1
+
+
+class TestRevocationListSync:
+    """Тесты синхронизации списка отзывов с таблицей revoked_tokens"""
+    
+    @staticmethod
+    def revoke(db_session, user, jti, revoked_at):
+        db_session.add(RevokedToken(
+            jti=jti, user_id=user.id, revoked_at=revoked_at, expires_at=revoked_at + timedelta(hours=1)
+        ))
+        db_session.commit()
+    
+    def test_sync_picks_up_revocations_from_other_processes(self, db_session, test_user):
+        """Тест: отзыв, записанный в БД в обход списка, находится после sync()"""
+        now = datetime.utcnow()
+        revocations = RevocationList(capacity=100, error_rate=0.01, clock=lambda: now)
+        revocations.sync(db_session)
+        self.revoke(db_session, test_user, "other-process", now)
+        
+        assert not revocations.is_revoked(db_session, "other-process")
+        revocations.sync(db_session)
+        assert revocations.is_revoked(db_session, "other-process")
+    
+    def test_overlap_does_not_grow_count(self, db_session, test_user):
+        """Тест: строки из окна перекрытия не учитываются повторно"""
+        clock = [datetime.utcnow()]
+        revocations = RevocationList(capacity=100, error_rate=0.01, clock=lambda: clock[0])
+        for i in range(5):
+            self.revoke(db_session, test_user, f"jti-{i}", clock[0])
+        revocations.sync(db_session)
+        
+        for _ in range(10):
+            clock[0] += timedelta(seconds=5)
+            revocations.sync(db_session)
+        
+        assert revocations._filter.count == 5
+    
+    def test_rebuild_only_after_real_growth(self, db_session, test_user):
+        """Тест: фильтр пересобирается, когда новых отзывов больше ёмкости"""
+        clock = [datetime.utcnow()]
+        revocations = RevocationList(capacity=3, error_rate=0.01, clock=lambda: clock[0])
+        for i in range(3):
+            self.revoke(db_session, test_user, f"jti-{i}", clock[0])
+        revocations.sync(db_session)
+        built = revocations._filter
+        
+        clock[0] += timedelta(seconds=5)
+        revocations.sync(db_session)
+        assert revocations._filter is built
+        
+        # Пересборка держит запас вдвое: ёмкость 6, седьмой отзыв её превышает
+        for i in range(3, 7):
+            self.revoke(db_session, test_user, f"jti-{i}", clock[0])
+        revocations.sync(db_session)
+        revocations.sync(db_session)
+        assert revocations._filter is not built
+        assert revocations.capacity == 14
@@ -0,0 +1,77 @@
+"""
+Unit-тесты для объединения одинаковых вычислений (app/singleflight.py)
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.singleflight import SingleFlight, coalesced_calls, coalescing_ratio
+
+
+def run_concurrently(flight, key, count, func):
+    """Запускает count вызовов, пока первый (leader) заблокирован"""
+    pool = ThreadPoolExecutor(max_workers=count)
+    futures = [pool.submit(flight.do, key, func)]
+    while len(flight) == 0:
+        pass
+    futures += [pool.submit(flight.do, key, func) for _ in range(count - 1)]
+    pool.shutdown(wait=False)
+    return futures
+
+
+class TestSingleFlight:
+    """Тесты single-flight"""
+    
+    def test_concurrent_calls_share_result(self):
+        """Тест: одновременные вызовы с одним ключом выполняют функцию один раз"""
+        flight = SingleFlight("test_share")
+        release = threading.Event()
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return object()
+        
+        futures = run_concurrently(flight, "key", 5, compute)
+        # Ждём, пока все последователи встанут в очередь за результатом
+        threading.Timer(0.2, release.set).start()
+        results = [future.result(timeout=5) for future in futures]
+        
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert coalesced_calls.value(endpoint="test_share", role="follower") == 4
+        assert coalescing_ratio.value(endpoint="test_share") == pytest.approx(0.8)
+        assert len(flight) == 0
+    
+    def test_sequential_calls_not_cached(self):
+        """Тест: завершённый результат не переиспользуется"""
+        flight = SingleFlight("test_sequential")
+        
+        assert flight.do("key", lambda: 1) == 1
+        assert flight.do("key", lambda: 2) == 2
+    
+    def test_different_keys_independent(self):
+        """Тест: разные ключи (например, версии проекта) не объединяются"""
+        flight = SingleFlight("test_keys")
+        
+        assert flight.do(("tasks", 1, 1), lambda: "v1") == "v1"
+        assert flight.do(("tasks", 1, 2), lambda: "v2") == "v2"
+    
+    def test_error_propagates_to_followers(self):
+        """Тест: ошибка вычисления получают все ожидающие, ключ освобождается"""
+        flight = SingleFlight("test_error")
+        release = threading.Event()
+        
+        def compute():
+            release.wait(5)
+            raise ValueError("boom")
+        
+        futures = run_concurrently(flight, "key", 3, compute)
+        threading.Timer(0.2, release.set).start()
+        
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+        assert flight.do("key", lambda: "ok") == "ok"
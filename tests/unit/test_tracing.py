@@ -0,0 +1,210 @@
+"""
+Тесты для трассировки (app/tracing.py)
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.tracing import (
+    Sampler, Span, SpanBuffer, SpanExporter, current_span, format_traceparent,
+    parse_traceparent, span_buffer, start_span, traced
+)
+
+
+class TestTraceparent:
+    """Тесты разбора заголовка traceparent"""
+    
+    def test_roundtrip(self):
+        """Тест: идентификаторы и флаг sampled сохраняются"""
+        header = format_traceparent("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)
+        
+        assert header == "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        assert parse_traceparent(header) == ("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)
+        assert parse_traceparent(header[:-1] + "0")[2] is False
+    
+    @pytest.mark.parametrize("header", [
+        None,
+        "",
+        "garbage",
+        "01-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+        "00-00000000000000000000000000000000-b7ad6b7169203331-01",
+        "00-0af7651916cd43dd8448eb211c80319c-0000000000000000-01",
+    ])
+    def test_invalid_ignored(self, header):
+        """Тест: некорректный заголовок - новая трасса"""
+        assert parse_traceparent(header) is None
+
+
+class TestSampler:
+    """Тесты решения о записи трассы"""
+    
+    def test_parent_decision_respected(self, monkeypatch):
+        """Тест: флаг входящего traceparent важнее доли"""
+        monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 0.0)
+        sampler = Sampler()
+        sampler.reset()
+        
+        assert sampler.should_sample(True) is True
+        assert sampler.should_sample(False) is False
+        assert sampler.should_sample(None) is False
+    
+    def test_rate_capped(self, monkeypatch):
+        """Тест: сверх TRACE_MAX_TRACES_PER_SECOND трассы не пишутся"""
+        monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 1.0)
+        monkeypatch.setattr(settings, "TRACE_MAX_TRACES_PER_SECOND", 5)
+        sampler = Sampler()
+        sampler.reset()
+        
+        decisions = [sampler.should_sample(None) for _ in range(20)]
+        
+        assert decisions.count(True) == 5
+
+
+class TestSpans:
+    """Тесты спанов и буфера"""
+    
+    def test_nested_spans_without_trace_are_noop(self):
+        """Тест: без записываемой трассы спаны не создаются"""
+        @traced("work")
+        def work():
+            return current_span.get()
+        
+        with start_span("outer") as span:
+            assert span is None
+            assert work() is None
+        assert len(span_buffer) == 0
+    
+    def test_nested_spans(self):
+        """Тест: дочерние спаны ссылаются на родителя, ошибка отмечается"""
+        root = Span("0af7651916cd43dd8448eb211c80319c", None, "root")
+        token = current_span.set(root)
+        try:
+            with start_span("child", kind="test") as child:
+                with pytest.raises(ValueError):
+                    with start_span("grandchild"):
+                        raise ValueError("boom")
+        finally:
+            current_span.reset(token)
+        
+        spans = {span.name: span for span in span_buffer.drain()}
+        assert spans["child"].parent_id == root.span_id
+        assert spans["child"].attributes == {"kind": "test"}
+        assert spans["grandchild"].parent_id == child.span_id
+        assert spans["grandchild"].error == "ValueError: boom"
+        assert spans["child"].error is None
+    
+    def test_query_span_without_parameters(self, db_session, monkeypatch):
+        """Тест: спан SQL запроса несёт обрезанный текст, но не значения параметров"""
+        monkeypatch.setattr(settings, "TRACE_MAX_STATEMENT_LENGTH", 20)
+        root = Span("0af7651916cd43dd8448eb211c80319c", None, "root")
+        token = current_span.set(root)
+        try:
+            db_session.execute(text("SELECT id FROM users WHERE hashed_password = :secret"), {"secret": "s3cr3t-hash"})
+        finally:
+            current_span.reset(token)
+        
+        query = next(span for span in span_buffer.drain() if span.name == "db.query")
+        assert query.attributes["db.statement"] == "SELECT id FROM users"
+        assert "s3cr3t-hash" not in json.dumps(query.to_otlp())
+    
+    def test_buffer_drops_oldest(self, monkeypatch):
+        """Тест: при переполнении буфера отбрасываются старые спаны"""
+        monkeypatch.setattr(settings, "TRACE_BUFFER_SIZE", 3)
+        buffer = SpanBuffer()
+        for i in range(5):
+            buffer.add(Span("0af7651916cd43dd8448eb211c80319c", None, f"span{i}"))
+        
+        assert [span.name for span in buffer.drain()] == ["span2", "span3", "span4"]
+        assert len(buffer) == 0
+
+
+def finished_spans(count):
+    buffer = SpanBuffer()
+    root = Span("0af7651916cd43dd8448eb211c80319c", None, "GET /", {"http.method": "GET"})
+    for i in range(count - 1):
+        child = root.child("db.query", {"db.system": "sqlite", "db.rowcount": i})
+        child.end_ns = child.start_ns + 1000
+        buffer.add(child)
+    root.end_ns = root.start_ns + 5000
+    buffer.add(root)
+    return buffer
+
+
+class TestExporter:
+    """Тесты выгрузки спанов"""
+    
+    def test_file_export(self, tmp_path, monkeypatch):
+        """Тест: буфер выгружается строкой OTLP/JSON в файл и очищается"""
+        path = tmp_path / "traces.jsonl"
+        monkeypatch.setattr(settings, "TRACE_OTLP_URL", None)
+        monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(path))
+        buffer = finished_spans(3)
+        exporter = SpanExporter(buffer)
+        
+        assert exporter.run_once() == 3
+        assert exporter.run_once() == 0
+        
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 1
+        spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root = next(span for span in spans if "parentSpanId" not in span)
+        queries = [span for span in spans if span.get("parentSpanId") == root["spanId"]]
+        assert root["kind"] == 2
+        assert [query["kind"] for query in queries] == [3, 3]
+        assert {"key": "db.rowcount", "value": {"intValue": "1"}} in queries[1]["attributes"]
+    
+    def test_otlp_export(self, monkeypatch):
+        """Тест: с TRACE_OTLP_URL спаны отправляются POST на /v1/traces"""
+        received = []
+        
+        class Collector(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                received.append((self.path, self.headers["Content-Type"], json.loads(body)))
+                self.send_response(200)
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        server = HTTPServer(("127.0.0.1", 0), Collector)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            monkeypatch.setattr(settings, "TRACE_OTLP_URL", f"http://127.0.0.1:{server.server_port}")
+            assert SpanExporter(finished_spans(2)).run_once() == 2
+        finally:
+            server.shutdown()
+        
+        path, content_type, payload = received[0]
+        assert path == "/v1/traces"
+        assert content_type == "application/json"
+        assert len(payload["resourceSpans"][0]["scopeSpans"][0]["spans"]) == 2
+    
+    def test_no_sink_drops(self, tmp_path, monkeypatch):
+        """Тест: без коллектора и файла спаны отбрасываются, файл не создаётся"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(settings, "TRACE_OTLP_URL", None)
+        monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", None)
+        buffer = finished_spans(2)
+        
+        assert SpanExporter(buffer).run_once() == 0
+        assert len(buffer) == 0
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_disabled_by_default(self):
+        """Тест: трассировка и выгрузка в файл включаются только явно"""
+        assert type(settings).model_fields["TRACE_ENABLED"].default is False
+        assert type(settings).model_fields["TRACE_EXPORT_PATH"].default is None
+    
+    def test_unreachable_collector_drops(self, monkeypatch):
+        """Тест: недоступный коллектор - спаны отброшены, буфер не растёт"""
+        monkeypatch.setattr(settings, "TRACE_OTLP_URL", "http://127.0.0.1:9")
+        buffer = finished_spans(2)
+        
+        assert SpanExporter(buffer).run_once() == 0
+        assert len(buffer) == 0